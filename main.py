@@ -6,25 +6,31 @@ Run this file to start the game.
 Place knight.png, ranger.png, wizard.png in the same directory (or placeholders will be drawn)
 """
 
+import time
+_PROCESS_START = time.perf_counter()
+
 import pygame
+import os
 import sys
 import random
+import argparse
 import traceback
 from src.config import (WIDTH, HEIGHT, FPS, ASSET_PATHS, MAP_W, MAP_H, 
-                    TILE, MAP_TOP, BG, CONFIG)
-from src.utils import load_and_prepare_sprite, make_anim_frames
-from src.map import generate_map
-from src.game import Game
+                    TILE, MAP_TOP, BG, CONFIG, MAP_IMAGE_PATH,
+                    BOMB_IMAGE_PATH, BOMB_IMAGE_SIZE)
+from src.utils import load_and_prepare_sprite, make_anim_frames, LazyAnimFrames
+from src.assets import get_assets
+from src.fonts import load_fonts
+from src.startup import StartupTimer
 from src.ui import draw_combined_select
+from src.gcsched import FrameMonitor
+from src.display import ScaledDisplay, parse_size
+from src import telemetry
+from src.log import LOG
 
 def init_fonts():
     """Initialize pygame fonts"""
-    fonts = {}
-    if pygame.font.get_init():
-        fonts['FONT'] = pygame.font.SysFont("Segoe UI", 16)
-        fonts['BIG'] = pygame.font.SysFont("Segoe UI", 32)
-        fonts['SMALL'] = pygame.font.SysFont("Segoe UI", 12)
-    return fonts
+    return load_fonts()
 
 def load_sprites():
     """Load and prepare all character sprites"""
@@ -34,8 +40,28 @@ def load_sprites():
     return sprites
 
 def create_animation_frames(sprites):
-    """Create animation frames from sprites"""
-    return {name: make_anim_frames(sprites[name]) for name in ASSET_PATHS.keys()}
+    """Animation frames per character, built the first time a character is drawn in game"""
+    assets = get_assets()
+
+    def build(name):
+        return assets.anim_frames(ASSET_PATHS[name]) or make_anim_frames(sprites[name])
+    return LazyAnimFrames(build)
+
+def preload_assets():
+    """Queue decoding of everything the game needs on the asset thread pool."""
+    assets = get_assets()
+    for path in ASSET_PATHS.values():
+        assets.preload_sprite(path)
+    assets.preload_image(BOMB_IMAGE_PATH, BOMB_IMAGE_SIZE, smooth=False)
+    assets.preload_map(MAP_IMAGE_PATH, TILE)
+
+def build_game(sprites, map_seed=None):
+    """Everything only the match needs: map, bomb art, game logic modules."""
+    from src.map import generate_map, default_plant_zone
+    from src.game import Game
+    game_map = generate_map(map_seed)
+    get_assets().image(BOMB_IMAGE_PATH, BOMB_IMAGE_SIZE, smooth=False)
+    return Game(game_map, default_plant_zone(), sprites, create_animation_frames(sprites))
 
 def handle_game_state(game, events, sel_index):
     """Handle game state transitions and input"""
@@ -55,46 +81,175 @@ def handle_game_state(game, events, sel_index):
                         game.selected_chars["B"] = random.choice(names)
                         game.create_players()
             elif game.state == "ROUND_END":
-                current_time = pygame.time.get_ticks()
-                if current_time - game.between_timer > CONFIG.ROUND_END_WAIT_MS:
+                if game.timers.now - game.between_timer > CONFIG.ROUND_END_WAIT_MS / 1000.0:
                     game.reset_for_next_round()
             elif event.key == pygame.K_ESCAPE:
                 return False, sel_index
     return True, sel_index
 
-def main():
+def select_character(display, clock, sprites, fonts, sel_index=0):
+    """Run the selection screen on its own; returns the chosen name or None if the window closed."""
+    names = list(ASSET_PATHS.keys())
+    while True:
+        clock.tick(FPS)
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                return None
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_LEFT:
+                    sel_index = (sel_index - 1) % len(names)
+                elif event.key == pygame.K_RIGHT:
+                    sel_index = (sel_index + 1) % len(names)
+                elif event.key == pygame.K_RETURN and names:
+                    return names[sel_index]
+                elif event.key == pygame.K_ESCAPE:
+                    return None
+        draw_combined_select(display.canvas, sel_index, sprites, fonts)
+        display.present()
+
+def parse_args(argv=None):
+    from src.protocol import DEFAULT_PORT
+    parser = argparse.ArgumentParser(description="Pixel Tactics")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--host", action="store_true", help="run a server in-process and join it")
+    mode.add_argument("--connect", metavar="HOST", help="join the server at HOST")
+    mode.add_argument("--spectate", metavar="HOST", help="watch a match on the server at HOST")
+    parser.add_argument("--match", type=int, help="match to spectate (default: the server's first)")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--tcp", action="store_true", help="use the TCP transport instead of UDP")
+    parser.add_argument("--name", default="Player")
+    parser.add_argument("--map-seed", type=int,
+                        help="play a procedurally generated map; must match the server's")
+    parser.add_argument("--canvas", type=parse_size, default=(WIDTH, HEIGHT), metavar="WxH",
+                        help="internal render resolution, integer-scaled to the window")
+    parser.add_argument("--scale", type=int, default=1, help="window size as a multiple of the canvas")
+    parser.add_argument("--fullscreen", action="store_true")
+    parser.add_argument("--pipelined", action="store_true",
+                        help="simulate on a worker thread and render interpolated snapshots")
+    parser.add_argument("--telemetry", metavar="DIR",
+                        help="record match events and heatmaps into DIR (see src/telemetry.py)")
+    parser.add_argument("--frame-gc", action="store_true",
+                        help="freeze loaded objects and only collect garbage in frame slack or between rounds")
+    parser.add_argument("--track-allocs", action="store_true",
+                        help="sample per-frame allocation peaks with tracemalloc (F3 shows them)")
+    return parser.parse_args(argv)
+
+def run_networked(args, display, clock, fonts, sprites, game):
+    from src.client import run_client
+    char = select_character(display, clock, sprites, fonts)
+    if char is None:
+        return
+    host = args.connect
+    if args.host:
+        from src.server import serve_in_thread
+        serve_in_thread(host="0.0.0.0", port=args.port, use_tcp=args.tcp, map_seed=args.map_seed)
+        host = "127.0.0.1"
+    run_client(display, clock, fonts, game, host, args.port, char, args.name, args.tcp)
+
+def run_pipelined(display, clock, fonts, sprites, game, map_seed=None):
+    """Local game with the simulation on a worker thread; see src/pipeline.py"""
+    from src.pipeline import SimulationThread
+    from src.netstate import apply_state
+    from src.client import local_controls
+    char = select_character(display, clock, sprites, fonts)
+    if char is None:
+        return
+    game.selected_chars["A"] = char
+    game.selected_chars["B"] = random.choice(list(ASSET_PATHS.keys()))
+    game.create_players()
+    name = game.human_player.name
+    # the render thread only ever draws this mirror, never the simulated game
+    view = build_game(sprites, map_seed)
+    sim = SimulationThread(game, FPS, player_name=name)
+    sim.start()
+    try:
+        running = True
+        while running:
+            clock.tick(FPS)
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                    running = False
+            apply_state(view, sim.render_state(), name)
+            if view.human_player is not None:
+                sim.submit_input(local_controls(view, pygame.key.get_pressed(),
+                                                pygame.mouse.get_pressed(), display.mouse_pos()))
+            display.canvas.fill(BG)
+            view.draw(display.canvas, fonts)
+            display.present()
+    finally:
+        sim.stop()
+        LOG.info("main", "simulation step %.2f ms, %d dropped ticks", sim.step_ms, sim.dropped_ticks)
+
+def main(argv=None):
     """Main game loop"""
+    args = parse_args(argv)
     try:
+        # e.g. PIXEL_TACTICS_LOG="info,bomb=debug,input=debug"
+        LOG.configure(os.environ.get("PIXEL_TACTICS_LOG", ""))
+        LOG.start()
+        if args.telemetry:
+            telemetry.open_sink(args.telemetry)
+
+        startup = StartupTimer(_PROCESS_START)
+        startup.mark("imports")
+
+        # Start decoding assets while the window opens
+        preload_assets()
+
         # Initialize pygame
         pygame.init()
         pygame.font.init()
-        screen = pygame.display.set_mode((WIDTH, HEIGHT))
-        pygame.display.set_caption("Pixel Tactics — With Art (Fixed)")
+        cw, ch = args.canvas
+        display = ScaledDisplay(args.canvas, (cw * args.scale, ch * args.scale), args.fullscreen,
+                                caption="Pixel Tactics — With Art (Fixed)")
+        screen = display.canvas
         clock = pygame.time.Clock()
+        startup.mark("window")
 
-        # Load resources
+        # Only what the selection screen shows is needed for the first frame
         fonts = init_fonts()
+        startup.mark("fonts")
         sprites = load_sprites()
-        anim_frames = create_animation_frames(sprites)
-        game_map = generate_map()
-        plant_zone = pygame.Rect((MAP_W * TILE) // 2 - 40, MAP_TOP + (MAP_H * TILE) // 2 - 40, 80, 80)
+        startup.mark("sprites")
+        sel_index = 0
+        draw_combined_select(screen, sel_index, sprites, fonts)
+        display.present()
+        startup.mark("draw")
+        startup.report()
 
         # Create game instance
-        game = Game(game_map, plant_zone, sprites, anim_frames)
-        sel_index = 0
+        game = build_game(sprites, args.map_seed)
+        get_assets().report()
+        if args.spectate:
+            from src.client import run_spectator
+            run_spectator(display, clock, fonts, game, args.spectate, args.port, args.match, args.tcp)
+            return
+        if args.host or args.connect:
+            run_networked(args, display, clock, fonts, sprites, game)
+            return
+        if args.pipelined:
+            run_pipelined(display, clock, fonts, sprites, game, args.map_seed)
+            return
         running = True
+        monitor = FrameMonitor(1.0 / FPS, manage_gc=args.frame_gc, sample_allocs=args.track_allocs)
+        monitor.start()
 
         # Main game loop
         while running:
             dt = clock.tick(FPS) / 1000.0
+            monitor.begin_frame()
             events = pygame.event.get()
+            for event in events:
+                monitor.handle_event(event)
             running, sel_index = handle_game_state(game, events, sel_index)
             if not running:
                 break
 
             keys = pygame.key.get_pressed()
             mouse_buttons = pygame.mouse.get_pressed()
-            mouse_pos = pygame.mouse.get_pos()
+            mouse_pos = display.mouse_pos()
 
             screen.fill(BG)
 
@@ -104,12 +259,17 @@ def main():
                 game.update(dt, keys, mouse_buttons, mouse_pos)
                 game.draw(screen, fonts)
 
-            pygame.display.flip()
+            monitor.draw(screen, fonts['SMALL'])
+            display.present()
+            monitor.end_frame(game.state)
+        monitor.stop()
 
     except Exception as e:
-        print(f"Game crashed: {e}")
-        traceback.print_exc()
+        LOG.error("main", "Game crashed: %s\n%s", e, traceback.format_exc())
     finally:
+        telemetry.SINK.close()
+        get_assets().shutdown()
+        LOG.stop()
         pygame.quit()
         sys.exit()
 
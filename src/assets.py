@@ -0,0 +1,306 @@
+"""
+assets.py
+Process-wide asset manager with an on-disk preprocessed pixel cache
+
+Every image is decoded and scaled at most once per process and shared by all
+callers. Preprocessed results (scaled sprites, animation frames, map grids)
+are persisted under .cache/assets keyed by a hash of the source file contents
+and the processing parameters, so warm starts skip PNG decoding and scaling.
+Work can be queued on a thread pool with preload_*() before the window opens;
+the matching get call later waits for the result and converts it for display.
+"""
+
+import os
+import time
+import struct
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+import pygame
+from pygame import Surface
+from src.config import SPRITE_SIZE, MAP_W, MAP_H
+from src.log import LOG
+
+CACHE_DIR = os.path.join(".cache", "assets")
+
+# bump when decode/scale/classify logic changes to invalidate old entries
+CACHE_VERSION = 1
+
+_HEADER = struct.Struct("<4sHHH")
+_MAGIC = b"PTAC"
+
+def _file_digest(path):
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+def _decode_scaled(path, size, smooth):
+    """Decode path and scale to size; returns (w, h, RGBA bytes). No display needed."""
+    img = pygame.image.load(path)
+    if img.get_width() == 0 or img.get_height() == 0:
+        raise ValueError(f"Invalid image dimensions in {path}")
+    if size is not None and img.get_size() != tuple(size):
+        if smooth:
+            img = pygame.transform.smoothscale(_to_32bit(img), size)
+        else:
+            img = pygame.transform.scale(img, size)
+    return img.get_width(), img.get_height(), pygame.image.tobytes(img, "RGBA")
+
+def _to_32bit(img):
+    # smoothscale needs 24/32-bit input; without a display we can't convert_alpha
+    if img.get_bitsize() in (24, 32):
+        return img
+    out = Surface(img.get_size(), pygame.SRCALPHA, 32)
+    out.blit(img, (0, 0))
+    return out
+
+def _bob_frame(w, h, data, offset=2):
+    """Second animation frame: the sprite shifted down by offset pixels."""
+    src = pygame.image.frombytes(data, (w, h), "RGBA")
+    out = Surface((w, h), pygame.SRCALPHA, 32)
+    out.blit(src, (0, offset))
+    return w, h, pygame.image.tobytes(out, "RGBA")
+
+def _map_data_key(name, game_map):
+    digest = hashlib.sha1(bytes(v for row in game_map for v in row)).hexdigest()
+    return f"{name}-{digest}-{MAP_W}x{MAP_H}"
+
+class AssetManager:
+    def __init__(self, cache_dir=CACHE_DIR, workers=4):
+        self.cache_dir = cache_dir
+        self._lock = threading.Lock()
+        self._pool = None
+        self._workers = workers
+        self._pending = {}
+        self._pixels = {}
+        self._surfaces = {}
+        self._failed = set()
+        self.hits = 0
+        self.misses = 0
+        self.started_at = time.perf_counter()
+
+    # --- disk cache ---
+    def _cache_path(self, key):
+        return os.path.join(self.cache_dir, key + ".bin")
+
+    def _read_cache(self, key):
+        path = self._cache_path(key)
+        try:
+            with open(path, "rb") as f:
+                blob = f.read()
+        except OSError:
+            return None
+        if len(blob) < _HEADER.size:
+            return None
+        magic, version, w, h = _HEADER.unpack_from(blob)
+        if magic != _MAGIC or version != CACHE_VERSION:
+            return None
+        return w, h, blob[_HEADER.size:]
+
+    def _write_cache(self, key, w, h, payload):
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            path = self._cache_path(key)
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "wb") as f:
+                f.write(_HEADER.pack(_MAGIC, CACHE_VERSION, w, h))
+                f.write(payload)
+            os.replace(tmp, path)
+        except OSError as e:
+            LOG.warning("assets", "could not write asset cache %s: %s", key, e)
+
+    def _cached(self, key, produce):
+        """Return (w, h, bytes) for key from disk, or produce() and persist it."""
+        hit = self._read_cache(key)
+        if hit is not None:
+            with self._lock:
+                self.hits += 1
+            return hit
+        w, h, payload = produce()
+        with self._lock:
+            self.misses += 1
+        self._write_cache(key, w, h, payload)
+        return w, h, payload
+
+    # --- background jobs ---
+    def _submit(self, keys, fn):
+        """
+        Queue fn on the pool. With several keys, fn returns one result per
+        key and each key resolves to its own item.
+        """
+        with self._lock:
+            if any(k in self._pending or k in self._pixels for k in keys):
+                return
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self._workers, thread_name_prefix="assets")
+            future = self._pool.submit(fn)
+            for i, k in enumerate(keys):
+                self._pending[k] = (future, i if len(keys) > 1 else None)
+
+    def _result(self, key, fn):
+        """Wait for a queued job for key, or run fn inline if none was queued."""
+        with self._lock:
+            if key in self._pixels:
+                return self._pixels[key]
+            pending = self._pending.pop(key, None)
+        if pending is None:
+            result = fn()
+        else:
+            future, index = pending
+            result = future.result() if index is None else future.result()[index]
+        with self._lock:
+            self._pixels[key] = result
+        return result
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    # --- images ---
+    def _image_job(self, path, size, smooth):
+        key = ("image", path, size, smooth)
+
+        def job():
+            digest = _file_digest(path)
+            disk_key = f"img-{digest}-{size[0] if size else 0}x{size[1] if size else 0}-{int(smooth)}"
+            return self._cached(disk_key, lambda: _decode_scaled(path, size, smooth))
+        return key, job
+
+    def _bob_pixels(self, w, h, data):
+        disk_key = f"bob-{hashlib.sha1(data).hexdigest()}"
+        return self._cached(disk_key, lambda: _bob_frame(w, h, data))
+
+    def _frame_job(self, path, size):
+        key = ("bob", path, size)
+        img_key, img_job = self._image_job(path, size, True)
+        return key, lambda: self._bob_pixels(*self._result(img_key, img_job))
+
+    def preload_image(self, path, size=None, smooth=True):
+        size = tuple(size) if size else None
+        key, job = self._image_job(path, size, smooth)
+        self._submit((key,), job)
+
+    def preload_sprite(self, path, size=SPRITE_SIZE, with_frames=True):
+        if not os.path.exists(path):
+            return
+        if not with_frames:
+            self.preload_image(path, (size, size))
+            return
+        img_key, img_job = self._image_job(path, (size, size), True)
+        frame_key, _ = self._frame_job(path, (size, size))
+
+        def job():
+            base = img_job()
+            return base, self._bob_pixels(*base)
+        # one job for both so a pool worker never blocks on another queued job
+        self._submit((img_key, frame_key), job)
+
+    def _surface(self, key, job):
+        with self._lock:
+            surf = self._surfaces.get(key)
+        if surf is not None:
+            return surf
+        w, h, data = self._result(key, job)
+        surf = pygame.image.frombytes(data, (w, h), "RGBA")
+        if pygame.display.get_surface() is not None:
+            surf = surf.convert_alpha()
+        with self._lock:
+            self._surfaces[key] = surf
+        return surf
+
+    def image(self, path, size=None, smooth=True):
+        """Shared Surface for path scaled to size, or None if it can't be loaded."""
+        size = tuple(size) if size else None
+        key, job = self._image_job(path, size, smooth)
+        with self._lock:
+            surf = self._surfaces.get(key)
+            if surf is not None or key in self._failed:
+                return surf
+        try:
+            if not os.path.exists(path):
+                raise FileNotFoundError(f"Image file not found: {path}")
+            surf = self._surface(key, job)
+            LOG.debug("assets", "loaded %s at %s", path, surf.get_size())
+            return surf
+        except (pygame.error, OSError, ValueError) as e:
+            LOG.warning("assets", "failed to load image %s: %s", path, e)
+            with self._lock:
+                self._failed.add(key)
+            return None
+
+    def anim_frames(self, path, size=SPRITE_SIZE):
+        """Two-frame bobbing animation for a sprite, or None if it can't be loaded."""
+        base = self.image(path, (size, size))
+        if base is None:
+            return None
+        key, job = self._frame_job(path, (size, size))
+        return (base, self._surface(key, job))
+
+    # --- map grids ---
+    def _grid_job(self, image_path, tile_size):
+        key = ("grid", image_path, tile_size)
+
+        def job():
+            from src.map import generate_map_from_image
+            digest = _file_digest(image_path)
+            disk_key = f"grid-{digest}-{tile_size}-{MAP_W}x{MAP_H}"
+
+            def produce():
+                grid = generate_map_from_image(image_path, tile_size=tile_size)
+                return MAP_W, MAP_H, bytes(v for row in grid for v in row)
+            return self._cached(disk_key, produce)
+        return key, job
+
+    def preload_map(self, image_path, tile_size):
+        if os.path.exists(image_path):
+            key, job = self._grid_job(image_path, tile_size)
+            self._submit((key,), job)
+
+    def map_grid(self, image_path, tile_size):
+        """Tile grid for a map image as a fresh list of rows (callers may mutate it)."""
+        if not os.path.exists(image_path):
+            raise FileNotFoundError(f"Map image not found: {image_path}")
+        key, job = self._grid_job(image_path, tile_size)
+        w, h, data = self._result(key, job)
+        return [list(data[y * w:(y + 1) * w]) for y in range(h)]
+
+    def map_data(self, name, game_map, produce):
+        """
+        (w, h, bytes) derived from a tile grid, e.g. its clearance field.
+        Shared in-process and cached on disk, keyed by name and grid contents.
+        """
+        disk_key = _map_data_key(name, game_map)
+        return self._result(("map_data", disk_key), lambda: self._cached(disk_key, produce))
+
+    def loaded_map_data(self, name, game_map):
+        """map_data() result if this process already has it, else None; never computes."""
+        with self._lock:
+            return self._pixels.get(("map_data", _map_data_key(name, game_map)))
+
+    # --- sharing between processes (see sharedmaps.py) ---
+    def loaded(self):
+        """Every (key, (w, h, data)) this process has decoded or computed so far."""
+        with self._lock:
+            return list(self._pixels.items())
+
+    def provide(self, key, result):
+        """Use result, e.g. a read-only view of shared memory, instead of loading key."""
+        with self._lock:
+            self._pixels[key] = result
+
+    def report(self):
+        """Log how long loading took and whether this was a cold or warm start."""
+        elapsed = (time.perf_counter() - self.started_at) * 1000.0
+        kind = "warm" if self.misses == 0 else ("cold" if self.hits == 0 else "partial")
+        LOG.info("startup", "assets ready in %.1f ms (%s start: %d cached, %d decoded)",
+                 elapsed, kind, self.hits, self.misses)
+        return elapsed
+
+_assets = None
+
+def get_assets():
+    """The process-wide AssetManager."""
+    global _assets
+    if _assets is None:
+        _assets = AssetManager()
+    return _assets
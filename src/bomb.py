@@ -5,107 +5,146 @@ Bomb entity with planting and defusing mechanics
 
 import pygame
 import math
-import os
 from pygame import Surface
-from src.config import CONFIG, YELLOW, WHITE
+from src.config import CONFIG, YELLOW, WHITE, BOMB_IMAGE_PATH, BOMB_IMAGE_SIZE
+from src.log import LOG
+from src.assets import get_assets
+from src.timers import Scheduler
+from src.telemetry import SINK, PLANT, DEFUSE, EXPLODE
 
 class Bomb:
-    def __init__(self, plant_zone):
+    """
+    Plant, defuse and explosion are deadlines on the Game's scheduler; the
+    callbacks do the work when they expire. update() only has to check that
+    a planter or defuser is still in the zone while one is active.
+    """
+
+    def __init__(self, plant_zone, game=None):
+        self.game = game
+        self.timers = game.timers if game is not None else Scheduler()
         self.planted = False
         self.planting_player = None
-        self.plant_progress = 0.0
+        self.plant_done_at = 0.0
         self.plant_done = False
         self.defusing_player = None
-        self.defuse_progress = 0.0
+        self.defuse_done_at = 0.0
         self.plant_zone = plant_zone
         if plant_zone:
             self.location = (plant_zone.centerx, plant_zone.centery)
         else:
             self.location = (480, 320)
-        self.countdown = CONFIG.BOMB_TIMER_MS / 1000.0
-        
-        # Load bomb image
-        self.bomb_image = None
-        bomb_path = os.path.join("Assets", "bomb.png")
-        print(f"Looking for bomb image at: {bomb_path}")
-        print(f"Bomb image exists: {os.path.exists(bomb_path)}")
-        
-        if os.path.exists(bomb_path):
-            try:
-                self.bomb_image = pygame.image.load(bomb_path).convert_alpha()
-                # Scale to reasonable size (adjust as needed)
-                self.bomb_image = pygame.transform.scale(self.bomb_image, (32, 32))
-                print(f"Bomb image loaded successfully: {self.bomb_image.get_size()}")
-            except Exception as e:
-                print(f"Could not load bomb image: {e}")
+        # explode_at is set while the bomb is ticking; otherwise countdown is this stored value
+        self.explode_at = None
+        self._countdown = CONFIG.BOMB_TIMER_MS / 1000.0
+        self._plant_timer = None
+        self._defuse_timer = None
+        self._explode_timer = None
+
+    # countdown views of the deadlines, as drawn and sent over the network
+    @property
+    def plant_progress(self):
+        return self.timers.remaining(self.plant_done_at) if self.planting_player else 0.0
+
+    @plant_progress.setter
+    def plant_progress(self, seconds):
+        self.plant_done_at = self.timers.now + seconds
+
+    @property
+    def defuse_progress(self):
+        return self.timers.remaining(self.defuse_done_at) if self.defusing_player else 0.0
+
+    @defuse_progress.setter
+    def defuse_progress(self, seconds):
+        self.defuse_done_at = self.timers.now + seconds
+
+    @property
+    def countdown(self):
+        if self.explode_at is not None:
+            return self.timers.remaining(self.explode_at)
+        return self._countdown
+
+    @countdown.setter
+    def countdown(self, seconds):
+        self._countdown = seconds
 
     def start_plant(self, player):
-        if self.planted:
+        if self.planted or self.planting_player is player:
             return
         if not self.plant_zone.collidepoint(player.x, player.y):
             return
+        self.timers.cancel(self._plant_timer)
         self.planting_player = player
         self.plant_progress = CONFIG.PLANT_TIME_MS / 1000.0
-        print(f"Started planting bomb at ({player.x}, {player.y})")
+        self._plant_timer = self.timers.call_at(self.plant_done_at, self._finish_plant)
+        LOG.info("bomb", "Started planting bomb at (%.1f, %.1f)", player.x, player.y)
 
     def start_defuse(self, player):
-        if not self.planted or not self.plant_done:
+        if not self.planted or not self.plant_done or self.defusing_player is player:
             return
         if not self.plant_zone.collidepoint(player.x, player.y):
             return
+        self.timers.cancel(self._defuse_timer)
         self.defusing_player = player
         self.defuse_progress = CONFIG.DEFUSE_TIME_MS / 1000.0
-        print(f"Started defusing bomb")
+        self._defuse_timer = self.timers.call_at(self.defuse_done_at, self._finish_defuse)
+        LOG.info("bomb", "Started defusing bomb")
+
+    def _finish_plant(self):
+        p = self.planting_player
+        self.planted = True
+        self.plant_done = True
+        self.location = (p.x, p.y)
+        self.planting_player = None
+        self.explode_at = self.timers.now + CONFIG.BOMB_TIMER_MS / 1000.0
+        self._explode_timer = self.timers.call_at(self.explode_at, self._explode)
+        SINK.bomb(PLANT, p, p.x, p.y)
+        LOG.info("bomb", "BOMB PLANTED at %s!", self.location)
+
+    def _finish_defuse(self):
+        # defenders succeed
+        p = self.defusing_player
+        SINK.bomb(DEFUSE, p, p.x, p.y)
+        self.defusing_player = None
+        game = self.game
+        self.stop()
+        winner = "B" if game.attack_team == "A" else "A"
+        game.end_round(winner, reason="Defuse")
+
+    def _explode(self):
+        # explosion: damage nearby players
+        game = self.game
+        self.explode_at = None
+        self._countdown = 0.0
+        self.timers.cancel(self._defuse_timer)
+        self.defusing_player = None
+        SINK.bomb(EXPLODE, None, *self.location)
+        for p in game.players:
+            if math.hypot(p.x - self.location[0], p.y - self.location[1]) <= 160:
+                p.take_damage(999, None)
+        game.end_round(game.attack_team, reason="Explosion")
+
+    def stop(self):
+        """Freeze every timer, e.g. when the round ends some other way."""
+        self._countdown = self.countdown
+        self.explode_at = None
+        for timer in (self._plant_timer, self._defuse_timer, self._explode_timer):
+            self.timers.cancel(timer)
+        self._plant_timer = self._defuse_timer = self._explode_timer = None
 
     def update(self, dt, game):
-        # planting
-        if self.planting_player:
-            p = self.planting_player
-            if not p.alive or not self.plant_zone.collidepoint(p.x, p.y):
-                self.planting_player = None
-                self.plant_progress = 0.0
-                print("Planting cancelled - player moved or died")
-            else:
-                self.plant_progress -= dt
-                if self.plant_progress <= 0:
-                    self.planted = True
-                    self.plant_done = True
-                    self.location = (p.x, p.y)
-                    self.planting_player = None
-                    self.countdown = CONFIG.BOMB_TIMER_MS / 1000.0
-                    print(f"BOMB PLANTED at {self.location}!")
-
-        # bomb ticking / defuse
-        if self.planted and self.plant_done:
-            self.countdown -= dt
-            if self.defusing_player:
-                d = self.defusing_player
-                if not d.alive or not self.plant_zone.collidepoint(d.x, d.y):
-                    self.defusing_player = None
-                    self.defuse_progress = 0.0
-                else:
-                    self.defuse_progress -= dt
-                    if self.defuse_progress <= 0:
-                        # defenders succeed
-                        winner = "B" if game.attack_team == "A" else "A"
-                        game.end_round(winner, reason="Defuse")
-                        return None
-            if self.countdown <= 0:
-                # explosion: damage nearby players
-                for p in game.players:
-                    if math.hypot(p.x - self.location[0], p.y - self.location[1]) <= 160:
-                        p.take_damage(999, None)
-                game.end_round(game.attack_team, reason="Explosion")
-                return "explosion"
+        """Cancel a plant or defuse whose player died or left the zone."""
+        p = self.planting_player
+        if p is not None and (not p.alive or not self.plant_zone.collidepoint(p.x, p.y)):
+            self.timers.cancel(self._plant_timer)
+            self.planting_player = None
+            LOG.info("bomb", "Planting cancelled - player moved or died")
+        d = self.defusing_player
+        if d is not None and (not d.alive or not self.plant_zone.collidepoint(d.x, d.y)):
+            self.timers.cancel(self._defuse_timer)
+            self.defusing_player = None
         return None
 
     def draw(self, surf, font, cam_x=0, cam_y=0):
-        # DEBUG: Always show what state we're in
-        if self.planted and self.plant_done:
-            sx = int(self.location[0] - cam_x)
-            sy = int(self.location[1] - cam_y)
-            print(f"Drawing planted bomb at screen pos ({sx}, {sy}), world pos {self.location}, cam ({cam_x}, {cam_y})")
-        
         if not self.planted:
             # Show planting progress bar
             if self.planting_player:
@@ -119,15 +158,18 @@ class Bomb:
             # Bomb is planted - show bomb image and countdown
             sx = int(self.location[0] - cam_x)
             sy = int(self.location[1] - cam_y)
-            
+            LOG.debug("render", "Drawing planted bomb at screen pos (%d, %d), world pos %s, cam (%d, %d)",
+                      sx, sy, self.location, cam_x, cam_y)
+
             # Draw bomb image if available, otherwise draw circle
-            if self.bomb_image:
-                img_rect = self.bomb_image.get_rect(center=(sx, sy))
-                surf.blit(self.bomb_image, img_rect)
-                print(f"Drew bomb image at {img_rect}")
+            bomb_image = get_assets().image(BOMB_IMAGE_PATH, BOMB_IMAGE_SIZE, smooth=False)
+            if bomb_image:
+                img_rect = bomb_image.get_rect(center=(sx, sy))
+                surf.blit(bomb_image, img_rect)
+                LOG.debug("render", "Drew bomb image at %s", img_rect)
             else:
                 pygame.draw.circle(surf, (80, 40, 20), (sx, sy), 12)
-                print(f"Drew bomb circle at ({sx}, {sy})")
+                LOG.debug("render", "Drew bomb circle at (%d, %d)", sx, sy)
             
             # Draw countdown timer
             if font:
@@ -0,0 +1,159 @@
+"""
+clearance.py
+Clearance field: distance from every sub-tile cell to the nearest solid tile
+
+The map is sampled at CELL-pixel cells. Each cell stores the exact
+Euclidean distance from its centre to the nearest solid tile or map edge,
+clamped to MAX_CLEARANCE. The field is built once per map with NumPy and
+cached with the grid through AssetManager.map_data. Fields on the same grid
+share one read-only copy until a tile changes.
+
+Distance is 1-Lipschitz, so the clearance at any point is within SLACK
+(half a cell diagonal) of its cell's value. blocked(x, y, r) therefore
+settles most queries with one lookup: clearly clear, or clearly inside a
+wall. Points whose clearance is within SLACK of r fall back to the exact
+utils.is_solid, as do radii beyond MAX_CLEARANCE in cells at the cap. That
+keeps collisions identical to before.
+
+The gradient points away from the nearest wall. Bots use it to slide along
+walls instead of stalling against them. Game.set_tile calls update_tile,
+which recomputes only the cells within MAX_CLEARANCE of the changed tile.
+"""
+
+import math
+import numpy as np
+from src.config import MAP_W, MAP_H, TILE, MAP_TOP
+from src.utils import is_solid
+
+CELL = 4
+MAX_CLEARANCE = 2 * TILE
+SLACK = CELL * math.sqrt(0.5) + 1e-3
+
+def _distances(grid, x0, y0, x1, y1, cell, max_dist):
+    """Clearance of cells [y0:y1, x0:x1] (cell units) as a float32 array."""
+    xs = (np.arange(x0, x1, dtype=np.float32) + 0.5) * cell
+    ys = (np.arange(y0, y1, dtype=np.float32) + 0.5) * cell
+    w, h = MAP_W * TILE, MAP_H * TILE
+    # map edges count as walls (is_solid treats out of bounds as solid)
+    dist = np.minimum(np.minimum(xs, w - xs)[None, :], np.minimum(ys, h - ys)[:, None])
+    np.minimum(dist, max_dist, out=dist)
+    # only tiles that can be closer than max_dist to the window matter
+    reach = int(max_dist // TILE) + 1
+    tx0 = max(0, int(x0 * cell // TILE) - reach)
+    tx1 = min(MAP_W, int(x1 * cell // TILE) + reach + 1)
+    ty0 = max(0, int(y0 * cell // TILE) - reach)
+    ty1 = min(MAP_H, int(y1 * cell // TILE) + reach + 1)
+    sub = grid[ty0:ty1, tx0:tx1]
+    tys, txs = np.nonzero(sub)
+    if len(txs) == 0:
+        return dist
+    left = ((txs + tx0) * TILE).astype(np.float32)
+    top = ((tys + ty0) * TILE).astype(np.float32)
+    # per-axis distance to each tile's [left, left + TILE] span, then squared
+    # distance to the nearest one; in chunks to bound the temporary arrays
+    best = dist * dist
+    for i in range(0, len(left), 32):
+        l, t = left[i:i + 32, None], top[i:i + 32, None]
+        dx = np.maximum(np.maximum(l - xs[None, :], xs[None, :] - (l + TILE)), 0.0)
+        dy = np.maximum(np.maximum(t - ys[None, :], ys[None, :] - (t + TILE)), 0.0)
+        d2 = (dy * dy)[:, :, None] + (dx * dx)[:, None, :]
+        np.minimum(best, d2.min(axis=0), out=best)
+    return np.sqrt(best)
+
+def _unit_gradient(dist):
+    """Normalised (gx, gy) of a distance block, pointing away from walls."""
+    gy, gx = np.gradient(dist)
+    norm = np.hypot(gx, gy)
+    norm[norm == 0] = 1.0
+    return gx / norm, gy / norm
+
+def clearance_planes(game_map, cell=CELL, max_dist=MAX_CLEARANCE):
+    """
+    (3, h, w) float32 array of distance, gx and gy for game_map, through
+    AssetManager.map_data. The array is read-only and shared by every field
+    built on the same grid (and, via sharedmaps, by server worker processes).
+    """
+    from src.assets import get_assets
+    w, h = MAP_W * TILE // cell, MAP_H * TILE // cell
+
+    def produce():
+        grid = np.asarray(game_map, dtype=np.uint8)
+        dist = _distances(grid, 0, 0, w, h, cell, max_dist)
+        planes = np.stack((dist, *_unit_gradient(dist)))
+        return w, h, planes.astype("<f4").tobytes()
+    w, h, data = get_assets().map_data(f"clearance-planes-{cell}-{max_dist}", game_map, produce)
+    planes = np.frombuffer(data, dtype="<f4").reshape(3, h, w)
+    planes.flags.writeable = False
+    return planes
+
+class ClearanceField:
+    def __init__(self, game_map, cell=CELL, max_dist=MAX_CLEARANCE):
+        self.game_map = game_map
+        self.cell = cell
+        self.max_dist = max_dist
+        self.w = MAP_W * TILE // cell
+        self.h = MAP_H * TILE // cell
+        self._use(clearance_planes(game_map, cell, max_dist))
+
+    def _use(self, planes):
+        self.planes = planes
+        self.dist = planes[0]
+        # flat memoryviews: indexing one returns a Python float as fast as a list would
+        self.values, self.gx, self.gy = (memoryview(p.reshape(-1)) for p in planes)
+
+    def _index(self, x, y):
+        cx = int(x // self.cell)
+        cy = int((y - MAP_TOP) // self.cell)
+        if 0 <= cx < self.w and 0 <= cy < self.h:
+            return cy * self.w + cx
+        return -1
+
+    def clearance(self, x, y):
+        """Approximate distance from (x, y) to the nearest wall, 0 off the map."""
+        i = self._index(x, y)
+        return self.values[i] if i >= 0 else 0.0
+
+    def blocked(self, x, y, radius=0):
+        """Same answer as utils.is_solid(x, y, radius, game_map), usually without its tile scan."""
+        cell = self.cell
+        cx = int(x // cell)
+        cy = int((y - MAP_TOP) // cell)
+        if 0 <= cx < self.w and 0 <= cy < self.h:
+            d = self.values[cy * self.w + cx]
+            if d - SLACK > radius:
+                return False
+            # distances are capped at max_dist, so a capped cell says nothing about larger radii
+            if d + SLACK < radius and d < self.max_dist - SLACK:
+                return True
+        return is_solid(x, y, radius, self.game_map)
+
+    def gradient(self, x, y):
+        """Unit vector away from the nearest wall, or (0, 0) in open space."""
+        i = self._index(x, y)
+        if i < 0:
+            return 0.0, 0.0
+        return self.gx[i], self.gy[i]
+
+    def update_tile(self, tx, ty):
+        """Recompute the cells a change to tile (tx, ty) can affect."""
+        per_tile = TILE // self.cell
+        reach = int(math.ceil(self.max_dist / self.cell)) + 1
+        x0 = max(0, tx * per_tile - reach)
+        y0 = max(0, ty * per_tile - reach)
+        x1 = min(self.w, (tx + 1) * per_tile + reach)
+        y1 = min(self.h, (ty + 1) * per_tile + reach)
+        if not self.planes.flags.writeable:
+            # first change to this grid: stop sharing the cached planes
+            self._use(self.planes.copy())
+        grid = np.asarray(self.game_map, dtype=np.uint8)
+        self.dist[y0:y1, x0:x1] = _distances(grid, x0, y0, x1, y1, self.cell, self.max_dist)
+        # cells just outside the window get a new gradient too; computing it
+        # over one more ring keeps their differences central, as in a full build
+        wx0, wy0 = max(0, x0 - 1), max(0, y0 - 1)
+        wx1, wy1 = min(self.w, x1 + 1), min(self.h, y1 + 1)
+        bx0, by0 = max(0, wx0 - 1), max(0, wy0 - 1)
+        bx1, by1 = min(self.w, wx1 + 1), min(self.h, wy1 + 1)
+        gx, gy = _unit_gradient(self.dist[by0:by1, bx0:bx1])
+        inner = (slice(wy0 - by0, wy1 - by0), slice(wx0 - bx0, wx1 - bx0))
+        self.planes[1, wy0:wy1, wx0:wx1] = gx[inner]
+        self.planes[2, wy0:wy1, wx0:wx1] = gy[inner]
@@ -0,0 +1,321 @@
+"""
+client.py
+Thin network client: sends inputs, renders the server's snapshots
+
+run_spectator() watches a match instead: no inputs, no fog, and a camera
+that follows a chosen player or roams freely.
+"""
+
+import time
+import socket
+import pygame
+from src import protocol
+from src.protocol import (MSG_JOIN, MSG_INPUT, MSG_LEAVE, MSG_SPECTATE, MSG_WELCOME, MSG_SNAPSHOT,
+                          MSG_ERROR)
+from src.config import FPS, BG, WHITE, WIDTH, HEIGHT, TILE, MAP_W, MAP_H, MAP_TOP
+from src.netstate import apply_state
+from src import codec
+from src.log import LOG
+
+JOIN_RETRY = 0.25
+JOIN_TIMEOUT = 5.0
+# decoded states kept as baselines; more than the server's history so deltas always resolve
+STATE_HISTORY = 128
+# a keyframe this far behind the newest state means the server started a new match
+RESTART_TICKS = 600
+SPECTATE_KEEPALIVE = 2.0
+# free spectator camera speed, pixels per second
+SPECTATE_PAN = 600
+
+class UdpConnection:
+    def __init__(self, host, port):
+        self.sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM)
+        self.sock.connect((host, port))
+        self.sock.setblocking(False)
+        self.bytes_in = 0
+
+    def send(self, data):
+        try:
+            self.sock.send(data)
+        except OSError as e:
+            # connection refused etc. surface as lost packets on UDP
+            LOG.debug("client", "udp send failed: %s", e)
+
+    def poll(self):
+        out = []
+        while True:
+            try:
+                data = self.sock.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                break
+            except OSError as e:
+                LOG.debug("client", "udp recv failed: %s", e)
+                break
+            self.bytes_in += len(data)
+            out.append(data)
+        return out
+
+    def close(self):
+        self.sock.close()
+
+class TcpConnection:
+    def __init__(self, host, port):
+        self.sock = socket.create_connection((host, port), timeout=JOIN_TIMEOUT)
+        self.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self.sock.setblocking(False)
+        self.frames = protocol.FrameReader()
+        self.outgoing = bytearray()
+        self.bytes_in = 0
+
+    def send(self, data):
+        self.outgoing += protocol.frame(data)
+        self._flush()
+
+    def _flush(self):
+        while self.outgoing:
+            try:
+                n = self.sock.send(self.outgoing)
+            except (BlockingIOError, InterruptedError):
+                return
+            del self.outgoing[:n]
+
+    def poll(self):
+        self._flush()
+        out = []
+        while True:
+            try:
+                chunk = self.sock.recv(65536)
+            except (BlockingIOError, InterruptedError):
+                break
+            if not chunk:
+                raise ConnectionError("server closed the connection")
+            self.bytes_in += len(chunk)
+            out.extend(self.frames.feed(chunk))
+        return out
+
+    def close(self):
+        self.sock.close()
+
+class NetClient:
+    def __init__(self, conn, name, char, canvas=(WIDTH, HEIGHT)):
+        self.conn = conn
+        self.name = name
+        self.char = char
+        # sent when joining so the server's interest filter covers our whole view
+        self.canvas = canvas
+        self.player_name = None
+        self.match = None
+        self.seq = 0
+        self.latest_tick = -1
+        self.states = {}
+        self.error = None
+        self.spectator = False
+        self.delay = 0.0
+
+    def _handshake(self, message, timeout):
+        """Send message until the server welcomes us; returns True on success."""
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline and self.match is None and self.error is None:
+            self.conn.send(message)
+            end = time.monotonic() + JOIN_RETRY
+            while time.monotonic() < end and self.match is None and self.error is None:
+                self.poll()
+                time.sleep(0.01)
+        return self.match is not None
+
+    def join(self, timeout=JOIN_TIMEOUT):
+        return self._handshake(protocol.encode(MSG_JOIN, {"name": self.name, "char": self.char,
+                                                          "canvas": list(self.canvas)}), timeout)
+
+    def spectate(self, match=None, timeout=JOIN_TIMEOUT):
+        """Watch a match (by default the server's first) instead of playing."""
+        return self._handshake(protocol.encode(MSG_SPECTATE, {"match": match}), timeout)
+
+    def keepalive(self):
+        """Spectators send no inputs; repeating SPECTATE keeps the server from timing us out."""
+        self.conn.send(protocol.encode(MSG_SPECTATE, {"match": self.match}))
+
+    def send_input(self, controls):
+        self.seq += 1
+        msg = dict(controls)
+        msg["seq"] = self.seq
+        msg["ack"] = self.latest_tick
+        # the state on screen is the newest one, which the server rewinds hits to
+        msg["view"] = self.latest_tick
+        self.conn.send(protocol.encode(MSG_INPUT, msg))
+
+    def poll(self):
+        """Handle everything received; returns the newest WorldState or None."""
+        newest = None
+        for data in self.conn.poll():
+            msg_type, payload = protocol.decode(data)
+            if msg_type == MSG_SNAPSHOT and payload:
+                try:
+                    state = codec.decode(payload, self.states)
+                except codec.CodecError as e:
+                    # baseline gone; our ack makes the server fall back to a keyframe
+                    LOG.debug("client", "dropped snapshot: %s", e)
+                    continue
+                if (state.tick + RESTART_TICKS < self.latest_tick
+                        and codec.baseline_tick(payload) == codec.NO_BASELINE):
+                    # new match: its ticks start over, and old states are no baselines for it
+                    self.states.clear()
+                    self.latest_tick = -1
+                # UDP may reorder; never step back in time
+                if state.tick > self.latest_tick:
+                    self.states[state.tick] = state
+                    while len(self.states) > STATE_HISTORY:
+                        del self.states[next(iter(self.states))]
+                    self.latest_tick = state.tick
+                    newest = state
+            elif msg_type == MSG_WELCOME and payload:
+                self.player_name = payload["name"]
+                self.match = payload["match"]
+                self.spectator = bool(payload.get("spectator"))
+                self.delay = payload.get("delay", 0.0)
+            elif msg_type == MSG_ERROR:
+                self.error = (payload or {}).get("error", "unknown error")
+        return newest
+
+    def leave(self):
+        self.conn.send(protocol.encode(MSG_LEAVE))
+        self.conn.close()
+
+def local_controls(game, keys, mouse_buttons, mouse_pos):
+    """Keyboard/mouse state as a controls dict, aiming in world coordinates."""
+    return {
+        "up": bool(keys[pygame.K_w]),
+        "down": bool(keys[pygame.K_s]),
+        "left": bool(keys[pygame.K_a]),
+        "right": bool(keys[pygame.K_d]),
+        "fire": bool(mouse_buttons[0]),
+        "aim": [mouse_pos[0] + int(game.camera_x), mouse_pos[1] + int(game.camera_y)],
+        "action": bool(keys[pygame.K_4]),
+    }
+
+def _draw_message(display, fonts, text):
+    screen = display.canvas
+    screen.fill(BG)
+    if fonts.get('FONT'):
+        txt = fonts['FONT'].render(text, True, WHITE)
+        screen.blit(txt, txt.get_rect(center=screen.get_rect().center))
+    display.present()
+
+def run_client(display, clock, fonts, game, host, port, char, name="Player", use_tcp=False):
+    """Join a server and play until the window is closed or ESC is pressed."""
+    _draw_message(display, fonts, f"Connecting to {host}:{port}...")
+    try:
+        conn = TcpConnection(host, port) if use_tcp else UdpConnection(host, port)
+    except OSError as e:
+        LOG.error("client", "could not connect to %s:%d: %s", host, port, e)
+        return
+    client = NetClient(conn, name, char, display.canvas_size)
+    if not client.join():
+        LOG.error("client", "join failed: %s", client.error or "no reply from server")
+        conn.close()
+        return
+    LOG.info("client", "joined match %s as %s", client.match, client.player_name)
+
+    running = True
+    while running:
+        clock.tick(FPS)
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                running = False
+
+        try:
+            snap = client.poll()
+        except ConnectionError as e:
+            LOG.error("client", "%s", e)
+            break
+        if snap is not None:
+            apply_state(game, snap, client.player_name)
+
+        if game.human_player is None:
+            _draw_message(display, fonts, "Waiting for server state...")
+            continue
+
+        client.send_input(local_controls(game, pygame.key.get_pressed(),
+                                         pygame.mouse.get_pressed(), display.mouse_pos()))
+        display.canvas.fill(BG)
+        game.draw(display.canvas, fonts)
+        display.present()
+
+    client.leave()
+
+def _spectator_camera(game, keys, dt):
+    """Arrow keys/WASD pan freely (dropping the follow target); returns True if the camera moved."""
+    dx = (keys[pygame.K_d] or keys[pygame.K_RIGHT]) - (keys[pygame.K_a] or keys[pygame.K_LEFT])
+    dy = (keys[pygame.K_s] or keys[pygame.K_DOWN]) - (keys[pygame.K_w] or keys[pygame.K_UP])
+    if not dx and not dy:
+        return False
+    game.follow_id = None
+    game.camera_x += dx * SPECTATE_PAN * dt
+    game.camera_y += dy * SPECTATE_PAN * dt
+    return True
+
+def _draw_spectator_label(surf, fonts, game):
+    font = fonts.get('SMALL')
+    if not font:
+        return
+    target = game.followed_player()
+    text = f"SPECTATING {target.name}" if target else "SPECTATING (free camera)"
+    txt = font.render(text + "   [Tab] next player  [WASD] free camera", True, WHITE)
+    surf.blit(txt, (surf.get_width() // 2 - txt.get_width() // 2, MAP_TOP + 4))
+
+def run_spectator(display, clock, fonts, game, host, port, match=None, use_tcp=False):
+    """Watch a match with full visibility until the window is closed or ESC is pressed."""
+    _draw_message(display, fonts, f"Connecting to {host}:{port}...")
+    try:
+        conn = TcpConnection(host, port) if use_tcp else UdpConnection(host, port)
+    except OSError as e:
+        LOG.error("client", "could not connect to %s:%d: %s", host, port, e)
+        return
+    client = NetClient(conn, "spectator", None)
+    if not client.spectate(match):
+        LOG.error("client", "spectate failed: %s", client.error or "no reply from server")
+        conn.close()
+        return
+    LOG.info("client", "spectating match %s (%.0f s delay)", client.match, client.delay)
+
+    # start centred on the map, following whoever is alive first
+    game.camera_x = (MAP_W * TILE - display.canvas.get_width()) // 2
+    game.camera_y = MAP_TOP + (MAP_H * TILE - display.canvas.get_height()) // 2
+    game.follow_id = -1
+    last_keepalive = time.monotonic()
+    running = True
+    while running:
+        dt = clock.tick(FPS) / 1000.0
+        for event in pygame.event.get():
+            if event.type == pygame.QUIT:
+                running = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_ESCAPE:
+                running = False
+            elif event.type == pygame.KEYDOWN and event.key == pygame.K_TAB:
+                game.cycle_follow(-1 if event.mod & pygame.KMOD_SHIFT else 1)
+
+        try:
+            snap = client.poll()
+        except ConnectionError as e:
+            LOG.error("client", "%s", e)
+            break
+        if snap is not None:
+            apply_state(game, snap)
+        now = time.monotonic()
+        if now - last_keepalive >= SPECTATE_KEEPALIVE:
+            client.keepalive()
+            last_keepalive = now
+
+        if client.latest_tick < 0:
+            _draw_message(display, fonts, f"Waiting for the broadcast ({client.delay:.0f} s delay)...")
+            continue
+
+        _spectator_camera(game, pygame.key.get_pressed(), dt)
+        display.canvas.fill(BG)
+        game.draw(display.canvas, fonts)
+        _draw_spectator_label(display.canvas, fonts, game)
+        display.present()
+
+    client.leave()
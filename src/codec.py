@@ -0,0 +1,264 @@
+"""
+codec.py
+Binary, delta-compressed snapshot codec for WorldState
+
+A snapshot is encoded against a baseline state the client has acknowledged
+(or against nothing, which makes it a keyframe). Only entities and fields
+that differ from the baseline are written, each entity with a bitmask of the
+fields that follow. Values are the fixed-point integers from netstate.
+
+Layout (little endian), after a one-byte flags field (bit 0: zlib body):
+    u32 tick, u32 baseline tick (0xFFFFFFFF = keyframe)
+    u8 header mask, header fields
+    u8 bomb mask, bomb fields
+    u8 n, n * (u8 id, u8 mask, player fields)      changed/new players
+    u8 n, n * u8 id                                removed players
+    u8 n, n * (u8 id, u8 len, utf-8 name)          changed names
+    u16 n, n * (u16 id, u8 mask, projectile fields)
+    u16 n, n * u16 id                              removed projectiles
+
+Run python -m src.codec for size and timing benchmarks against JSON.
+"""
+
+import struct
+import zlib
+from src.netstate import WorldState
+
+NO_BASELINE = 0xFFFFFFFF
+FLAG_ZLIB = 1
+
+HEADER_FIELDS = "BBBBBBHH"
+PLAYER_FIELDS = "BBHHBBB"
+PROJECTILE_FIELDS = "HHHHBB"
+BOMB_FIELDS = "BHHHHHBB"
+
+_u8 = struct.Struct("<B")
+_u16 = struct.Struct("<H")
+_ticks = struct.Struct("<II")
+_id8_mask = struct.Struct("<BB")
+_id16_mask = struct.Struct("<HB")
+
+class CodecError(ValueError):
+    pass
+
+def _field_structs(fields):
+    """Struct for every field mask, so any subset packs with one call."""
+    out = []
+    for mask in range(1 << len(fields)):
+        out.append(struct.Struct("<" + "".join(f for i, f in enumerate(fields) if mask >> i & 1)))
+    return out
+
+_HEADER_STRUCTS = _field_structs(HEADER_FIELDS)
+_PLAYER_STRUCTS = _field_structs(PLAYER_FIELDS)
+_PROJECTILE_STRUCTS = _field_structs(PROJECTILE_FIELDS)
+_BOMB_STRUCTS = _field_structs(BOMB_FIELDS)
+
+def _diff(cur, base):
+    """Return (mask, changed values) of cur against base (None = everything)."""
+    if base is None:
+        return (1 << len(cur)) - 1, cur
+    mask = 0
+    vals = []
+    for i, v in enumerate(cur):
+        if v != base[i]:
+            mask |= 1 << i
+            vals.append(v)
+    return mask, vals
+
+def _encode_entities(out, cur, base, structs, id_mask, count):
+    updates = []
+    append = updates.append
+    for eid, t in cur.items():
+        b = base.get(eid)
+        if b == t:
+            continue
+        mask, vals = _diff(t, b)
+        append(id_mask.pack(eid, mask))
+        append(structs[mask].pack(*vals))
+    removed = [eid for eid in base if eid not in cur]
+    out.append(count.pack(len(updates) // 2))
+    out.extend(updates)
+    out.append(count.pack(len(removed)))
+    if removed:
+        out.append(struct.pack(f"<{len(removed)}{'B' if count is _u8 else 'H'}", *removed))
+
+def encode(state, baseline=None, compress=False):
+    """Encode state as a delta against baseline (a WorldState) or as a keyframe."""
+    out = [_ticks.pack(state.tick, baseline.tick if baseline is not None else NO_BASELINE)]
+
+    mask, vals = _diff(state.header, baseline.header if baseline is not None else None)
+    out.append(_u8.pack(mask))
+    out.append(_HEADER_STRUCTS[mask].pack(*vals))
+    mask, vals = _diff(state.bomb, baseline.bomb if baseline is not None else None)
+    out.append(_u8.pack(mask))
+    out.append(_BOMB_STRUCTS[mask].pack(*vals))
+
+    base_players = baseline.players if baseline is not None else {}
+    _encode_entities(out, state.players, base_players, _PLAYER_STRUCTS, _id8_mask, _u8)
+
+    base_names = baseline.names if baseline is not None else {}
+    changed = [(pid, name.encode("utf-8")[:255]) for pid, name in state.names.items()
+               if base_names.get(pid) != name]
+    out.append(_u8.pack(len(changed)))
+    for pid, raw in changed:
+        out.append(_id8_mask.pack(pid, len(raw)))
+        out.append(raw)
+
+    base_projectiles = baseline.projectiles if baseline is not None else {}
+    _encode_entities(out, state.projectiles, base_projectiles, _PROJECTILE_STRUCTS, _id16_mask, _u16)
+
+    body = b"".join(out)
+    if compress:
+        packed = zlib.compress(body, 1)
+        if len(packed) < len(body):
+            return bytes((FLAG_ZLIB,)) + packed
+    return b"\x00" + body
+
+def peek_ticks(data):
+    """(tick, baseline tick) of a payload without decoding it; baseline is NO_BASELINE for keyframes."""
+    if data[0] & FLAG_ZLIB:
+        data = b"\x00" + zlib.decompress(data[1:])
+    return _ticks.unpack_from(data, 1)
+
+def baseline_tick(data):
+    """Baseline tick a payload was encoded against (NO_BASELINE for keyframes)."""
+    return peek_ticks(data)[1]
+
+def _apply(base, mask, vals):
+    if base is None:
+        return tuple(vals)
+    out = list(base)
+    j = 0
+    for i in range(len(out)):
+        if mask >> i & 1:
+            out[i] = vals[j]
+            j += 1
+    return tuple(out)
+
+def _decode_entities(data, off, target, structs, id_mask, count, id_size):
+    (n,) = count.unpack_from(data, off)
+    off += count.size
+    for _ in range(n):
+        eid, mask = id_mask.unpack_from(data, off)
+        off += id_mask.size
+        st = structs[mask]
+        vals = st.unpack_from(data, off)
+        off += st.size
+        target[eid] = _apply(target.get(eid), mask, vals)
+    (n,) = count.unpack_from(data, off)
+    off += count.size
+    if n:
+        removed = struct.unpack_from(f"<{n}{id_size}", data, off)
+        off += n * count.size
+        for eid in removed:
+            target.pop(eid, None)
+    return off
+
+def decode(data, baselines):
+    """
+    Decode a payload from encode(). baselines maps tick -> WorldState already
+    held by the receiver; raises CodecError if the needed one is missing.
+    """
+    try:
+        if data[0] & FLAG_ZLIB:
+            data = zlib.decompress(data[1:])
+        else:
+            data = memoryview(data)[1:]
+        tick, base_tick = _ticks.unpack_from(data, 0)
+        off = _ticks.size
+        if base_tick == NO_BASELINE:
+            base = None
+        else:
+            base = baselines.get(base_tick)
+            if base is None:
+                raise CodecError(f"missing baseline {base_tick}")
+
+        mask = data[off]
+        off += 1
+        st = _HEADER_STRUCTS[mask]
+        header = _apply(base.header if base else None, mask, st.unpack_from(data, off))
+        off += st.size
+        mask = data[off]
+        off += 1
+        st = _BOMB_STRUCTS[mask]
+        bomb = _apply(base.bomb if base else None, mask, st.unpack_from(data, off))
+        off += st.size
+
+        players = dict(base.players) if base else {}
+        off = _decode_entities(data, off, players, _PLAYER_STRUCTS, _id8_mask, _u8, "B")
+        names = dict(base.names) if base else {}
+        n = data[off]
+        off += 1
+        for _ in range(n):
+            pid, size = _id8_mask.unpack_from(data, off)
+            off += 2
+            names[pid] = bytes(data[off:off + size]).decode("utf-8", "replace")
+            off += size
+        for pid in list(names):
+            if pid not in players:
+                del names[pid]
+        projectiles = dict(base.projectiles) if base else {}
+        _decode_entities(data, off, projectiles, _PROJECTILE_STRUCTS, _id16_mask, _u16, "H")
+    except (struct.error, IndexError, zlib.error) as e:
+        raise CodecError(f"corrupt snapshot: {e}") from e
+    return WorldState(tick, header, players, names, projectiles, bomb)
+
+def _benchmark():
+    import os
+    import json
+    import time
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+    pygame.init()
+    from src.map import generate_map, default_plant_zone
+    from src.game import Game
+    from src.netstate import capture_state, snapshot_game
+
+    game = Game(generate_map(), default_plant_zone(), {}, {})
+    game.create_players([(f"Bot-{t}{i}", t, c, True) for t in "AB"
+                         for i, c in enumerate(["Knight", "Ranger", "Wizard", "Ranger", "Wizard"])])
+    game.state, game.frozen = "PLAYING", False
+    # run until there is some combat going on
+    for _ in range(3000):
+        game.step(1 / 60, {})
+        if len(game.projectiles) >= 6 or game.state != "PLAYING":
+            break
+    prev = capture_state(game)
+    game.step(1 / 60, {})
+    game.step(1 / 60, {})
+    cur = capture_state(game)
+
+    def timeit(fn, n=2000):
+        fn()
+        t = time.perf_counter()
+        for _ in range(n):
+            fn()
+        return (time.perf_counter() - t) / n * 1e6
+
+    snap = snapshot_game(game)
+    js = json.dumps(snap, separators=(",", ":")).encode()
+    key = encode(cur)
+    delta = encode(cur, prev)
+    delta_z = encode(cur, prev, compress=True)
+    key_z = encode(cur, compress=True)
+    baselines = {prev.tick: prev}
+    print(f"5v5 snapshot, {len(cur.players)} players, {len(cur.projectiles)} projectiles")
+    print(f"{'format':<22}{'bytes':>8}{'encode us':>12}{'decode us':>12}")
+    rows = [
+        ("json", len(js), timeit(lambda: json.dumps(snapshot_game(game), separators=(",", ":")).encode()),
+         timeit(lambda: json.loads(js))),
+        ("json+zlib", len(zlib.compress(js, 1)), timeit(lambda: zlib.compress(json.dumps(snap).encode(), 1)),
+         timeit(lambda: json.loads(zlib.decompress(zlib.compress(js, 1))))),
+        ("binary keyframe", len(key), timeit(lambda: encode(cur)), timeit(lambda: decode(key, {}))),
+        ("binary keyframe+zlib", len(key_z), timeit(lambda: encode(cur, compress=True)),
+         timeit(lambda: decode(key_z, {}))),
+        ("binary delta", len(delta), timeit(lambda: encode(cur, prev)), timeit(lambda: decode(delta, baselines))),
+        ("binary delta+zlib", len(delta_z), timeit(lambda: encode(cur, prev, compress=True)),
+         timeit(lambda: decode(delta_z, baselines))),
+    ]
+    for name, size, enc, dec in rows:
+        print(f"{name:<22}{size:>8}{enc:>12.1f}{dec:>12.1f}")
+    print(f"capture_state: {timeit(lambda: capture_state(game)):.1f} us")
+
+if __name__ == "__main__":
+    _benchmark()
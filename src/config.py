@@ -42,6 +42,17 @@ ASSET_PATHS = {
 
 SPRITE_SIZE = 56
 
+# bots start sliding along a wall once it is this close to their edge (pixels)
+BOT_WALL_MARGIN = 6
+# a bot that moved less than its radius in BOT_STUCK_TIME seconds follows
+# the nearest wall for BOT_FOLLOW_TIME seconds
+BOT_STUCK_TIME = 0.5
+BOT_FOLLOW_TIME = 1.5
+
+MAP_IMAGE_PATH = "Assets/2dMap.png"
+BOMB_IMAGE_PATH = "Assets/bomb.png"
+BOMB_IMAGE_SIZE = (32, 32)
+
 @dataclass
 class GameConfig:
     FPS: int = 60
@@ -0,0 +1,75 @@
+"""
+display.py
+Fixed-resolution canvas integer-scaled to the window
+
+Everything (map, sprites, HUD, menus) is drawn into `canvas`, whose size
+never changes. present() scales it by the largest whole factor that fits
+the window, centred with black bars, straight into a subsurface of the
+window that is allocated once per window size. An integer factor keeps
+pixel art crisp. Drawing cost depends only on the canvas size, so a
+fullscreen kiosk display only adds the single scale copy.
+
+When the window is exactly the canvas size, the canvas is the window
+surface itself and present() is just a flip.
+"""
+
+import pygame
+from src.log import LOG
+
+class ScaledDisplay:
+    def __init__(self, canvas_size, window_size=None, fullscreen=False, caption=None):
+        self.canvas_size = tuple(canvas_size)
+        if fullscreen:
+            self.window = pygame.display.set_mode((0, 0), pygame.FULLSCREEN)
+        else:
+            self.window = pygame.display.set_mode(tuple(window_size or canvas_size))
+        if caption:
+            pygame.display.set_caption(caption)
+        self.canvas = None
+        self.scale = 1
+        self.offset = (0, 0)
+        self._dest = None
+        self._layout()
+
+    def _layout(self):
+        win_w, win_h = self.window.get_size()
+        cw, ch = self.canvas_size
+        self.scale = max(1, min(win_w // cw, win_h // ch))
+        w, h = cw * self.scale, ch * self.scale
+        self.offset = ((win_w - w) // 2, (win_h - h) // 2)
+        if (win_w, win_h) == self.canvas_size:
+            self.canvas = self.window
+            self._dest = None
+            return
+        self.window.fill((0, 0, 0))
+        if self.canvas is None or self.canvas is self.window:
+            self.canvas = pygame.Surface(self.canvas_size).convert(self.window)
+        if self.scale > 1:
+            self._dest = self.window.subsurface(pygame.Rect(self.offset, (w, h)))
+        else:
+            # window smaller than the canvas (or less than twice its size): plain centred blit
+            self._dest = None
+        LOG.info("main", "canvas %dx%d scaled x%d into %dx%d window",
+                 cw, ch, self.scale, win_w, win_h)
+
+    def present(self):
+        if self._dest is not None:
+            pygame.transform.scale(self.canvas, self._dest.get_size(), self._dest)
+        elif self.canvas is not self.window:
+            self.window.blit(self.canvas, self.offset)
+        pygame.display.flip()
+
+    def to_canvas(self, pos):
+        """Window pixel position to canvas pixel position, clamped to the canvas."""
+        cw, ch = self.canvas_size
+        x = (pos[0] - self.offset[0]) // self.scale
+        y = (pos[1] - self.offset[1]) // self.scale
+        return (min(max(x, 0), cw - 1), min(max(y, 0), ch - 1))
+
+    def mouse_pos(self):
+        return self.to_canvas(pygame.mouse.get_pos())
+
+def parse_size(text):
+    """'480x320' -> (480, 320), for argparse."""
+    w, _, h = text.lower().partition("x")
+    return int(w), int(h)
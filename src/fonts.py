@@ -0,0 +1,81 @@
+"""
+fonts.py
+UI font resolution with an on-disk lookup cache
+
+pygame.font.SysFont scans the system font list on every call, which on Linux
+means a fontconfig query per font and a slow fallback when the requested
+family is missing. We resolve the family once, remember the resulting path
+(or that there is none) in .cache/fonts.json, and open fonts by path.
+A TTF dropped into Assets/fonts/ takes precedence over system fonts.
+"""
+
+import os
+import sys
+import json
+import pygame
+from src.log import LOG
+
+FONT_CACHE_PATH = os.path.join(".cache", "fonts.json")
+BUNDLED_FONT_DIR = os.path.join("Assets", "fonts")
+
+UI_FONT_FAMILY = "Segoe UI"
+UI_FONT_SIZES = {"FONT": 16, "BIG": 32, "SMALL": 12}
+
+def _bundled_font():
+    try:
+        names = sorted(n for n in os.listdir(BUNDLED_FONT_DIR) if n.lower().endswith((".ttf", ".otf")))
+    except OSError:
+        return None
+    return os.path.join(BUNDLED_FONT_DIR, names[0]) if names else None
+
+def _load_cache():
+    try:
+        with open(FONT_CACHE_PATH, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_cache(cache):
+    try:
+        os.makedirs(os.path.dirname(FONT_CACHE_PATH), exist_ok=True)
+        with open(FONT_CACHE_PATH, "w", encoding="utf-8") as f:
+            json.dump(cache, f, indent=2)
+    except OSError as e:
+        LOG.warning("fonts", "could not write font cache: %s", e)
+
+def resolve_font_path(family=UI_FONT_FAMILY):
+    """
+    Path of the font file for family, or None to use pygame's default font.
+    The system lookup only runs on a cache miss or if the cached file vanished.
+    """
+    bundled = _bundled_font()
+    if bundled:
+        return bundled
+
+    cache = _load_cache()
+    key = f"{sys.platform}:{family}"
+    if key in cache:
+        path = cache[key]
+        if path is None or os.path.exists(path):
+            return path
+
+    # match_font wants the family without spaces, e.g. "segoeui"
+    path = pygame.font.match_font(family.replace(" ", "").lower())
+    LOG.info("fonts", "resolved font %r -> %s", family, path or "pygame default")
+    cache[key] = path
+    _save_cache(cache)
+    return path
+
+def load_fonts(family=UI_FONT_FAMILY, sizes=UI_FONT_SIZES):
+    """Return the FONT/BIG/SMALL dict used by the UI, all from one lookup."""
+    fonts = {}
+    if not pygame.font.get_init():
+        return fonts
+    path = resolve_font_path(family)
+    for name, size in sizes.items():
+        try:
+            fonts[name] = pygame.font.Font(path, size)
+        except (OSError, pygame.error) as e:
+            LOG.warning("fonts", "failed to open %s: %s", path, e)
+            fonts[name] = pygame.font.Font(None, size)
+    return fonts
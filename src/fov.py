@@ -0,0 +1,161 @@
+"""
+fov.py
+Recursive shadowcasting field of view over the tile grid
+
+Produces a visible-tile mask (one byte per tile, row-major) that rendering,
+fog of war and bot targeting query in O(1). TeamVisibility unions the masks
+of all living members of a team and only recomputes when one of them moves
+onto a different tile. A server builds fov_table() for its map up front, so
+all of its matches (and worker processes) look masks up in one shared table.
+"""
+
+from functools import reduce
+from operator import or_
+from src.config import TILE, MAP_TOP
+
+# matches the 420px range of utils.can_see
+VIEW_RADIUS = 420 // TILE
+
+# (xx, xy, yx, yy) transforms mapping octant 0 onto the other seven
+_OCTANTS = (
+    (1, 0, 0, 1), (0, 1, 1, 0), (0, -1, 1, 0), (-1, 0, 0, 1),
+    (-1, 0, 0, -1), (0, -1, -1, 0), (0, 1, -1, 0), (1, 0, 0, -1),
+)
+
+def compute_fov(game_map, ox, oy, radius=VIEW_RADIUS):
+    """Return a bytearray mask of tiles visible from tile (ox, oy)."""
+    h = len(game_map)
+    w = len(game_map[0]) if h > 0 else 0
+    mask = bytearray(w * h)
+    if not (0 <= ox < w and 0 <= oy < h):
+        return mask
+    mask[oy * w + ox] = 1
+    for xx, xy, yx, yy in _OCTANTS:
+        _cast_light(game_map, mask, w, h, ox, oy, 1, 1.0, 0.0, radius, xx, xy, yx, yy)
+    return mask
+
+def _cast_light(grid, mask, w, h, cx, cy, row, start, end, radius, xx, xy, yx, yy):
+    if start < end:
+        return
+    radius_sq = radius * radius
+    for j in range(row, radius + 1):
+        dx, dy = -j - 1, -j
+        blocked = False
+        new_start = start
+        while dx <= 0:
+            dx += 1
+            l_slope = (dx - 0.5) / (dy + 0.5)
+            r_slope = (dx + 0.5) / (dy - 0.5)
+            if start < r_slope:
+                continue
+            if end > l_slope:
+                break
+            x = cx + dx * xx + dy * xy
+            y = cy + dx * yx + dy * yy
+            inside = 0 <= x < w and 0 <= y < h
+            if inside and dx * dx + dy * dy < radius_sq:
+                mask[y * w + x] = 1
+            # out of bounds counts as wall
+            opaque = not inside or grid[y][x] != 0
+            if blocked:
+                if opaque:
+                    new_start = r_slope
+                else:
+                    blocked = False
+                    start = new_start
+            elif opaque and j < radius:
+                blocked = True
+                _cast_light(grid, mask, w, h, cx, cy, j + 1, start, l_slope, radius, xx, xy, yx, yy)
+                new_start = r_slope
+        if blocked:
+            break
+
+def fov_table(game_map, radius=VIEW_RADIUS):
+    """
+    Masks for every tile of game_map, row-major: the mask for tile i is
+    table[i * n:(i + 1) * n] with n = MAP_W * MAP_H. Built once per grid and
+    cached by AssetManager.map_data.
+    """
+    from src.assets import get_assets
+
+    def produce():
+        h = len(game_map)
+        w = len(game_map[0]) if h > 0 else 0
+        table = bytearray()
+        for y in range(h):
+            for x in range(w):
+                table += compute_fov(game_map, x, y, radius)
+        return w * h, w * h, bytes(table)
+    return get_assets().map_data(f"fov-{radius}", game_map, produce)[2]
+
+def loaded_fov_table(game_map, radius=VIEW_RADIUS):
+    """fov_table() if this process already built or was handed it, else None."""
+    from src.assets import get_assets
+    loaded = get_assets().loaded_map_data(f"fov-{radius}", game_map)
+    return loaded[2] if loaded is not None else None
+
+def world_to_tile(x, y):
+    return int(x // TILE), int((y - MAP_TOP) // TILE)
+
+class TeamVisibility:
+    """Union of the fields of view of one team's living players."""
+
+    def __init__(self, game_map, radius=VIEW_RADIUS, table=None):
+        self.game_map = game_map
+        self.radius = radius
+        self.h = len(game_map)
+        self.w = len(game_map[0]) if self.h > 0 else 0
+        self.mask = bytearray(self.w * self.h)
+        # bumped whenever mask changes so dependants can cache against it
+        self.version = 0
+        self._observer_tiles = None
+        self._tile_masks = {}
+        # fov_table() for game_map, shared read-only; dropped once the grid changes
+        self.table = table
+
+    def invalidate(self):
+        """Drop cached masks, e.g. after the tile grid changed."""
+        self._tile_masks.clear()
+        self.table = None
+        self._observer_tiles = None
+
+    def _mask_for(self, tile):
+        tx, ty = tile
+        if self.table is not None and 0 <= tx < self.w and 0 <= ty < self.h:
+            n = self.w * self.h
+            i = ty * self.w + tx
+            return self.table[i * n:(i + 1) * n]
+        mask = self._tile_masks.get(tile)
+        if mask is None:
+            mask = compute_fov(self.game_map, tile[0], tile[1], self.radius)
+            self._tile_masks[tile] = mask
+        return mask
+
+    def update(self, observers):
+        """Recompute from the observers' tiles; returns True if the mask changed."""
+        tiles = frozenset(world_to_tile(p.x, p.y) for p in observers if p.alive)
+        if tiles == self._observer_tiles:
+            return False
+        self._observer_tiles = tiles
+        n = len(self.mask)
+        if not tiles:
+            self.mask = bytearray(n)
+        else:
+            # masks hold only 0/1 bytes, so OR-ing them as big ints is a bytewise union
+            union = reduce(or_, (int.from_bytes(self._mask_for(t), "little") for t in tiles))
+            self.mask = bytearray(union.to_bytes(n, "little"))
+        self.version += 1
+        return True
+
+    def is_tile_visible(self, tx, ty):
+        if 0 <= tx < self.w and 0 <= ty < self.h:
+            return self.mask[ty * self.w + tx] != 0
+        return False
+
+    def is_visible(self, x, y):
+        """O(1) check for a world-space point."""
+        tx = int(x // TILE)
+        ty = int((y - MAP_TOP) // TILE)
+        if 0 <= tx < self.w and 0 <= ty < self.h:
+            return self.mask[ty * self.w + tx] != 0
+        return False
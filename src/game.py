@@ -10,31 +10,62 @@ from src.player import Player
 from src.projectile import Projectile
 from src.bomb import Bomb
 from src.map import generate_map, draw_map  # Added draw_map import
-from src.utils import clamp, can_see
-from src.config import (WIDTH, HEIGHT, MAP_W, MAP_H, TILE, MAP_TOP, CONFIG,
+from src.utils import clamp
+from src.fov import TeamVisibility, loaded_fov_table
+from src.clearance import ClearanceField
+from src.lagcomp import rewind_ticks
+from src.timers import Scheduler
+from src.telemetry import SINK
+from src.render import RenderQueue, LAYER_PROJECTILES
+from src.log import LOG, DEBUG
+from src.config import (MAP_W, MAP_H, TILE, MAP_TOP, CONFIG,
                     ASSET_PATHS)
 
+# shared, never mutated: controls for players without input this step
+_NO_INPUT = {}
+
 class Game:
     def __init__(self, game_map, plant_zone, sprites, anim_frames):
+        # simulation clock; round, intro and bomb timers are deadlines on it
+        self.timers = Scheduler()
+        self.round_ends_at = None
+        self._time_up_timer = None
+        self.intro_ends_at = 0.0
+        self._intro_timer = None
+        self._round_end_timer = None
+
         self.state = "TEAM_SELECT"
         self.round = 1
         self.scores = {"A": 0, "B": 0}
         self.attack_team = "A"
         self.round_time = 110.0
-        self.between_timer = 0
+        self.between_timer = 0.0
         self.frozen = True
         self.side_swap_event = False
 
         self.players: List[Player] = []
         self.projectiles: List[Projectile] = []
         self.plant_zone = plant_zone
-        self.bomb = Bomb(plant_zone)
+        self.bomb = Bomb(plant_zone, self)
         self.human_player: Optional[Player] = None
+        # spectators: id of the player the camera follows, or None to roam freely
+        self.follow_id = None
 
         self.camera_x = 0
         self.camera_y = MAP_TOP
+        self.render_queue = RenderQueue()
 
         self.game_map = game_map
+        # bumped by set_tile so rasters built from the grid (observe.Observer) know to rebuild
+        self.map_version = 0
+        # a server prebuilds the per-tile FOV table; a local game computes masks as needed
+        table = loaded_fov_table(game_map)
+        self.visibility = {team: TeamVisibility(game_map, table=table) for team in ("A", "B")}
+        self.clearance = ClearanceField(game_map)
+        self._fog_cache = (None, -1, None)
+        # built on first draw; a headless server never needs it
+        self.minimap = None
+        self.show_minimap = True
         self.sprites = sprites
         self.anim_frames = anim_frames
 
@@ -44,32 +75,109 @@ class Game:
         }
 
         self.selected_chars = {"A": None, "B": None}
-        self.intro_start_ms = 0
+        # list of (name, team, char, is_bot); None means the local 1v1 setup
+        self.roster = None
+        self.tick = 0
+        # lagcomp.PositionHistory, attached by the server for lag-compensated hits
+        self.history = None
+        self._local_inputs = {}
+        self._local_controls = {}
         self.team_data = {
             'A': [("Player", None), ("Bot-A2", None)],
             'B': [("Bot", None), ("Bot-B2", None)]
         }
 
-    def create_players(self):
+    @property
+    def round_time(self):
+        """Seconds left in the round; only counts down while the round clock runs."""
+        if self.round_ends_at is not None:
+            return self.timers.remaining(self.round_ends_at)
+        return self._round_time
+
+    @round_time.setter
+    def round_time(self, seconds):
+        # setting it stops the clock; _end_intro starts it again
+        self.timers.cancel(self._time_up_timer)
+        self._time_up_timer = None
+        self.round_ends_at = None
+        self._round_time = seconds
+
+    def intro_left_ms(self):
+        return int(self.timers.remaining(self.intro_ends_at) * 1000) if self.state == "ROUND_INTRO" else 0
+
+    def _end_intro(self):
+        self.frozen = False
+        self.state = "PLAYING"
+        self.round_ends_at = self.timers.now + self._round_time
+        self._time_up_timer = self.timers.call_at(self.round_ends_at, self._time_up)
+
+    def _time_up(self):
+        # time up => defenders win
+        winner = "B" if self.attack_team == "A" else "A"
+        self.end_round(winner, reason="Time up")
+
+    def create_players(self, roster=None):
+        if roster is not None:
+            self.roster = list(roster)
+        for p in self.players:
+            p.cancel_timers()
         self.players = []
-        a_spawn = self.spawn_points["A"]
-        b_spawn = self.spawn_points["B"]
 
-        pA = Player(a_spawn[0], a_spawn[1], "A", "Player", self.selected_chars["A"], is_bot=False)
-        pB = Player(b_spawn[0], b_spawn[1], "B", "Bot", self.selected_chars["B"], is_bot=True)
-        pA.has_bomb = True
+        if self.roster is None:
+            a_spawn = self.spawn_points["A"]
+            b_spawn = self.spawn_points["B"]
+            pA = Player(a_spawn[0], a_spawn[1], "A", "Player", self.selected_chars["A"], is_bot=False,
+                        timers=self.timers)
+            pB = Player(b_spawn[0], b_spawn[1], "B", "Bot", self.selected_chars["B"], is_bot=True,
+                        timers=self.timers)
+            pA.has_bomb = True
+            self.players.extend([pA, pB])
+            self.human_player = pA
+        else:
+            slots = {"A": 0, "B": 0}
+            for name, team, char, is_bot in self.roster:
+                x, y = self._spawn_position(team, slots[team])
+                slots[team] += 1
+                self.players.append(Player(x, y, team, name, char, is_bot=is_bot, timers=self.timers))
+            carrier = next((p for p in self.players if p.team == self.attack_team), None)
+            if carrier:
+                carrier.has_bomb = True
+            self.human_player = None
+        for i, p in enumerate(self.players):
+            p.id = i
 
-        self.players.extend([pA, pB])
-        self.human_player = pA
         self.projectiles.clear()
-        self.bomb = Bomb(self.plant_zone)
+        self.bomb.stop()
+        self.bomb = Bomb(self.plant_zone, self)
         self.round_time = 110.0
         self.frozen = True
-        self.intro_start_ms = pygame.time.get_ticks()
+        self.timers.cancel(self._intro_timer)
+        self.intro_ends_at = self.timers.now + CONFIG.FREEZE_TIME_MS / 1000.0
+        self._intro_timer = self.timers.call_at(self.intro_ends_at, self._end_intro)
         self.state = "ROUND_INTRO"
+        self.update_visibility()
+
+    def _spawn_position(self, team, slot):
+        """Spread a team's players over free tiles around its spawn point."""
+        sx, sy = self.spawn_points[team]
+        offsets = [(0, 0), (1, 0), (0, 1), (-1, 0), (0, -1), (1, 1), (-1, 1), (1, -1), (-1, -1)]
+        free = [(sx + ox * TILE, sy + oy * TILE) for ox, oy in offsets
+                if not self.clearance.blocked(sx + ox * TILE, sy + oy * TILE, 14)]
+        return free[slot % len(free)] if free else (sx, sy)
+
+    def update_visibility(self):
+        """Refresh each team's field of view; cheap unless someone changed tile."""
+        for team, vis in self.visibility.items():
+            vis.update([p for p in self.players if p.team == team])
 
     def end_round(self, winner_team, reason=""):
         self.scores[winner_team] += 1
+        SINK.round_end(winner_team)
+        # freeze the round clock and bomb where they are and drop pending shots
+        self.round_time = self.round_time
+        self.bomb.stop()
+        for p in self.players:
+            p.cancel_timers()
 
         # handle side swap
         if self.round == CONFIG.SIDE_SWAP_ROUND:
@@ -81,11 +189,15 @@ class Game:
             self.state = "MATCH_END"
         else:
             self.state = "ROUND_END"
-            self.between_timer = pygame.time.get_ticks()
+            self.between_timer = self.timers.now
+            self._round_end_timer = self.timers.call_later(CONFIG.ROUND_END_WAIT_MS / 1000.0,
+                                                           self.reset_for_next_round)
             # freeze players until next round reset
             self.frozen = True
 
     def reset_for_next_round(self):
+        self.timers.cancel(self._round_end_timer)
+        self._round_end_timer = None
         self.round += 1
         self.round_time = 110.0
         self.frozen = True
@@ -95,81 +207,82 @@ class Game:
         self.create_players()
 
     def update(self, dt, keys, mouse_buttons, mouse_pos):
-        # Handle round intro freeze
-        if self.state == "ROUND_INTRO":
-            elapsed = pygame.time.get_ticks() - self.intro_start_ms
-            if elapsed >= CONFIG.FREEZE_TIME_MS:
-                self.frozen = False
-                self.state = "PLAYING"
-            return
-
-        # handle round end wait
-        if self.state == "ROUND_END":
-            current_time = pygame.time.get_ticks()
-            if current_time - self.between_timer > CONFIG.ROUND_END_WAIT_MS:
-                self.reset_for_next_round()
-            return
-
-        if self.state == "MATCH_END":
-            return
+        """Advance one frame driven by the local keyboard and mouse."""
+        # refilled in place every frame rather than rebuilt
+        inputs = self._local_inputs
+        inputs.clear()
+        hp = self.human_player
+        if hp:
+            controls = self._local_controls
+            controls["up"] = keys[pygame.K_w]
+            controls["down"] = keys[pygame.K_s]
+            controls["left"] = keys[pygame.K_a]
+            controls["right"] = keys[pygame.K_d]
+            controls["fire"] = mouse_buttons[0]
+            # mouse_pos is in canvas pixels; aim is in world coordinates
+            controls["aim"] = (mouse_pos[0] + int(self.camera_x), mouse_pos[1] + int(self.camera_y))
+            # plant/defuse interaction - CHANGED TO K_4
+            controls["action"] = keys[pygame.K_4]
+            inputs[hp.name] = controls
+            if keys[pygame.K_4] and LOG.is_enabled("input", DEBUG):
+                LOG.debug("input", "4 key pressed at (%.1f, %.1f), plant zone %s, in zone: %s",
+                          hp.x, hp.y, self.plant_zone, self.plant_zone.collidepoint(hp.x, hp.y))
+        self.step(dt, inputs)
+
+    def step(self, dt, inputs):
+        """
+        Advance the simulation by dt. inputs maps a human player's name to a
+        controls dict: up/down/left/right, fire, aim (world x, y) and action.
+        """
+        self.tick += 1
+        if SINK.enabled:
+            SINK.begin_step(self)
+
+        # intro end, round timeout, round-end wait, bomb and burst shots all fire from here
+        self.timers.advance(dt)
 
         if self.state == "PLAYING":
-            # decrement round timer
-            self.round_time -= dt
-            self.round_time = max(0, self.round_time)
-            if self.round_time <= 0:
-                # time up => defenders win
-                winner = "B" if self.attack_team == "A" else "A"
-                self.end_round(winner, reason="Time up")
-                return
+            self.update_visibility()
 
             # update players
+            no_input = _NO_INPUT
             for p in self.players:
-                if not p.is_bot:
-                    controls = {
-                        "up": keys[pygame.K_w],
-                        "down": keys[pygame.K_s],
-                        "left": keys[pygame.K_a],
-                        "right": keys[pygame.K_d]
-                    }
-                else:
-                    controls = {}
+                controls = no_input if p.is_bot else inputs.get(p.name, no_input)
                 p.update(dt, controls, self, frozen=self.frozen)
-
-            # player input: firing and interaction for human
-            if self.human_player and self.human_player.alive and not self.frozen:
-                if mouse_buttons[0]:
-                    # primary fire
-                    self.human_player.fire(self.projectiles, mouse_pos)
-                
-                # plant/defuse interaction - CHANGED TO K_4
-                if keys[pygame.K_4]:
-                    print(f"4 key pressed!")  # DEBUG
-                    print(f"Player position: ({self.human_player.x}, {self.human_player.y})")  # DEBUG
-                    print(f"Plant zone: {self.plant_zone}")  # DEBUG
-                    print(f"In plant zone: {self.plant_zone.collidepoint(self.human_player.x, self.human_player.y)}")  # DEBUG
-                    
-                    # planting
-                    if not self.bomb.planted and self.plant_zone.collidepoint(self.human_player.x, self.human_player.y):
-                        # start planting
-                        self.bomb.start_plant(self.human_player)
-                    # defusing
-                    elif self.bomb.planted and self.bomb.plant_done and self.plant_zone.collidepoint(self.human_player.x, self.human_player.y):
-                        self.bomb.start_defuse(self.human_player)
-
-            # update projectiles
-            for pr in list(self.projectiles):
+            if self.history is not None:
+                self.history.record(self.tick, self.players)
+
+            # firing and interaction for human-controlled players
+            if not self.frozen:
+                for p in self.players:
+                    if p.is_bot or not p.alive:
+                        continue
+                    controls = inputs.get(p.name)
+                    if not controls:
+                        continue
+                    if controls.get("fire") and controls.get("aim") is not None:
+                        # primary fire
+                        if self.history is not None:
+                            # resolve this shot's hits at the tick the client was looking at
+                            p.rewind = rewind_ticks(self.tick, controls.get("view"))
+                        p.fire(self.projectiles, controls["aim"])
+                    if controls.get("action"):
+                        self._interact(p)
+
+            # update projectiles, compacting the live ones in place
+            projectiles = self.projectiles
+            n = len(projectiles)
+            live = 0
+            for i in range(n):
+                pr = projectiles[i]
                 pr.update(dt, self)
-                if pr.life <= 0:
-                    try:
-                        self.projectiles.remove(pr)
-                    except ValueError:
-                        pass
+                if pr.life > 0:
+                    projectiles[live] = pr
+                    live += 1
+            del projectiles[live:n]
 
-            # update bomb
-            bomb_event = self.bomb.update(dt, self)
-            if bomb_event == "explosion":
-                return
+            # cancel a plant or defuse whose player moved off the zone
+            self.bomb.update(dt, self)
 
             # check elimination victory
             alive_a = sum(1 for p in self.players if p.team == "A" and p.alive)
@@ -179,14 +292,44 @@ class Game:
             elif alive_b == 0 and alive_a > 0:
                 self.end_round("A", reason="Elimination")
 
+    def _interact(self, player):
+        in_zone = self.plant_zone.collidepoint(player.x, player.y)
+        # only attackers plant and only defenders defuse, now that any
+        # networked client can send the action key
+        attacker = player.team == self.attack_team
+        # planting
+        if not self.bomb.planted and in_zone and attacker:
+            # start planting
+            self.bomb.start_plant(player)
+        # defusing
+        elif self.bomb.planted and self.bomb.plant_done and in_zone and not attacker:
+            self.bomb.start_defuse(player)
+
+    def set_tile(self, tx, ty, value):
+        """Change one map tile and update everything cached from the grid."""
+        if self.game_map[ty][tx] == value:
+            return
+        self.game_map[ty][tx] = value
+        self.map_version += 1
+        for vis in self.visibility.values():
+            vis.invalidate()
+        self.clearance.update_tile(tx, ty)
+        if self.minimap is not None:
+            self.minimap.set_tile(tx, ty, value)
+
     def draw(self, surf, fonts):
         if self.state == "TEAM_SELECT":
             return
 
+        # the camera spans the target surface, which may be a low-resolution canvas
+        view_w, view_h = surf.get_size()
         hp = self.human_player
-        if hp:
-            self.camera_x = clamp(hp.x - WIDTH // 2, 0, MAP_W * TILE - WIDTH)
-            self.camera_y = clamp(hp.y - HEIGHT // 2, MAP_TOP, MAP_H * TILE + MAP_TOP - HEIGHT)
+        focus = hp or self.followed_player()
+        if focus:
+            self.camera_x = focus.x - view_w // 2
+            self.camera_y = focus.y - view_h // 2
+        self.camera_x = clamp(self.camera_x, 0, max(0, MAP_W * TILE - view_w))
+        self.camera_y = clamp(self.camera_y, MAP_TOP, max(MAP_TOP, MAP_H * TILE + MAP_TOP - view_h))
 
         cam_x = int(self.camera_x)
         cam_y = int(self.camera_y)
@@ -194,36 +337,87 @@ class Game:
         # FIXED: Draw the map!
         draw_map(surf, self.game_map, self.plant_zone, cam_x, cam_y)
 
+        vis = self.visibility[hp.team] if hp else None
+        if vis:
+            surf.blit(self._fog_surface(vis), (-cam_x, MAP_TOP - cam_y))
+
+        queue = self.render_queue
+        queue.begin(cam_x, cam_y, view_w, view_h)
         for p in self.players:
-            # draw allies fully, enemies only if visible
-            if p is self.human_player or p.team == self.human_player.team:
-                p.draw(surf, self.anim_frames, cam_x, cam_y)
-            elif can_see(self.human_player, p, self.game_map):
-                p.draw(surf, self.anim_frames, cam_x, cam_y)
+            # draw allies fully, enemies only if their tile is in view
+            if vis is None or p.team == hp.team:
+                p.draw(queue, self.anim_frames)
+            elif p.alive and vis.is_visible(p.x, p.y):
+                p.draw(queue, self.anim_frames)
 
-        for pr in self.projectiles:
-            pr.draw(surf, cam_x, cam_y)
+        queue.push_circles(LAYER_PROJECTILES, self.projectiles)
+        queue.flush(surf)
 
         self.bomb.draw(surf, fonts['FONT'], cam_x, cam_y)
 
         self._draw_hud(surf, fonts)
 
+        if self.show_minimap:
+            if self.minimap is None:
+                from src.minimap import Minimap
+                self.minimap = Minimap(self.game_map)
+            self.minimap.draw(surf, self)
+
         # Round intro overlay
         if self.state == "ROUND_INTRO":
             self._draw_round_intro(surf, fonts)
 
+    def followed_player(self):
+        """Spectator camera target: the followed player, or the next living one once they die."""
+        if self.follow_id is None:
+            return None
+        alive = [p for p in self.players if p.alive]
+        for p in alive:
+            if p.id == self.follow_id:
+                return p
+        if alive:
+            self.follow_id = alive[0].id
+            return alive[0]
+        return None
+
+    def cycle_follow(self, step=1):
+        """Follow the next (or previous) living player."""
+        alive = [p for p in self.players if p.alive]
+        if not alive:
+            return
+        ids = [p.id for p in alive]
+        i = ids.index(self.follow_id) + step if self.follow_id in ids else 0
+        self.follow_id = ids[i % len(ids)]
+
+    def _fog_surface(self, vis):
+        """Darkening layer for tiles outside vis, rebuilt only when the mask changes."""
+        key, version, fog = self._fog_cache
+        if key is vis and version == vis.version:
+            return fog
+        small = pygame.Surface((vis.w, vis.h), pygame.SRCALPHA)
+        small.fill((0, 0, 0, 140))
+        mask = vis.mask
+        for i in range(len(mask)):
+            if mask[i]:
+                small.set_at((i % vis.w, i // vis.w), (0, 0, 0, 0))
+        fog = pygame.transform.scale(small, (vis.w * TILE, vis.h * TILE))
+        self._fog_cache = (vis, vis.version, fog)
+        return fog
+
     def _draw_hud(self, surf, fonts):
         from pygame import Surface
-        from src.config import (UI_BG, UI_BG_LIGHT, MAP_TOP, WIDTH, HEIGHT,
+        from src.config import (UI_BG, UI_BG_LIGHT, MAP_TOP,
                            GRAY, WHITE, ATT_COL_LIGHT, DEF_COL_LIGHT, DANGER_LIGHT)
         import math
         
+        width = surf.get_width()
+
         # Top HUD
         hud_height = MAP_TOP - 10
-        hud_surface = Surface((WIDTH, hud_height), pygame.SRCALPHA)
+        hud_surface = Surface((width, hud_height), pygame.SRCALPHA)
         for y in range(hud_height):
             alpha = int(180 * (1 - y/hud_height * 0.6))
-            pygame.draw.line(hud_surface, (*UI_BG[:3], alpha), (0, y), (WIDTH, y))
+            pygame.draw.line(hud_surface, (*UI_BG[:3], alpha), (0, y), (width, y))
         surf.blit(hud_surface, (0, 0))
 
         # Round counter
@@ -236,7 +430,7 @@ class Game:
 
         # Score display
         score_width = 160
-        score_x = WIDTH // 2 - score_width // 2
+        score_x = width // 2 - score_width // 2
         score_height = 32
         score_rect = pygame.Rect(score_x, 4, score_width, score_height)
         score_bg = Surface((score_width, score_height), pygame.SRCALPHA)
@@ -261,26 +455,32 @@ class Game:
             timer_height = 24
             timer_bg = Surface((timer_width, timer_height), pygame.SRCALPHA)
             pygame.draw.rect(timer_bg, (*UI_BG_LIGHT, 160), (0, 0, timer_width, timer_height), border_radius=12)
-            timer_x = WIDTH - timer_width - 16
+            timer_x = width - timer_width - 16
             surf.blit(timer_bg, (timer_x, 8))
             surf.blit(time_txt, (timer_x + 10, 10))
 
     def _draw_round_intro(self, surf, fonts):
         from pygame import Surface
-        from src.config import WIDTH, HEIGHT, WHITE, ATT_COL, DEF_COL, CONFIG
+        from src.config import WHITE, ATT_COL, DEF_COL, CONFIG
         import math
         
-        elapsed = pygame.time.get_ticks() - self.intro_start_ms
-        remaining = max(0, math.ceil((CONFIG.FREEZE_TIME_MS - elapsed) / 1000.0))
-        overlay = Surface((WIDTH, HEIGHT), pygame.SRCALPHA)
+        remaining = max(0, math.ceil(self.intro_left_ms() / 1000.0))
+        width, height = surf.get_size()
+        overlay = Surface((width, height), pygame.SRCALPHA)
         overlay.fill((0, 0, 0, 180))
         surf.blit(overlay, (0, 0))
         if fonts['BIG'] and fonts['FONT']:
             txt = fonts['BIG'].render(f"ROUND {self.round}", True, WHITE)
-            surf.blit(txt, (WIDTH // 2 - txt.get_width() // 2, HEIGHT // 2 - 50))
-            team_name = "ATTACKERS" if self.human_player.team == self.attack_team else "DEFENDERS"
-            team_color = ATT_COL if self.human_player.team == self.attack_team else DEF_COL
+            surf.blit(txt, (width // 2 - txt.get_width() // 2, height // 2 - 50))
+            hp = self.human_player
+            if hp is None:
+                # spectating: no side of our own
+                team_name, team_color = f"TEAM {self.attack_team} ATTACKS", ATT_COL
+            elif hp.team == self.attack_team:
+                team_name, team_color = "ATTACKERS", ATT_COL
+            else:
+                team_name, team_color = "DEFENDERS", DEF_COL
             team_txt = fonts['FONT'].render(team_name, True, team_color)
-            surf.blit(team_txt, (WIDTH // 2 - team_txt.get_width() // 2, HEIGHT // 2 - 10))
+            surf.blit(team_txt, (width // 2 - team_txt.get_width() // 2, height // 2 - 10))
             sub = fonts['BIG'].render(str(remaining), True, WHITE)
-            surf.blit(sub, (WIDTH // 2 - sub.get_width() // 2, HEIGHT // 2 + 20))
\ No newline at end of file
+            surf.blit(sub, (width // 2 - sub.get_width() // 2, height // 2 + 20))
\ No newline at end of file
@@ -0,0 +1,223 @@
+"""
+gcsched.py
+Frame-aware garbage collection and allocation tracking
+
+FrameGC turns off CPython's automatic cyclic collector and runs collections
+itself, at points where a pause can't cause a hitch:
+  - after loading, everything alive is collected once and moved to the
+    permanent generation with gc.freeze(), so later collections never
+    rescan the map, sprites and caches
+  - a young-generation collection runs only in the slack left before the
+    frame deadline, and only when the time it usually takes fits there
+  - a full collection runs once per ROUND_END/MATCH_END, while play is paused
+  - if garbage piles up without any slack, a collection is forced anyway
+    so memory stays bounded
+
+AllocTracker counts net memory blocks allocated per frame
+(sys.getallocatedblocks). Every few seconds it can also sample a short
+window under tracemalloc for the peak bytes a frame allocates.
+
+In main.py, --frame-gc turns on collection scheduling and --track-allocs
+turns on tracemalloc sampling. F3 toggles the overlay. With either flag, a
+summary also goes to the "gc" log category.
+"""
+
+import gc
+import sys
+import time
+import tracemalloc
+import pygame
+from src.log import LOG
+
+# young-generation collections are considered once this many objects are pending
+GEN0_THRESHOLD = 700
+# ... and forced regardless of slack past this many
+GEN0_FORCE = 20000
+# every Nth young collection also sweeps generation 1
+GEN1_EVERY = 10
+# pauses between rounds may be long, so everything is collected then
+PAUSE_STATES = ("ROUND_END", "MATCH_END")
+LOG_INTERVAL = 10.0
+
+class FrameGC:
+    def __init__(self, frame_budget):
+        self.frame_budget = frame_budget
+        self.enabled = False
+        self.frame_start = time.perf_counter()
+        self._was_paused = False
+        self._young = 0
+        # running estimate of how long each generation takes to collect
+        self.cost = [0.0005, 0.002, 0.01]
+        self.collections = [0, 0, 0]
+        self.forced = 0
+        self.last_pause_ms = 0.0
+        self.max_pause_ms = 0.0
+
+    def start(self):
+        """Collect once, freeze what survives and take over from the automatic collector."""
+        t = time.perf_counter()
+        gc.collect()
+        gc.freeze()
+        gc.disable()
+        self.enabled = True
+        LOG.info("gc", "froze %d objects in %.1f ms; automatic collection off",
+                 gc.get_freeze_count(), (time.perf_counter() - t) * 1000.0)
+
+    def stop(self):
+        if self.enabled:
+            gc.enable()
+            gc.unfreeze()
+            self.enabled = False
+
+    def begin_frame(self):
+        self.frame_start = time.perf_counter()
+
+    def _collect(self, generation):
+        t = time.perf_counter()
+        gc.collect(generation)
+        took = time.perf_counter() - t
+        self.cost[generation] = self.cost[generation] * 0.8 + took * 0.2
+        self.collections[generation] += 1
+        self.last_pause_ms = took * 1000.0
+        self.max_pause_ms = max(self.max_pause_ms, self.last_pause_ms)
+
+    def end_frame(self, state):
+        """Call after the frame is presented, before waiting for the next one."""
+        if not self.enabled:
+            return
+        paused = state in PAUSE_STATES
+        if paused and not self._was_paused:
+            self._collect(2)
+        self._was_paused = paused
+        if paused:
+            return
+        pending = gc.get_count()[0]
+        if pending < GEN0_THRESHOLD:
+            return
+        generation = 1 if self._young % GEN1_EVERY == GEN1_EVERY - 1 else 0
+        slack = self.frame_budget - (time.perf_counter() - self.frame_start)
+        if slack > self.cost[generation] * 1.5:
+            self._young += 1
+            self._collect(generation)
+        elif pending >= GEN0_FORCE:
+            self.forced += 1
+            self._collect(0)
+
+class AllocTracker:
+    """
+    Net blocks allocated per frame, always. With sample_every set, a window of
+    sample_frames frames runs under tracemalloc that often (tracing slows
+    those frames, so it stays off in between).
+    """
+
+    def __init__(self, sample_every=None, sample_frames=30):
+        self.sample_every = sample_every
+        self.sample_frames = sample_frames
+        self.blocks_per_frame = 0
+        self.blocks_avg = 0.0
+        self.peak_frame_bytes = 0
+        self.traced_current = 0
+        self.traced_peak = 0
+        self._blocks = sys.getallocatedblocks()
+        self._next_sample = time.monotonic() + sample_every if sample_every else None
+        self._sampling = 0
+        self._frame_base = 0
+        self._window_peak = 0
+
+    def begin_frame(self):
+        self._blocks = sys.getallocatedblocks()
+        if self._sampling:
+            tracemalloc.reset_peak()
+            self._frame_base = tracemalloc.get_traced_memory()[0]
+        elif self._next_sample is not None and time.monotonic() >= self._next_sample:
+            tracemalloc.start(1)
+            self._sampling = self.sample_frames
+            self._frame_base = 0
+            self._window_peak = 0
+
+    def end_frame(self):
+        self.blocks_per_frame = sys.getallocatedblocks() - self._blocks
+        self.blocks_avg = self.blocks_avg * 0.95 + self.blocks_per_frame * 0.05
+        if not self._sampling:
+            return
+        current, peak = tracemalloc.get_traced_memory()
+        self._window_peak = max(self._window_peak, peak - self._frame_base)
+        self._sampling -= 1
+        if not self._sampling:
+            self.traced_current, self.traced_peak = current, peak
+            self.peak_frame_bytes = self._window_peak
+            tracemalloc.stop()
+            self._next_sample = time.monotonic() + self.sample_every
+
+    def stop(self):
+        if tracemalloc.is_tracing():
+            tracemalloc.stop()
+        self._sampling = 0
+
+class FrameMonitor:
+    """FrameGC plus AllocTracker around the main loop, with the F3 overlay and periodic log."""
+
+    def __init__(self, frame_budget, manage_gc=False, sample_allocs=False):
+        self.gc = FrameGC(frame_budget) if manage_gc else None
+        self.allocs = AllocTracker(sample_every=5.0 if sample_allocs else None)
+        self.logging = manage_gc or sample_allocs
+        self.show_overlay = False
+        self.frame_ms = 0.0
+        self._frame_start = 0.0
+        self._next_log = time.monotonic() + LOG_INTERVAL
+
+    def start(self):
+        if self.gc is not None:
+            self.gc.start()
+
+    def stop(self):
+        if self.gc is not None:
+            self.gc.stop()
+        self.allocs.stop()
+
+    def handle_event(self, event):
+        if event.type == pygame.KEYDOWN and event.key == pygame.K_F3:
+            self.show_overlay = not self.show_overlay
+
+    def begin_frame(self):
+        self._frame_start = time.perf_counter()
+        if self.gc is not None:
+            self.gc.begin_frame()
+        self.allocs.begin_frame()
+
+    def end_frame(self, state):
+        self.allocs.end_frame()
+        self.frame_ms = (time.perf_counter() - self._frame_start) * 1000.0
+        if self.gc is not None:
+            self.gc.end_frame(state)
+        if self.logging and time.monotonic() >= self._next_log:
+            self._next_log = time.monotonic() + LOG_INTERVAL
+            LOG.info("gc", "%s", " | ".join(self.lines()))
+
+    def lines(self):
+        a = self.allocs
+        out = [f"frame {self.frame_ms:.1f} ms, blocks {a.blocks_per_frame:+d}/frame (avg {a.blocks_avg:+.0f})"]
+        if a.peak_frame_bytes:
+            out.append(f"frame alloc peak {a.peak_frame_bytes / 1024:.1f} KiB, "
+                       f"window {a.traced_current / 1024:.0f}/{a.traced_peak / 1024:.0f} KiB live/peak")
+        g = self.gc
+        if g is not None:
+            out.append(f"gc {g.collections[0]}/{g.collections[1]}/{g.collections[2]} forced {g.forced}, "
+                       f"pause {g.last_pause_ms:.2f} max {g.max_pause_ms:.2f} ms, pending {gc.get_count()[0]}")
+        else:
+            out.append(f"gc automatic, pending {gc.get_count()[0]}")
+        return out
+
+    def draw(self, surf, font):
+        """Debug overlay in the bottom-left corner."""
+        if not self.show_overlay or not font:
+            return
+        lines = self.lines()
+        h = font.get_linesize()
+        y = surf.get_height() - h * len(lines) - 8
+        bg = pygame.Surface((max(font.size(s)[0] for s in lines) + 12, h * len(lines) + 6), pygame.SRCALPHA)
+        bg.fill((0, 0, 0, 170))
+        surf.blit(bg, (4, y - 3))
+        for s in lines:
+            surf.blit(font.render(s, True, (220, 220, 220)), (10, y))
+            y += h
@@ -0,0 +1,152 @@
+"""
+interest.py
+Server-side interest management: which entities each client is sent
+
+Relevance is worked out once per team per tick and then narrowed per client:
+  - teammates are always relevant, as Game.draw shows them through fog
+  - living enemies only while they stand on a tile in the team's shared FOV
+    mask (fov.TeamVisibility), the same test Game.draw uses to hide them
+  - projectiles when fired by a teammate or flying over a visible tile
+  - everything except teammates must also be within the client's camera
+    view plus INTEREST_MARGIN; the view is the canvas size the client
+    reported when joining (clamp_view), WIDTH x HEIGHT if it sent none
+Anything that drops out stays relevant for INTEREST_GRACE_TICKS, so entities
+at the edge of view don't churn the deltas with remove/re-add pairs and the
+one-tick-old FOV mask never pops a player out early.
+"""
+
+from src.netstate import WorldState
+from src.utils import clamp
+from src.config import WIDTH, HEIGHT, TILE, MAP_W, MAP_H, MAP_TOP
+
+INTEREST_MARGIN = 2 * TILE
+INTEREST_GRACE_TICKS = 30
+
+class _ClientInterest:
+    __slots__ = ("players", "projectiles")
+
+    def __init__(self):
+        # entity id -> last tick it was relevant
+        self.players = {}
+        self.projectiles = {}
+
+def clamp_view(size):
+    """
+    A client's reported canvas size as a (w, h) view, or the default view if
+    it is malformed. Anything larger than the map sees the whole map, so the
+    map is as large as a view gets.
+    """
+    if not isinstance(size, (list, tuple)) or len(size) != 2:
+        return WIDTH, HEIGHT
+    try:
+        w, h = int(size[0]), int(size[1])
+    except (TypeError, ValueError, OverflowError):
+        return WIDTH, HEIGHT
+    return clamp(w, 1, MAP_W * TILE), clamp(h, 1, MAP_H * TILE)
+
+def _view_rect(x, y, view, margin):
+    """Camera rect a client with view (w, h) draws around (x, y), as in Game.draw, grown by margin."""
+    view_w, view_h = view
+    cam_x = clamp(x - view_w // 2, 0, max(0, MAP_W * TILE - view_w))
+    cam_y = clamp(y - view_h // 2, MAP_TOP, max(MAP_TOP, MAP_H * TILE + MAP_TOP - view_h))
+    return cam_x - margin, cam_y - margin, cam_x + view_w + margin, cam_y + view_h + margin
+
+def _select(candidates, rect, tick, last_seen, grace, out_ids):
+    """Add ids of candidates inside rect to out_ids, plus those still within grace."""
+    x0, y0, x1, y1 = rect
+    for eid, x, y in candidates:
+        if x0 <= x <= x1 and y0 <= y <= y1:
+            last_seen[eid] = tick
+    stale = []
+    for eid, seen in last_seen.items():
+        if tick - seen <= grace:
+            out_ids.add(eid)
+        else:
+            stale.append(eid)
+    for eid in stale:
+        del last_seen[eid]
+
+class InterestManager:
+    """Filters a match's WorldState down to what each client may see."""
+
+    def __init__(self, margin=INTEREST_MARGIN, grace_ticks=INTEREST_GRACE_TICKS):
+        self.margin = margin
+        self.grace_ticks = grace_ticks
+        self._clients = {}
+        # running totals for metrics
+        self.entities_sent = 0
+        self.entities_culled = 0
+
+    def forget(self, key):
+        self._clients.pop(key, None)
+
+    def reset(self):
+        """Entity ids restart with a new Game; drop all grace state."""
+        self._clients.clear()
+
+    def _team_candidates(self, game, team):
+        """(allies, enemy candidates, projectile candidates) for one team, as (id, x, y)."""
+        vis = game.visibility[team]
+        mask, w, h = vis.mask, vis.w, vis.h
+        allies = []
+        enemies = []
+        for p in game.players:
+            if p.team == team:
+                allies.append(p.id)
+                continue
+            if not p.alive:
+                continue
+            tx = int(p.x // TILE)
+            ty = int((p.y - MAP_TOP) // TILE)
+            if 0 <= tx < w and 0 <= ty < h and mask[ty * w + tx]:
+                enemies.append((p.id, p.x, p.y))
+        projectiles = []
+        for pr in game.projectiles:
+            if pr.life <= 0:
+                continue
+            owner = pr.owner
+            if owner is None or owner.team != team:
+                tx = int(pr.x // TILE)
+                ty = int((pr.y - MAP_TOP) // TILE)
+                if not (0 <= tx < w and 0 <= ty < h and mask[ty * w + tx]):
+                    continue
+            projectiles.append((pr.id & 0xFFFF, pr.x, pr.y))
+        return allies, enemies, projectiles
+
+    def filter(self, game, state, slots):
+        """Return {slot.key: WorldState} with only the entities relevant to each client."""
+        by_name = {p.name: p for p in game.players}
+        teams = {}
+        out = {}
+        tick = state.tick
+        grace = self.grace_ticks
+        total = len(state.players) + len(state.projectiles)
+        for slot in slots:
+            me = by_name.get(slot.player_name)
+            interest = self._clients.get(slot.key)
+            if interest is None:
+                interest = self._clients[slot.key] = _ClientInterest()
+            player_ids = set()
+            projectile_ids = set()
+            if me is not None:
+                cands = teams.get(me.team)
+                if cands is None:
+                    cands = teams[me.team] = self._team_candidates(game, me.team)
+                allies, enemies, projectiles = cands
+                rect = _view_rect(me.x, me.y, slot.view_size, self.margin)
+                player_ids.update(allies)
+                _select(enemies, rect, tick, interest.players, grace, player_ids)
+                _select(projectiles, rect, tick, interest.projectiles, grace, projectile_ids)
+
+            players = {pid: v for pid, v in state.players.items() if pid in player_ids}
+            names = {pid: v for pid, v in state.names.items() if pid in player_ids}
+            proj = {pid: v for pid, v in state.projectiles.items() if pid in projectile_ids}
+            sent = len(players) + len(proj)
+            self.entities_sent += sent
+            self.entities_culled += total - sent
+            out[slot.key] = WorldState(tick, state.header, players, names, proj, state.bomb)
+        return out
+
+    def culled_ratio(self):
+        total = self.entities_sent + self.entities_culled
+        return self.entities_culled / total if total else 0.0
@@ -0,0 +1,425 @@
+"""
+loadtest.py
+Local load test: many synthetic clients against a real server process
+
+Starts `python -m src.server` as a subprocess (or uses --connect), puts a UDP
+proxy in front of it that adds latency, jitter and packet loss, then ramps
+the number of scripted clients through --steps. Every client joins, decodes
+its snapshots, acks them and sends inputs modelled on Player.bot_behavior:
+close in on the nearest enemy it can see and shoot it when in range,
+otherwise head for the plant zone.
+
+After each step the server's MSG_STATS metrics are read directly, not
+through the proxy, and one report row is printed: tick-time percentiles,
+dropped ticks, and per-client bandwidth.
+
+    python -m src.loadtest --steps 10,50,100,200 --latency 60 --jitter 15 --loss 0.02
+"""
+
+import os
+import sys
+import math
+import random
+import asyncio
+import argparse
+import subprocess
+from src import protocol, codec
+from src.protocol import (MSG_JOIN, MSG_INPUT, MSG_LEAVE, MSG_STATS, MSG_WELCOME,
+                          MSG_SNAPSHOT, MSG_STATS_REPLY, MSG_ERROR)
+from src.netstate import POS_SCALE, P_ALIVE
+from src.config import ASSET_PATHS, TILE, MAP_W, MAP_H, MAP_TOP
+from src.log import LOG
+
+STATE_HISTORY = 128
+CLOSE_IN_DIST = 120
+ATTACK_RANGE = 400
+AIM_JITTER = 18
+JOIN_RETRY = 0.5
+
+class UdpProxy:
+    """Forwards datagrams between clients and a server with delay, jitter and loss."""
+
+    def __init__(self, target, latency_ms=0.0, jitter_ms=0.0, loss=0.0, seed=None):
+        self.target = target
+        self.one_way = latency_ms / 2000.0
+        self.jitter = jitter_ms / 1000.0
+        self.loss = loss
+        self.rng = random.Random(seed)
+        self.transport = None
+        self.links = {}
+        self.forwarded = 0
+        self.dropped = 0
+
+    def _delay(self):
+        return max(0.0, self.rng.gauss(self.one_way, self.jitter)) if self.jitter else self.one_way
+
+    def _forward(self, transport, data, addr=None):
+        if self.loss and self.rng.random() < self.loss:
+            self.dropped += 1
+            return
+        self.forwarded += 1
+        delay = self._delay()
+        if delay <= 0:
+            transport.sendto(data, addr)
+        else:
+            asyncio.get_running_loop().call_later(delay, _deliver, transport, data, addr)
+
+    async def start(self, port=0):
+        loop = asyncio.get_running_loop()
+        proxy = self
+
+        class Front(asyncio.DatagramProtocol):
+            def datagram_received(self, data, addr):
+                link = proxy.links.get(addr)
+                if link is None:
+                    link = proxy.links[addr] = _ProxyLink(proxy, addr)
+                    loop.create_task(link.open(loop))
+                link.send(data)
+
+        self.transport, _ = await loop.create_datagram_endpoint(Front, local_addr=("127.0.0.1", port))
+        return self.transport.get_extra_info("sockname")[1]
+
+    def close(self):
+        for link in self.links.values():
+            link.close()
+        if self.transport is not None:
+            self.transport.close()
+
+def _deliver(transport, data, addr):
+    # the proxy may have shut down while this datagram was in flight
+    if not transport.is_closing():
+        transport.sendto(data, addr)
+
+class _ProxyLink(asyncio.DatagramProtocol):
+    """Upstream socket for one client, so the server sees one address per client."""
+
+    def __init__(self, proxy, client_addr):
+        self.proxy = proxy
+        self.client_addr = client_addr
+        self.transport = None
+        self.backlog = []
+
+    async def open(self, loop):
+        await loop.create_datagram_endpoint(lambda: self, remote_addr=self.proxy.target)
+
+    def connection_made(self, transport):
+        self.transport = transport
+        for data in self.backlog:
+            self.proxy._forward(transport, data)
+        self.backlog = []
+
+    def send(self, data):
+        if self.transport is None:
+            self.backlog.append(data)
+        else:
+            self.proxy._forward(self.transport, data)
+
+    def datagram_received(self, data, addr):
+        self.proxy._forward(self.proxy.transport, data, self.client_addr)
+
+    def error_received(self, exc):
+        pass
+
+    def close(self):
+        if self.transport is not None:
+            self.transport.close()
+
+class SyntheticClient(asyncio.DatagramProtocol):
+    """One scripted player: joins, decodes and acks snapshots, sends bot-like inputs."""
+
+    def __init__(self, index, rng):
+        self.name = f"Load{index}"
+        self.char = rng.choice(list(ASSET_PATHS.keys()))
+        self.rng = rng
+        self.transport = None
+        self.player_name = None
+        self.error = None
+        self.seq = 0
+        self.latest_tick = -1
+        self.states = {}
+        self.state = None
+        self.last_join = 0.0
+        self.bytes_in = 0
+        self.snapshots = 0
+        self.undecodable = 0
+
+    def connection_made(self, transport):
+        self.transport = transport
+
+    def error_received(self, exc):
+        pass
+
+    def send(self, msg_type, payload=None):
+        if self.transport is not None:
+            self.transport.sendto(protocol.encode(msg_type, payload))
+
+    def join(self, now):
+        self.last_join = now
+        self.send(MSG_JOIN, {"name": self.name, "char": self.char})
+
+    def datagram_received(self, data, addr):
+        self.bytes_in += len(data)
+        msg_type, payload = protocol.decode(data)
+        if msg_type == MSG_SNAPSHOT and payload:
+            self.snapshots += 1
+            try:
+                state = codec.decode(payload, self.states)
+            except codec.CodecError:
+                self.undecodable += 1
+                return
+            if state.tick > self.latest_tick:
+                self.states[state.tick] = state
+                while len(self.states) > STATE_HISTORY:
+                    del self.states[next(iter(self.states))]
+                self.latest_tick = state.tick
+                self.state = state
+        elif msg_type == MSG_WELCOME and payload:
+            self.player_name = payload["name"]
+        elif msg_type == MSG_ERROR:
+            self.error = (payload or {}).get("error", "unknown error")
+
+    def controls(self):
+        """Inputs from the newest state, following the same plan as Player.bot_behavior."""
+        state = self.state
+        ctl = {"up": False, "down": False, "left": False, "right": False,
+               "fire": False, "aim": None, "action": False}
+        if state is None:
+            return ctl
+        me = None
+        for pid, name in state.names.items():
+            if name == self.player_name:
+                me = state.players.get(pid)
+                break
+        if me is None or not me[5] & P_ALIVE:
+            return ctl
+        mx, my = me[2] / POS_SCALE, me[3] / POS_SCALE
+        target = None
+        best = float("inf")
+        for pid, (team, char, x, y, hp, flags, anim) in state.players.items():
+            if team != me[0] and flags & P_ALIVE:
+                d = math.hypot(x / POS_SCALE - mx, y / POS_SCALE - my)
+                if d < best:
+                    best, target = d, (x / POS_SCALE, y / POS_SCALE)
+        if target is None:
+            # nobody in view: make for the plant zone in the middle of the map
+            goal = (MAP_W * TILE / 2, MAP_TOP + MAP_H * TILE / 2)
+            ctl["action"] = math.hypot(goal[0] - mx, goal[1] - my) < 40
+        else:
+            goal = target
+        dx, dy = goal[0] - mx, goal[1] - my
+        dist = math.hypot(dx, dy) or 1.0
+        if target is None or dist > CLOSE_IN_DIST:
+            ctl["left"], ctl["right"] = dx < -dist * 0.3, dx > dist * 0.3
+            ctl["up"], ctl["down"] = dy < -dist * 0.3, dy > dist * 0.3
+        if target is not None and dist < ATTACK_RANGE:
+            ctl["fire"] = True
+            ctl["aim"] = [target[0] + self.rng.uniform(-AIM_JITTER, AIM_JITTER),
+                          target[1] + self.rng.uniform(-AIM_JITTER, AIM_JITTER)]
+        return ctl
+
+    def send_input(self):
+        self.seq += 1
+        msg = self.controls()
+        msg["seq"] = self.seq
+        msg["ack"] = self.latest_tick
+        msg["view"] = self.latest_tick
+        self.send(MSG_INPUT, msg)
+
+    def leave(self):
+        self.send(MSG_LEAVE)
+        if self.transport is not None:
+            self.transport.close()
+
+async def _query_stats(server_addr, timeout=2.0):
+    """Ask the server for its per-match metrics; None if it does not answer."""
+    loop = asyncio.get_running_loop()
+    reply = loop.create_future()
+
+    class Query(asyncio.DatagramProtocol):
+        def datagram_received(self, data, addr):
+            msg_type, payload = protocol.decode(data)
+            if msg_type == MSG_STATS_REPLY and not reply.done():
+                reply.set_result(payload)
+
+        def error_received(self, exc):
+            pass
+
+    transport, _ = await loop.create_datagram_endpoint(Query, remote_addr=server_addr)
+    try:
+        deadline = loop.time() + timeout
+        while loop.time() < deadline:
+            transport.sendto(protocol.encode(MSG_STATS))
+            try:
+                return (await asyncio.wait_for(asyncio.shield(reply), 0.25))["matches"]
+            except asyncio.TimeoutError:
+                continue
+        return None
+    finally:
+        transport.close()
+
+def _percentile(values, q):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(round(q * (len(values) - 1))))]
+
+class LoadTest:
+    def __init__(self, server_addr, proxy, input_rate=30, seed=1):
+        self.server_addr = server_addr
+        self.proxy = proxy
+        self.proxy_addr = None
+        self.input_rate = input_rate
+        self.rng = random.Random(seed)
+        self.clients = []
+        self._stop = None
+
+    async def add_clients(self, n):
+        loop = asyncio.get_running_loop()
+        for _ in range(n):
+            client = SyntheticClient(len(self.clients), random.Random(self.rng.random()))
+            await loop.create_datagram_endpoint(lambda: client, remote_addr=self.proxy_addr)
+            client.join(loop.time())
+            self.clients.append(client)
+
+    async def drive(self):
+        """Send every client's input at input_rate, and re-send joins that went unanswered."""
+        loop = asyncio.get_running_loop()
+        period = 1.0 / self.input_rate
+        while not self._stop.is_set():
+            now = loop.time()
+            for client in self.clients:
+                if client.player_name is not None:
+                    client.send_input()
+                elif client.error is None and now - client.last_join > JOIN_RETRY:
+                    client.join(now)
+            await asyncio.sleep(max(0.0, period - (loop.time() - now)))
+
+    async def run(self, steps, step_seconds):
+        loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        port = await self.proxy.start()
+        self.proxy_addr = ("127.0.0.1", port)
+        if await _query_stats(self.server_addr, timeout=15.0) is None:
+            raise RuntimeError(f"server at {self.server_addr[0]}:{self.server_addr[1]} did not answer")
+        driver = loop.create_task(self.drive())
+        rows = []
+        try:
+            prev = await _query_stats(self.server_addr) or []
+            for target in steps:
+                await self.add_clients(max(0, target - len(self.clients)))
+                bytes_before = sum(c.bytes_in for c in self.clients)
+                snaps_before = sum(c.snapshots for c in self.clients)
+                t0 = loop.time()
+                await asyncio.sleep(step_seconds)
+                elapsed = loop.time() - t0
+                metrics = await _query_stats(self.server_addr)
+                if metrics is None:
+                    LOG.error("loadtest", "server stopped answering at %d clients", len(self.clients))
+                    break
+                rows.append(self._row(metrics, prev, elapsed, bytes_before, snaps_before))
+                _print_row(rows[-1], header=len(rows) == 1)
+                prev = metrics
+        finally:
+            self._stop.set()
+            await driver
+            for client in self.clients:
+                client.leave()
+            # let the delayed LEAVE datagrams through before closing the proxy
+            await asyncio.sleep(self.proxy.one_way + 3 * self.proxy.jitter + 0.1)
+            self.proxy.close()
+        return rows
+
+    def _row(self, metrics, prev, elapsed, bytes_before, snaps_before):
+        prev_by_id = {m["match"]: m for m in prev}
+        joined = [c for c in self.clients if c.player_name is not None]
+        n = max(1, len(joined))
+        server_bytes = sum(m["bytes_out"] - prev_by_id.get(m["match"], {}).get("bytes_out", 0)
+                           for m in metrics)
+        dropped = sum(m["dropped_ticks"] - prev_by_id.get(m["match"], {}).get("dropped_ticks", 0)
+                      for m in metrics)
+        return {
+            "clients": len(self.clients),
+            "joined": len(joined),
+            "matches": len(metrics),
+            "tick_p50": _percentile([m["tick_ms_p50"] for m in metrics], 0.5),
+            "tick_p99": max((m["tick_ms_p99"] for m in metrics), default=0.0),
+            "tick_max": max((m["tick_ms_max"] for m in metrics), default=0.0),
+            "dropped": dropped,
+            "server_kbps": server_bytes / elapsed / n / 1024.0,
+            "client_kbps": (sum(c.bytes_in for c in self.clients) - bytes_before) / elapsed / n / 1024.0,
+            "snap_hz": (sum(c.snapshots for c in self.clients) - snaps_before) / elapsed / n,
+            "undecodable": sum(c.undecodable for c in self.clients),
+        }
+
+# (key, width, format spec); bandwidth is KiB/s per joined client, tick times in ms
+_COLUMNS = (("clients", 8, "d"), ("joined", 7, "d"), ("matches", 8, "d"), ("tick_p50", 9, ".2f"),
+            ("tick_p99", 9, ".2f"), ("tick_max", 9, ".2f"), ("dropped", 8, "d"),
+            ("server_kbps", 12, ".2f"), ("client_kbps", 12, ".2f"), ("snap_hz", 8, ".1f"),
+            ("undecodable", 12, "d"))
+
+def _print_row(row, header=False):
+    if header:
+        print("".join(f"{name:>{width}}" for name, width, _ in _COLUMNS))
+    print("".join(f"{row[name]:>{width}{spec}}" for name, width, spec in _COLUMNS), flush=True)
+
+def _spawn_server(args):
+    cmd = [sys.executable, "-m", "src.server", "--bind", "127.0.0.1", "--port", str(args.port),
+           "--matches", "1", "--max-matches", str(args.max_matches), "--team-size", str(args.team_size),
+           "--tick-rate", str(args.tick_rate), "--snapshot-rate", str(args.snapshot_rate),
+           "--log", args.server_log]
+    if args.zlib:
+        cmd.append("--zlib")
+    if args.no_interest:
+        cmd.append("--no-interest")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    return subprocess.Popen(cmd, cwd=root)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ramp synthetic clients against a game server")
+    parser.add_argument("--steps", default="10,25,50,100,200",
+                        help="comma separated client counts to ramp through")
+    parser.add_argument("--step-seconds", type=float, default=10.0)
+    parser.add_argument("--latency", type=float, default=50.0, help="round trip ms added by the proxy")
+    parser.add_argument("--jitter", type=float, default=10.0, help="ms standard deviation per direction")
+    parser.add_argument("--loss", type=float, default=0.01, help="drop probability per datagram")
+    parser.add_argument("--input-rate", type=int, default=30)
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--connect", metavar="HOST:PORT", help="use a running server instead of spawning one")
+    parser.add_argument("--port", type=int, default=protocol.DEFAULT_PORT + 100)
+    parser.add_argument("--max-matches", type=int, default=256)
+    parser.add_argument("--team-size", type=int, default=5)
+    parser.add_argument("--tick-rate", type=int, default=60)
+    parser.add_argument("--snapshot-rate", type=int, default=30)
+    parser.add_argument("--zlib", action="store_true")
+    parser.add_argument("--no-interest", action="store_true")
+    parser.add_argument("--server-log", default="warning")
+    args = parser.parse_args(argv)
+    steps = sorted(int(s) for s in args.steps.split(",") if s.strip())
+
+    server = None
+    if args.connect:
+        host, _, port = args.connect.rpartition(":")
+        server_addr = (host or "127.0.0.1", int(port))
+    else:
+        server = _spawn_server(args)
+        server_addr = ("127.0.0.1", args.port)
+    proxy = UdpProxy(server_addr, args.latency, args.jitter, args.loss, seed=args.seed)
+    test = LoadTest(server_addr, proxy, args.input_rate, args.seed)
+    print(f"proxy: {args.latency:.0f} ms rtt, {args.jitter:.0f} ms jitter, {args.loss:.1%} loss; "
+          f"{args.tick_rate} Hz ticks, {args.step_seconds:.0f} s per step")
+    try:
+        asyncio.run(test.run(steps, args.step_seconds))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if server is not None:
+            server.terminate()
+            try:
+                server.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                server.kill()
+    print(f"proxy forwarded {proxy.forwarded} datagrams, dropped {proxy.dropped}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
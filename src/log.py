@@ -0,0 +1,145 @@
+"""
+log.py
+Low-overhead leveled logging with per-category switches
+
+Records go into an in-memory ring buffer and are written out either by a
+background flush thread or on demand with flush(). Disabled calls return
+after a single dict lookup and never format their message.
+
+    from src.log import LOG
+    LOG.debug("bomb", "planted at %s", location)
+"""
+
+import sys
+import time
+import threading
+from collections import deque
+
+DEBUG = 10
+INFO = 20
+WARNING = 30
+ERROR = 40
+OFF = 100
+
+LEVEL_NAMES = {DEBUG: "DEBUG", INFO: "INFO", WARNING: "WARN", ERROR: "ERROR"}
+_LEVELS_BY_NAME = {"debug": DEBUG, "info": INFO, "warn": WARNING, "warning": WARNING,
+                   "error": ERROR, "off": OFF}
+
+class Logger:
+    def __init__(self, level=INFO, capacity=4096, stream=None):
+        self.default_level = level
+        # category -> minimum level; missing categories use default_level
+        self._levels = {}
+        self._buffer = deque(maxlen=capacity)
+        self._lock = threading.Lock()
+        self._stream = stream
+        self._thread = None
+        self._wake = threading.Event()
+        self._stop = False
+        self.dropped = 0
+
+    # --- configuration ---
+    def set_level(self, level, category=None):
+        if category is None:
+            self.default_level = level
+        else:
+            self._levels[category] = level
+
+    def enable(self, category, level=DEBUG):
+        self._levels[category] = level
+
+    def disable(self, category):
+        self._levels[category] = OFF
+
+    def configure(self, spec):
+        """
+        Apply a spec string like "info,bomb=debug,render=off": a bare level
+        sets the default, category=level pairs set per-category switches.
+        """
+        for part in (spec or "").split(","):
+            part = part.strip()
+            if not part:
+                continue
+            category, _, name = part.rpartition("=")
+            level = _LEVELS_BY_NAME.get(name.strip().lower())
+            if level is None:
+                raise ValueError(f"Unknown log level: {name}")
+            self.set_level(level, category.strip() or None)
+
+    def is_enabled(self, category, level):
+        return level >= self._levels.get(category, self.default_level)
+
+    # --- logging calls ---
+    def log(self, level, category, msg, *args):
+        if level < self._levels.get(category, self.default_level):
+            return
+        buf = self._buffer
+        if len(buf) == buf.maxlen:
+            self.dropped += 1
+        # formatting is deferred to flush time
+        buf.append((time.time(), level, category, msg, args))
+
+    def debug(self, category, msg, *args):
+        if DEBUG < self._levels.get(category, self.default_level):
+            return
+        self.log(DEBUG, category, msg, *args)
+
+    def info(self, category, msg, *args):
+        if INFO < self._levels.get(category, self.default_level):
+            return
+        self.log(INFO, category, msg, *args)
+
+    def warning(self, category, msg, *args):
+        self.log(WARNING, category, msg, *args)
+
+    def error(self, category, msg, *args):
+        self.log(ERROR, category, msg, *args)
+
+    # --- output ---
+    def flush(self):
+        """Format and write all buffered records. Safe to call from any thread."""
+        with self._lock:
+            buf = self._buffer
+            lines = []
+            while buf:
+                ts, level, category, msg, args = buf.popleft()
+                if args:
+                    try:
+                        msg = msg % args
+                    except (TypeError, ValueError):
+                        msg = f"{msg} {args}"
+                stamp = time.strftime("%H:%M:%S", time.localtime(ts))
+                lines.append(f"{stamp}.{int(ts * 1000) % 1000:03d} {LEVEL_NAMES.get(level, level)} [{category}] {msg}\n")
+            if self.dropped:
+                lines.append(f"[log] {self.dropped} records dropped (ring buffer full)\n")
+                self.dropped = 0
+            if lines:
+                stream = self._stream or sys.stdout
+                stream.writelines(lines)
+                stream.flush()
+
+    def start(self, interval=0.5):
+        """Start the background flush thread."""
+        if self._thread is not None:
+            return
+        self._stop = False
+
+        def run():
+            while not self._stop:
+                self._wake.wait(interval)
+                self._wake.clear()
+                self.flush()
+
+        self._thread = threading.Thread(target=run, name="log-flush", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """Stop the flush thread and write anything still buffered."""
+        if self._thread is not None:
+            self._stop = True
+            self._wake.set()
+            self._thread.join()
+            self._thread = None
+        self.flush()
+
+LOG = Logger()
@@ -5,9 +5,9 @@ Image -> map grid loader + renderer
 Produces a grid of size MAP_H x MAP_W and a draw_map function.
 """
 import pygame
-from PIL import Image
 import os
-from src.config import MAP_W, MAP_H, TILE, MAP_TOP, BG, YELLOW
+from src.config import MAP_W, MAP_H, TILE, MAP_TOP, BG, YELLOW, MAP_IMAGE_PATH
+from src.assets import get_assets
 
 def classify_tile(tile):
     """Classify a tile as grass (0), wall (1), or crate (2) based on avg color."""
@@ -28,6 +28,9 @@ def generate_map_from_image(image_path, tile_size=50):
     If the image is not exactly MAP_W*tile_size by MAP_H*tile_size,
     it will be resized (nearest neighbor) to that size so the grid matches.
     """
+    # PIL is only needed on an asset cache miss, so keep it off the startup path
+    from PIL import Image
+
     if not os.path.exists(image_path):
         raise FileNotFoundError(f"Map image not found: {image_path}")
 
@@ -65,13 +68,28 @@ def generate_map_from_image(image_path, tile_size=50):
     return grid
 
 # wrapper for your main.py which expects no-arg generate_map()
-def generate_map():
-    # adjust path if your asset lives elsewhere
-    image_path = os.path.join("Assets", "2dMap.png")
-    return generate_map_from_image(image_path, tile_size=TILE)
+def generate_map(seed=None):
+    """The stock map, or with a seed the procedural map for it (see mapgen.py)."""
+    if seed is not None:
+        from src.mapgen import generate
+        return generate(seed)
+    # adjust MAP_IMAGE_PATH if your asset lives elsewhere; the grid is cached by AssetManager
+    return get_assets().map_grid(MAP_IMAGE_PATH, tile_size=TILE)
+
+
+def default_plant_zone():
+    """The 80x80 plant site in the middle of the map."""
+    return pygame.Rect((MAP_W * TILE) // 2 - 40, MAP_TOP + (MAP_H * TILE) // 2 - 40, 80, 80)
 
 
 # --- simple renderer used by Game.draw() ---
+
+TILE_COLORS = {
+    0: (200, 220, 180),  # grass / floor
+    1: (50, 50, 60),     # wall
+    2: (150, 100, 50),   # crate (brown)
+}
+
 def draw_map(surface, game_map, plant_zone, cam_x=0, cam_y=0):
     """
     Draw the map tiles to the given surface.
@@ -87,13 +105,7 @@ def draw_map(surface, game_map, plant_zone, cam_x=0, cam_y=0):
             sx = x * TILE - cam_x
             sy = y * TILE + MAP_TOP - cam_y
             r = (sx, sy, TILE, TILE)
-            tile = game_map[y][x]
-            if tile == 1:
-                color = (50, 50, 60)  # wall
-            elif tile == 2:
-                color = (150, 100, 50)  # crate (brown)
-            else:
-                color = (200, 220, 180)  # grass / floor
+            color = TILE_COLORS.get(game_map[y][x], TILE_COLORS[0])
             pygame.draw.rect(surface, color, r)
 
     # plant zone outline (optional)
@@ -0,0 +1,249 @@
+"""
+mapgen.py
+Seeded procedural maps: NumPy cellular automata plus a vectorized reachability check
+
+Maps are generated in batches as one (N, MAP_H, MAP_W) array, so every step
+is a handful of whole-array operations no matter how many maps there are:
+  - random fill, then a few cellular-automaton passes (a cell becomes a
+    wall with 5+ walled neighbours and stays one with 4+), which turns noise
+    into blobs and wall runs
+  - a coarse noise field upscaled to tile resolution, which picks out the
+    wall cells that become crates
+  - spawn areas and the plant site are carved open
+  - a flood fill from spawn A, grown across all maps at once by shifting
+    the reached mask one tile in each direction until it stops changing
+A map is kept only if spawn B and the plant site are both in spawn A's
+region (reachability is symmetric) and its solid fraction is within
+bounds. Rejections are counted by reason.
+
+The seed fully determines a map: generate(seed) draws candidates from
+numpy's generator seeded with it until one is valid, so the same seed gives
+the same grid everywhere (server, clients, tools).
+
+Batches are cached under .cache/maps at 2 bits per tile (160 bytes for a
+32x20 map). Run python -m src.mapgen --count 5000 to generate a batch and
+print the throughput and rejection report.
+"""
+
+import os
+import sys
+import time
+import struct
+import argparse
+import numpy as np
+from src.config import MAP_W, MAP_H, TILE
+from src.log import LOG
+
+FLOOR, WALL, CRATE = 0, 1, 2
+
+CACHE_DIR = os.path.join(".cache", "maps")
+_HEADER = struct.Struct("<4sHHHQ")
+_MAGIC = b"PTMP"
+_VERSION = 1
+
+# tiles kept open: spawn points match Game.spawn_points, the site default_plant_zone()
+SPAWN_TILES = ((2, 2), (MAP_W - 3, MAP_H - 3))
+SPAWN_CLEAR = 1
+_ZONE_X0 = ((MAP_W * TILE) // 2 - 40) // TILE
+_ZONE_X1 = ((MAP_W * TILE) // 2 + 39) // TILE
+_ZONE_Y0 = ((MAP_H * TILE) // 2 - 40) // TILE
+_ZONE_Y1 = ((MAP_H * TILE) // 2 + 39) // TILE
+PLANT_TILE = ((_ZONE_X0 + _ZONE_X1) // 2, (_ZONE_Y0 + _ZONE_Y1) // 2)
+
+class MapParams:
+    """Generator knobs; the defaults give open arenas with walled blobs, like the stock map."""
+
+    def __init__(self, fill=0.42, steps=3, crate_ratio=0.45, crate_cell=4,
+                 min_solid=0.06, max_solid=0.30):
+        self.fill = fill
+        self.steps = steps
+        self.crate_ratio = crate_ratio
+        self.crate_cell = crate_cell
+        self.min_solid = min_solid
+        self.max_solid = max_solid
+
+    def key(self):
+        return (f"f{self.fill}-s{self.steps}-c{self.crate_ratio}-{self.crate_cell}"
+                f"-{self.min_solid}-{self.max_solid}")
+
+def _neighbours(walls):
+    """Walled neighbours of every cell in an (N, H, W) bool array; off-map counts as open."""
+    p = np.pad(walls, ((0, 0), (1, 1), (1, 1))).astype(np.uint8)
+    return (p[:, :-2, :-2] + p[:, :-2, 1:-1] + p[:, :-2, 2:] +
+            p[:, 1:-1, :-2] + p[:, 1:-1, 2:] +
+            p[:, 2:, :-2] + p[:, 2:, 1:-1] + p[:, 2:, 2:])
+
+def _carve(grids):
+    r = SPAWN_CLEAR
+    for tx, ty in SPAWN_TILES:
+        grids[:, max(0, ty - r):ty + r + 1, max(0, tx - r):tx + r + 1] = FLOOR
+    grids[:, _ZONE_Y0:_ZONE_Y1 + 1, _ZONE_X0:_ZONE_X1 + 1] = FLOOR
+
+def generate_batch(rng, n, params=None):
+    """n candidate grids as an (n, MAP_H, MAP_W) uint8 array; not yet validated."""
+    params = params or MapParams()
+    walls = rng.random((n, MAP_H, MAP_W)) < params.fill
+    for _ in range(params.steps):
+        nb = _neighbours(walls)
+        walls = np.where(walls, nb >= 4, nb >= 5)
+    # crates come in patches: threshold a coarse noise field blown up to tile size
+    c = params.crate_cell
+    coarse = rng.random((n, -(-MAP_H // c), -(-MAP_W // c)))
+    patches = coarse.repeat(c, axis=1).repeat(c, axis=2)[:, :MAP_H, :MAP_W] < params.crate_ratio
+    grids = walls.astype(np.uint8)
+    grids[walls & patches] = CRATE
+    _carve(grids)
+    return grids
+
+def reachable(grids, start):
+    """Tiles 4-connected to start through floor, for every map of an (N, H, W) batch at once."""
+    open_ = grids == FLOOR
+    reach = np.zeros_like(open_)
+    tx, ty = start
+    reach[:, ty, tx] = open_[:, ty, tx]
+    grow = np.empty_like(reach)
+    while True:
+        grow[:] = reach
+        grow[:, 1:, :] |= reach[:, :-1, :]
+        grow[:, :-1, :] |= reach[:, 1:, :]
+        grow[:, :, 1:] |= reach[:, :, :-1]
+        grow[:, :, :-1] |= reach[:, :, 1:]
+        grow &= open_
+        if np.array_equal(grow, reach):
+            return reach
+        reach, grow = grow, reach
+
+def validate(grids, params=None):
+    """(ok, reasons): per-map bool array and a rejection reason per map ('' when kept)."""
+    params = params or MapParams()
+    n = len(grids)
+    solid = (grids != FLOOR).reshape(n, -1).mean(axis=1)
+    reach = reachable(grids, SPAWN_TILES[0])
+    bx, by = SPAWN_TILES[1]
+    px, py = PLANT_TILE
+    checks = (
+        ("too open", solid < params.min_solid),
+        ("too dense", solid > params.max_solid),
+        ("spawns disconnected", ~reach[:, by, bx]),
+        ("plant site unreachable", ~reach[:, py, px]),
+    )
+    reasons = np.full(n, "", dtype=object)
+    for name, failed in checks:
+        reasons[(reasons == "") & failed] = name
+    return reasons == "", reasons
+
+def generate(seed, params=None, batch=8):
+    """The valid map for seed, as a list of rows like map.generate_map()."""
+    params = params or MapParams()
+    rng = np.random.default_rng(seed)
+    while True:
+        grids = generate_batch(rng, batch, params)
+        ok, _ = validate(grids, params)
+        if ok.any():
+            return grids[int(np.argmax(ok))].tolist()
+
+def generate_many(count, seed=0, params=None, batch=256):
+    """
+    count valid maps from one seeded stream. Returns (grids, report), where
+    report maps each rejection reason to how often it happened.
+    """
+    params = params or MapParams()
+    rng = np.random.default_rng(seed)
+    kept = []
+    have = 0
+    report = {}
+    while have < count:
+        grids = generate_batch(rng, batch, params)
+        ok, reasons = validate(grids, params)
+        for reason in reasons[~ok]:
+            report[reason] = report.get(reason, 0) + 1
+        good = grids[ok]
+        kept.append(good[:count - have])
+        have += len(kept[-1])
+    return np.concatenate(kept), report
+
+# --- compact cache: 4 tiles per byte ---
+
+def pack(grids):
+    flat = grids.reshape(len(grids), -1)
+    pad = (-flat.shape[1]) % 4
+    if pad:
+        flat = np.pad(flat, ((0, 0), (0, pad)))
+    q = flat.reshape(len(grids), -1, 4).astype(np.uint8)
+    return (q[..., 0] | (q[..., 1] << 2) | (q[..., 2] << 4) | (q[..., 3] << 6)).tobytes()
+
+def unpack(data, count, w=MAP_W, h=MAP_H):
+    per_map = -(-(w * h) // 4)
+    b = np.frombuffer(data, dtype=np.uint8, count=count * per_map).reshape(count, per_map)
+    q = np.stack([b & 3, (b >> 2) & 3, (b >> 4) & 3, b >> 6], axis=-1).reshape(count, -1)
+    return q[:, :w * h].reshape(count, h, w)
+
+def cache_path(count, seed, params=None, cache_dir=CACHE_DIR):
+    params = params or MapParams()
+    return os.path.join(cache_dir, f"maps-{MAP_W}x{MAP_H}-{seed}-{count}-{params.key()}.bin")
+
+def save_maps(path, grids):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(_HEADER.pack(_MAGIC, _VERSION, MAP_W, MAP_H, len(grids)))
+        f.write(pack(grids))
+    os.replace(tmp, path)
+
+def load_maps(path):
+    """(N, H, W) uint8 grids from save_maps(), or None if missing or stale."""
+    try:
+        with open(path, "rb") as f:
+            blob = f.read()
+    except OSError:
+        return None
+    if len(blob) < _HEADER.size:
+        return None
+    magic, version, w, h, count = _HEADER.unpack_from(blob)
+    if magic != _MAGIC or version != _VERSION or (w, h) != (MAP_W, MAP_H):
+        return None
+    return unpack(blob[_HEADER.size:], count, w, h)
+
+def cached_maps(count, seed=0, params=None):
+    """generate_many() through the on-disk cache."""
+    path = cache_path(count, seed, params)
+    grids = load_maps(path)
+    if grids is None:
+        grids, report = generate_many(count, seed, params)
+        save_maps(path, grids)
+        LOG.info("main", "generated %d maps (%s), cached in %s", count,
+                 ", ".join(f"{k}: {v}" for k, v in sorted(report.items())) or "none rejected", path)
+    return grids
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate and validate procedural maps")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--batch", type=int, default=256, help="maps generated per vectorized pass")
+    parser.add_argument("--fill", type=float, default=MapParams().fill)
+    parser.add_argument("--out", help="cache file to write (default under .cache/maps)")
+    parser.add_argument("--show", type=int, metavar="SEED", help="print the map for one seed and exit")
+    args = parser.parse_args(argv)
+    params = MapParams(fill=args.fill)
+
+    if args.show is not None:
+        for row in generate(args.show, params):
+            print("".join(".#c"[v] for v in row))
+        return 0
+
+    t = time.perf_counter()
+    grids, report = generate_many(args.count, args.seed, params, args.batch)
+    elapsed = time.perf_counter() - t
+    rejected = sum(report.values())
+    out = args.out or cache_path(args.count, args.seed, params)
+    save_maps(out, grids)
+    print(f"{len(grids)} valid maps in {elapsed:.2f}s ({len(grids) / elapsed * 60:.0f}/min), "
+          f"{rejected} rejected ({rejected / (rejected + len(grids)):.1%})")
+    for reason, n in sorted(report.items(), key=lambda kv: -kv[1]):
+        print(f"  {reason}: {n}")
+    print(f"wrote {out} ({os.path.getsize(out)} bytes, "
+          f"{(os.path.getsize(out) - _HEADER.size) // max(1, len(grids))} bytes/map)")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,109 @@
+"""
+minimap.py
+Cached minimap: one pixel per tile, patched when a tile changes
+
+The tile layer is built once from the grid with pygame.surfarray (one
+palette lookup over the whole array) and kept, already scaled, in a
+surface of its own. Game.set_tile patches the few pixels of a changed tile
+instead of rebuilding. Each frame costs one blit of that surface, one
+Surface.blits call for the player dots, and a couple of rects for the plant
+zone, bomb and camera view. Enemies follow the same fog rules as the world
+view.
+"""
+
+import numpy as np
+import pygame
+from src.config import TILE, MAP_TOP, YELLOW, WHITE, ATT_COL, DEF_COL
+from src.map import TILE_COLORS
+from src.render import get_circle_stamp
+
+# screen pixels per tile
+MINIMAP_SCALE = 4
+MINIMAP_MARGIN = 8
+_BORDER = (90, 92, 100)
+_BOMB = (255, 60, 60)
+
+class Minimap:
+    def __init__(self, game_map, scale=MINIMAP_SCALE):
+        self.scale = scale
+        self.h = len(game_map)
+        self.w = len(game_map[0]) if self.h > 0 else 0
+        palette = np.zeros((max(TILE_COLORS) + 1, 3), dtype=np.uint8)
+        palette[:] = TILE_COLORS[0]
+        for value, color in TILE_COLORS.items():
+            palette[value] = color
+        self._palette = palette
+        self.tiles = pygame.Surface((self.w * scale, self.h * scale))
+        self.rebuild(game_map)
+        self._dots = {}
+        self._blits = []
+
+    def rebuild(self, game_map):
+        """Redraw the whole tile layer from the grid."""
+        grid = np.asarray(game_map, dtype=np.intp)
+        grid = np.where((grid >= 0) & (grid < len(self._palette)), grid, 0)
+        # surfarray is indexed (x, y), the grid (row, col)
+        small = pygame.Surface((self.w, self.h))
+        pygame.surfarray.blit_array(small, self._palette[grid].transpose(1, 0, 2))
+        pygame.transform.scale(small, self.tiles.get_size(), self.tiles)
+
+    def set_tile(self, tx, ty, value):
+        s = self.scale
+        color = TILE_COLORS.get(value, TILE_COLORS[0])
+        self.tiles.fill(color, (tx * s, ty * s, s, s))
+
+    def size(self):
+        return self.tiles.get_size()
+
+    def _to_map(self, x, y):
+        s = self.scale / TILE
+        return int(x * s), int((y - MAP_TOP) * s)
+
+    def _dot(self, color):
+        dot = self._dots.get(color)
+        if dot is None:
+            dot = get_circle_stamp(color, max(1, self.scale // 2))
+            self._dots[color] = dot
+        return dot
+
+    def draw(self, surf, game, x=None, y=None):
+        """Draw at (x, y), by default the bottom-right corner of surf."""
+        mw, mh = self.tiles.get_size()
+        if x is None:
+            x = surf.get_width() - mw - MINIMAP_MARGIN
+        if y is None:
+            y = surf.get_height() - mh - MINIMAP_MARGIN
+        surf.blit(self.tiles, (x, y))
+        pygame.draw.rect(surf, _BORDER, (x - 1, y - 1, mw + 2, mh + 2), 1)
+
+        s = self.scale / TILE
+        zone = game.plant_zone
+        if zone:
+            zx, zy = self._to_map(zone.x, zone.y)
+            pygame.draw.rect(surf, YELLOW, (x + zx, y + zy, max(2, int(zone.w * s)), max(2, int(zone.h * s))), 1)
+
+        hp = game.human_player
+        vis = game.visibility[hp.team] if hp else None
+        blits = self._blits
+        blits.clear()
+        for p in game.players:
+            if not p.alive:
+                continue
+            if vis is not None and p.team != hp.team and not vis.is_visible(p.x, p.y):
+                continue
+            dot = self._dot(WHITE if p is hp else ATT_COL if p.team == "A" else DEF_COL)
+            px, py = self._to_map(p.x, p.y)
+            r = dot.get_width() // 2
+            blits.append((dot, (x + px - r, y + py - r)))
+        surf.blits(blits, doreturn=False)
+
+        bomb = game.bomb
+        if bomb.planted and bomb.location:
+            bx, by = self._to_map(*bomb.location)
+            pygame.draw.rect(surf, _BOMB, (x + bx - 2, y + by - 2, 4, 4))
+
+        # the part of the map the main view shows
+        cx, cy = self._to_map(game.camera_x, game.camera_y)
+        vw, vh = int(surf.get_width() * s), int(surf.get_height() * s)
+        view = pygame.Rect(x + cx, y + cy, vw, vh).clip((x, y, mw, mh))
+        pygame.draw.rect(surf, WHITE, view, 1)
@@ -0,0 +1,194 @@
+"""
+netstate.py
+Game state snapshots for the network: capture on the server, apply on clients
+
+capture_state() quantizes a Game into a WorldState of small-integer tuples,
+which src/codec.py delta-encodes; apply_state() turns one back into a drawable
+client-side mirror Game. snapshot_game() is the plain JSON-able form kept for
+debugging and for codec size comparisons.
+"""
+
+import math
+from src.player import Player
+from src.projectile import Projectile
+from src.config import ASSET_PATHS
+
+# fixed-point scales
+POS_SCALE = 8          # 1/8 px
+TIME_SCALE = 100       # centiseconds
+ANGLE_SCALE = 65536 / (2 * math.pi)
+
+STATES = ("TEAM_SELECT", "ROUND_INTRO", "PLAYING", "ROUND_END", "MATCH_END")
+_STATE_CODES = {s: i for i, s in enumerate(STATES)}
+TEAMS = ("A", "B")
+CHARS = tuple(ASSET_PATHS.keys())
+_CHAR_CODES = {c: i for i, c in enumerate(CHARS)}
+# projectile colors used by Player.fire; anything else maps to the last entry
+COLORS = ((60, 220, 60), (100, 100, 255), (255, 255, 255), (20, 20, 20))
+_COLOR_CODES = {c: i for i, c in enumerate(COLORS)}
+
+# player flag bits
+P_ALIVE = 1
+P_FACING_LEFT = 2
+P_HAS_BOMB = 4
+P_FLASH = 8
+
+# bomb flag bits
+B_PLANTED = 1
+B_PLANT_DONE = 2
+
+NO_PLAYER = 255
+
+class WorldState:
+    """
+    Quantized match state.
+      header: (state, round, score_a, score_b, attack_team, frozen, round_time_cs, intro_left_ms)
+      players: id -> (team, char, x, y, hp, flags, anim_frame)
+      names: id -> str
+      projectiles: id -> (x, y, angle, speed, radius, color)
+      bomb: (flags, x, y, countdown_cs, plant_cs, defuse_cs, planter, defuser)
+    """
+    __slots__ = ("tick", "header", "players", "names", "projectiles", "bomb")
+
+    def __init__(self, tick=0, header=(0,) * 8, players=None, names=None, projectiles=None,
+                 bomb=(0,) * 6 + (NO_PLAYER, NO_PLAYER)):
+        self.tick = tick
+        self.header = header
+        self.players = players if players is not None else {}
+        self.names = names if names is not None else {}
+        self.projectiles = projectiles if projectiles is not None else {}
+        self.bomb = bomb
+
+def _q16(v, scale):
+    v = int(round(v * scale))
+    return 0 if v < 0 else (65535 if v > 65535 else v)
+
+def capture_state(game):
+    """Quantize game into a WorldState."""
+    intro_left = game.intro_left_ms()
+    header = (
+        _STATE_CODES.get(game.state, 0), game.round & 0xFF,
+        game.scores["A"] & 0xFF, game.scores["B"] & 0xFF,
+        0 if game.attack_team == "A" else 1, 1 if game.frozen else 0,
+        _q16(game.round_time, TIME_SCALE), min(65535, int(intro_left)),
+    )
+
+    players = {}
+    names = {}
+    for p in game.players:
+        flags = ((P_ALIVE if p.alive else 0) | (P_FACING_LEFT if p.facing_left else 0) |
+                 (P_HAS_BOMB if p.has_bomb else 0) | (P_FLASH if p.shoot_flash > 0 else 0))
+        players[p.id] = (
+            0 if p.team == "A" else 1, _CHAR_CODES.get(p.char, 0),
+            _q16(p.x, POS_SCALE), _q16(p.y, POS_SCALE),
+            max(0, min(255, int(p.hp))), flags, p.anim_frame & 0xFF,
+        )
+        names[p.id] = p.name
+
+    projectiles = {}
+    for pr in game.projectiles:
+        if pr.life <= 0:
+            continue
+        angle = math.atan2(pr.vy, pr.vx) % (2 * math.pi)
+        projectiles[pr.id & 0xFFFF] = (
+            _q16(pr.x, POS_SCALE), _q16(pr.y, POS_SCALE),
+            int(angle * ANGLE_SCALE) & 0xFFFF, _q16(math.hypot(pr.vx, pr.vy), 1),
+            min(255, pr.radius), _COLOR_CODES.get(tuple(pr.color), len(COLORS) - 1),
+        )
+
+    b = game.bomb
+    bomb = (
+        (B_PLANTED if b.planted else 0) | (B_PLANT_DONE if b.plant_done else 0),
+        _q16(b.location[0], POS_SCALE), _q16(b.location[1], POS_SCALE),
+        _q16(b.countdown, TIME_SCALE), _q16(b.plant_progress, TIME_SCALE),
+        _q16(b.defuse_progress, TIME_SCALE),
+        b.planting_player.id if b.planting_player else NO_PLAYER,
+        b.defusing_player.id if b.defusing_player else NO_PLAYER,
+    )
+    return WorldState(game.tick, header, players, names, projectiles, bomb)
+
+def apply_state(game, state, my_name=None):
+    """Overwrite a client-side mirror Game with a decoded WorldState."""
+    (state_code, rnd, score_a, score_b, attack, frozen, round_time, intro_left) = state.header
+    game.tick = state.tick
+    game.state = STATES[state_code] if state_code < len(STATES) else "PLAYING"
+    game.round = rnd
+    game.scores["A"], game.scores["B"] = score_a, score_b
+    game.attack_team = TEAMS[attack & 1]
+    game.frozen = bool(frozen)
+    game.round_time = round_time / TIME_SCALE
+    game.intro_ends_at = game.timers.now + intro_left / 1000.0
+
+    by_id = {p.id: p for p in game.players}
+    players = []
+    for pid, (team, char, x, y, hp, flags, anim_frame) in state.players.items():
+        team = TEAMS[team & 1]
+        char = CHARS[char] if char < len(CHARS) else CHARS[0]
+        p = by_id.get(pid)
+        if p is None or p.char != char or p.team != team:
+            p = Player(0, 0, team, "", char, is_bot=True, timers=game.timers)
+            p.id = pid
+        p.name = state.names.get(pid, p.name)
+        p.x, p.y = x / POS_SCALE, y / POS_SCALE
+        p.hp = hp
+        p.alive = bool(flags & P_ALIVE)
+        p.facing_left = bool(flags & P_FACING_LEFT)
+        p.has_bomb = bool(flags & P_HAS_BOMB)
+        p.shoot_flash = 0.08 if flags & P_FLASH else 0.0
+        p.anim_frame = anim_frame
+        players.append(p)
+    game.players = players
+    game.human_player = next((p for p in players if p.name == my_name), None)
+
+    projectiles = []
+    for pid, (x, y, angle, speed, radius, color) in state.projectiles.items():
+        a = angle / ANGLE_SCALE
+        pr = Projectile(x / POS_SCALE, y / POS_SCALE, math.cos(a) * speed, math.sin(a) * speed, 0,
+                        radius=radius, color=COLORS[color] if color < len(COLORS) else COLORS[-1])
+        pr.id = pid
+        projectiles.append(pr)
+    game.projectiles = projectiles
+
+    flags, bx, by, countdown, plant, defuse, planter, defuser = state.bomb
+    bomb = game.bomb
+    bomb.planted = bool(flags & B_PLANTED)
+    bomb.plant_done = bool(flags & B_PLANT_DONE)
+    bomb.location = (bx / POS_SCALE, by / POS_SCALE)
+    bomb.countdown = countdown / TIME_SCALE
+    bomb.plant_progress = plant / TIME_SCALE
+    bomb.defuse_progress = defuse / TIME_SCALE
+    by_id = {p.id: p for p in players}
+    bomb.planting_player = by_id.get(planter)
+    bomb.defusing_player = by_id.get(defuser)
+
+    game.update_visibility()
+
+def snapshot_game(game):
+    """Plain-data view of the match, as the original JSON snapshots carried it."""
+    bomb = game.bomb
+    intro_left = game.intro_left_ms()
+    return {
+        "tick": game.tick,
+        "state": game.state,
+        "round": game.round,
+        "scores": [game.scores["A"], game.scores["B"]],
+        "attack_team": game.attack_team,
+        "round_time": round(game.round_time, 2),
+        "frozen": game.frozen,
+        "intro_left": intro_left,
+        "players": [
+            [p.id, p.name, p.team, p.char, round(p.x, 1), round(p.y, 1), p.hp, p.alive,
+             p.facing_left, p.has_bomb, p.anim_frame, p.shoot_flash > 0]
+            for p in game.players
+        ],
+        "projectiles": [
+            [pr.id, round(pr.x, 1), round(pr.y, 1), round(pr.vx, 1), round(pr.vy, 1), pr.radius, list(pr.color)]
+            for pr in game.projectiles if pr.life > 0
+        ],
+        "bomb": [
+            bomb.planted, bomb.plant_done, round(bomb.location[0], 1), round(bomb.location[1], 1),
+            round(bomb.countdown, 2), round(bomb.plant_progress, 2), round(bomb.defuse_progress, 2),
+            bomb.planting_player.id if bomb.planting_player else -1,
+            bomb.defusing_player.id if bomb.defusing_player else -1,
+        ],
+    }
@@ -0,0 +1,359 @@
+"""
+observe.py
+Ego-centric NumPy observation rasters for bots and learned agents, without pygame
+
+Observer.observe() fills one preallocated float32 array of shape
+(bots, len(CHANNELS), size, size). Each bot gets a square window of cells
+centred on its own cell. By default one cell is one tile and the window
+reaches VIEW_RADIUS tiles each way, as far as the fog does.
+
+Channels:
+  - walls, crates        from game_map; outside the map counts as wall
+  - plant_zone
+  - allies, enemies      hp / max_hp at the player's cell, the bot itself
+                         left out; enemies only while on a tile in the bot's
+                         team FOV mask (the fog rule Game.draw and the bots use)
+  - projectiles, proj_vx, proj_vy
+                         presence plus velocity / PROJECTILE_SPEED; projectiles
+                         follow the same fog rule unless a teammate fired them
+  - bomb                 the planted bomb, or whoever carries it if that
+                         player is drawn in allies/enemies (the bot included)
+The static channels are built once per map and only copied again when a
+bot moves to another cell. The dynamic ones are mostly empty, so they are
+written sparsely instead of being cut out of full-map rasters:
+  - every player has fixed entries (allies, enemies and the bomb), and
+    every projectile three per team allowed to see it; an entry's cell and
+    team are packed into one integer code
+  - each bot has a table from codes to flat indices in its window, or to a
+    trash area past the end of the buffer when the cell is outside the
+    window or on the other team; it is reset only when the bot changes cell
+  - one take over the tables gives every (bot, entry) index, one scattered
+    write fills every window, and the next write zeroes just those indices
+A call recomputes only the entries whose player or projectile changed cell,
+hp or visibility, and returns the buffer as it is when none did.
+
+    python -m src.observe
+
+benchmarks observe() against Game.step on a 5v5 bot match.
+"""
+
+import sys
+import time
+import argparse
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+from src.config import MAP_W, MAP_H, TILE, MAP_TOP
+from src.fov import VIEW_RADIUS
+
+CHANNELS = ("walls", "crates", "plant_zone", "allies", "enemies",
+            "projectiles", "proj_vx", "proj_vy", "bomb")
+WALLS, CRATES, PLANT_ZONE, ALLIES, ENEMIES, PROJECTILES, PROJ_VX, PROJ_VY, BOMB = range(len(CHANNELS))
+_STATIC = 3
+
+# fastest projectile (Player.fire), so proj_vx/proj_vy stay within [-1, 1]
+PROJECTILE_SPEED = 820.0
+
+class Observer:
+    def __init__(self, game, max_bots=None, radius=VIEW_RADIUS, cell=TILE):
+        if TILE % cell:
+            raise ValueError(f"cell must divide TILE ({TILE}), got {cell}")
+        self.game = game
+        self.radius = radius
+        self.size = 2 * radius + 1
+        self.cell = cell
+        self.w = MAP_W * TILE // cell
+        self.h = MAP_H * TILE // cell
+        n = max_bots if max_bots is not None else max(1, len(game.players))
+        block = len(CHANNELS) * self.size * self.size
+        # the buffer, then twice as much again where pairs of a bot and an
+        # entity outside its window are written (never read)
+        self._flat = np.zeros(3 * n * block, dtype=np.float32)
+        self.buffer = self._flat[:n * block].reshape(n, len(CHANNELS), self.size, self.size)
+        self._trash = n * block
+        self._block = block
+        self._build_offsets()
+        # entity codes are side * w * h + cell; the one past them is nowhere
+        self._nowhere = 2 * self.w * self.h
+        # per buffer row, the flat index each entity code lands on in that bot's window
+        self._tables = np.full((n, self._nowhere + 1), self._trash, dtype=np.intp)
+        # flat indices of the dynamic cells last written
+        self._dirty = None
+        self._map_version = None
+        self._static_windows = None
+        # per buffer row, the cell its table and static channels were last set for
+        self._static_at = [None] * n
+        # the roster last observed and its entries, see _set_roster
+        self._bots = None
+        self._default_bots = False
+        self._players = None
+        self._row_of = ()
+        # what the dynamic channels were last written from
+        self._key = None
+        self._out = self.buffer
+
+    def _build_static(self):
+        """Padded walls/crates/plant-zone rasters and the sliding-window view over them."""
+        game = self.game
+        grid = np.asarray(game.game_map, dtype=np.uint8)
+        up = TILE // self.cell
+        grid = grid.repeat(up, axis=0).repeat(up, axis=1)
+        r = self.radius
+        static = np.zeros((_STATIC, self.h + 2 * r, self.w + 2 * r), dtype=np.float32)
+        static[WALLS] = 1.0
+        static[WALLS, r:r + self.h, r:r + self.w] = grid == 1
+        static[CRATES, r:r + self.h, r:r + self.w] = grid == 2
+        zone = game.plant_zone
+        if zone:
+            x0, x1 = zone.left // self.cell, (zone.right - 1) // self.cell + 1
+            y0, y1 = (zone.top - MAP_TOP) // self.cell, (zone.bottom - 1 - MAP_TOP) // self.cell + 1
+            static[PLANT_ZONE, r + max(0, y0):r + min(self.h, y1), r + max(0, x0):r + min(self.w, x1)] = 1.0
+        self._static_windows = sliding_window_view(static, (self.size, self.size), axis=(1, 2))
+        self._map_version = game.map_version
+
+    def _build_offsets(self):
+        """
+        Window offset of every (dy, dx) from a bot's cell to an entity's, at
+        [dy + h, dx + w], or _trash outside the window. A bot's table is a
+        slice of it.
+        """
+        w, h, r, size = self.w, self.h, self.radius, self.size
+        dy, dx = np.mgrid[-h:h, -w:w]
+        inside = (abs(dx) <= r) & (abs(dy) <= r)
+        self._offsets = np.where(inside, (dy + r) * size + dx + r, self._trash).astype(np.intp)
+
+    def _set_roster(self, bots):
+        """Per-roster state: each player's row, if it is a bot, and its fixed entries."""
+        players = self.game.players
+        self._bots = list(bots)
+        self._players = players
+        rows = {bot.id: i for i, bot in enumerate(bots)}
+        self._row_of = [rows.get(p.id) for p in players]
+        # four entries per player: allies on its own side, enemies on the
+        # other and the bomb on each; then the planted bomb on each side,
+        # and the projectiles after them
+        self._shot_start = 4 * len(players) + 2
+        self._entries = self._shot_start
+        self._codes = np.full(0, self._nowhere, dtype=np.intp)
+        self._reserve(3 * 16)
+        # the state each player's entries were last set from, and the
+        # enemies code its team's fog decides on
+        self._placed = [None] * len(players)
+        self._placed_hp = [None] * len(players)
+        self._seen = [None] * len(players)
+        # every bot's table and static channels are set again on its first
+        # call; a row whose bot isn't playing stays empty
+        self._tables.fill(self._trash)
+        self._static_at = [None] * len(self.buffer)
+        self.buffer[:, :_STATIC] = 0.0
+        self._key = None
+
+    def _reserve(self, shot_entries):
+        """
+        Entry arrays with room for shot_entries after the players: codes, and
+        per buffer row the channel offsets and values, so the write needs no
+        broadcasting. Entries already set are kept.
+        """
+        start = self._shot_start
+        count = start + shot_entries
+        area = self.size * self.size
+        kept = min(len(self._codes), count)
+        codes = np.full(count, self._nowhere, dtype=np.intp)
+        codes[:kept] = self._codes[:kept]
+        channels = [ALLIES, ENEMIES, BOMB, BOMB] * len(self._row_of) + [BOMB, BOMB]
+        channels += [PROJECTILES, PROJ_VX, PROJ_VY] * (shot_entries // 3)
+        self._channels = np.repeat(np.array(channels, dtype=np.intp)[None] * area, len(self.buffer), axis=0)
+        # a bot's own allies entry is pushed into the trash, as the bot is
+        # left off that channel
+        for j, row in enumerate(self._row_of):
+            if row is not None:
+                self._channels[row, 4 * j] += self._trash
+        values = np.ones((len(self.buffer), count), dtype=np.float32)
+        if kept:
+            values[:, :kept] = self._values[:, :kept]
+        self._codes, self._values = codes, values
+
+    def _place_players(self, out, moving, masks):
+        """Entries of every player whose state changed, and tables of bots that changed cell."""
+        w, h, cell_count = self.w, self.h, self.w * self.h
+        per_tile = TILE // self.cell
+        nowhere = self._nowhere
+        codes, values, placed, seen = self._codes, self._values, self._placed, self._seen
+        placed_hp = self._placed_hp
+        static_at, static_windows = self._static_at, self._static_windows
+        for j, (p, state, row) in enumerate(zip(self._players, moving, self._row_of)):
+            if state == placed[j]:
+                continue
+            placed[j] = state
+            fx, fy, hp, alive, carrier = state
+            cx, cy = int(fx), int(fy)
+            side = 0 if p.team == "A" else 1
+            if row is not None:
+                bx = 0 if cx < 0 else w - 1 if cx >= w else cx
+                by = 0 if cy < 0 else h - 1 if cy >= h else cy
+                at = by * w + bx
+                # static channels and the table only change when a bot crosses into another cell
+                if static_at[row] != at:
+                    static_at[row] = at
+                    out[row, :_STATIC] = static_windows[:, by, bx]
+                    table = self._tables[row, side * cell_count:(side + 1) * cell_count]
+                    np.add(self._offsets[h - by:2 * h - by, w - bx:2 * w - bx], row * self._block,
+                           out=table.reshape(h, w))
+            k = 4 * j
+            if not alive or not (0 <= cx < w and 0 <= cy < h):
+                codes[k:k + 4] = nowhere
+                seen[j] = None
+                continue
+            at = cy * w + cx
+            mine, theirs = side * cell_count + at, (1 - side) * cell_count + at
+            codes[k] = mine
+            codes[k + 2] = mine if carrier else nowhere
+            spot = seen[j] = (1 - side, (cy // per_tile) * MAP_W + cx // per_tile, theirs, theirs if carrier else nowhere)
+            if masks[spot[0]][spot[1]]:
+                codes[k + 1], codes[k + 3] = spot[2], spot[3]
+            else:
+                codes[k + 1] = codes[k + 3] = nowhere
+            if hp != placed_hp[j]:
+                placed_hp[j] = hp
+                values[:, k:k + 2] = hp / p.max_hp
+
+    def _place_shots(self, shots, masks):
+        """Entries of the projectiles, for each side allowed to see them."""
+        w, h, cell_count = self.w, self.h, self.w * self.h
+        per_tile = TILE // self.cell
+        codes, values = [], []
+        for fx, fy, vx, vy, owner in shots:
+            cx, cy = int(fx), int(fy)
+            if not (0 <= cx < w and 0 <= cy < h):
+                continue
+            at = cy * w + cx
+            tile = (cy // per_tile) * MAP_W + cx // per_tile
+            team = getattr(owner, "team", None)
+            vx, vy = vx / PROJECTILE_SPEED, vy / PROJECTILE_SPEED
+            for side in (0, 1):
+                if team == "AB"[side] or masks[side][tile]:
+                    code = side * cell_count + at
+                    codes += (code, code, code)
+                    values += (1.0, vx, vy)
+        start, count = self._shot_start, len(codes)
+        if start + count > len(self._codes):
+            self._reserve(max(count, 2 * (len(self._codes) - start)))
+        if count:
+            self._codes[start:start + count] = codes
+            self._values[:, start:start + count] = values
+        self._entries = start + count
+
+    def observe(self, bots=None):
+        """
+        Rasters for bots (players of this game; default: all its bots) as a
+        view of the shared buffer, one row per bot in order.
+        """
+        game = self.game
+        players = game.players
+        same_players = players is self._players and len(players) == len(self._row_of)
+        if bots is None:
+            # the same players list has the same bots
+            bots = self._bots if same_players and self._default_bots else [p for p in players if p.is_bot]
+            self._default_bots = True
+        else:
+            self._default_bots = False
+        n = len(bots)
+        if n > len(self.buffer):
+            raise ValueError(f"{n} bots but the buffer holds {len(self.buffer)}")
+        # every player is placed again on a new map, for the static channels
+        new_map = self._map_version != game.map_version
+        if new_map:
+            self._build_static()
+        if new_map or not same_players or (bots is not self._bots and bots != self._bots):
+            self._set_roster(bots)
+        out = self._out
+        if len(out) != n:
+            out = self._out = self.buffer[:n]
+        if n == 0:
+            return out
+
+        cell = self.cell
+        vis_a, vis_b = game.visibility["A"], game.visibility["B"]
+        bomb = game.bomb
+        # everything the rasters depend on, cell positions left as floats
+        # (int() is the slow part); most ticks nothing crosses a cell
+        # boundary and the buffer already holds the answer
+        moving = [(p.x // cell, (p.y - MAP_TOP) // cell, p.hp, p.alive, p.has_bomb) for p in players]
+        shots = [(pr.x // cell, (pr.y - MAP_TOP) // cell, pr.vx, pr.vy, pr.owner)
+                 for pr in game.projectiles if pr.life > 0 and not pr.is_melee]
+        fog = (vis_a, vis_a.version, vis_b, vis_b.version)
+        planted = bomb.planted and bomb.location
+        key = (moving, shots, fog, planted)
+        last = self._key
+        if key == last:
+            return out
+        self._key = key
+
+        flat, tables = self._flat, self._tables[:n]
+        masks = (vis_a.mask, vis_b.mask)
+        fog_changed = last is None or fog != last[2]
+        if fog_changed or moving != last[0] or planted != last[3]:
+            self._place_players(out, moving, masks)
+            codes, nowhere = self._codes, self._nowhere
+            if fog_changed:
+                # the enemies and bomb entries on the other side, where its fog allows
+                for k, spot in enumerate(self._seen):
+                    if spot is not None and masks[spot[0]][spot[1]]:
+                        codes[4 * k + 1], codes[4 * k + 3] = spot[2], spot[3]
+                    else:
+                        codes[4 * k + 1] = codes[4 * k + 3] = nowhere
+            end = self._shot_start
+            codes[end - 2] = codes[end - 1] = nowhere
+            if planted:
+                cx, cy = int(planted[0] // cell), int((planted[1] - MAP_TOP) // cell)
+                if 0 <= cx < self.w and 0 <= cy < self.h:
+                    codes[end - 2], codes[end - 1] = cy * self.w + cx, (cy + self.h) * self.w + cx
+        if fog_changed or shots != last[1]:
+            self._place_shots(shots, masks)
+        # every (bot, entry) pair at once; pairs that don't meet land in the trash
+        if self._dirty is not None:
+            flat[self._dirty] = 0.0
+        m = self._entries
+        idx = tables.take(self._codes[:m], axis=1)
+        idx += self._channels[:n, :m]
+        flat[idx] = self._values[:n, :m]
+        self._dirty = idx
+        return out
+
+def _benchmark(seconds, seed, radius):
+    from src.server import init_headless
+    from src.map import generate_map, default_plant_zone
+    from src.game import Game
+    init_headless()
+    game = Game(generate_map(seed), default_plant_zone(), {}, {})
+    chars = ("Knight", "Ranger", "Wizard", "Ranger", "Wizard")
+    roster = [(f"Bot-{t}{i + 1}", t, chars[i], True) for t in ("A", "B") for i in range(5)]
+    game.create_players(roster)
+    observer = Observer(game, radius=radius)
+    dt = 1.0 / 60
+    step_s = obs_s = 0.0
+    steps = int(seconds * 60)
+    entities = 0
+    for _ in range(steps):
+        t = time.perf_counter()
+        game.step(dt, {})
+        step_s += time.perf_counter() - t
+        t = time.perf_counter()
+        obs = observer.observe()
+        obs_s += time.perf_counter() - t
+        entities += len(game.projectiles)
+    print(f"{steps} ticks, {len(obs)} bots, rasters {obs.shape[1:]} "
+          f"({obs.nbytes / 1024:.0f} KiB), {entities / steps:.1f} projectiles on average")
+    print(f"  Game.step  {step_s / steps * 1e6:7.1f} us/tick")
+    print(f"  observe()  {obs_s / steps * 1e6:7.1f} us/tick ({obs_s / step_s:.0%} of a step)")
+    return 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark observation rasters against the simulation")
+    parser.add_argument("--seconds", type=float, default=60.0, help="simulated match time")
+    parser.add_argument("--map-seed", type=int)
+    parser.add_argument("--radius", type=int, default=VIEW_RADIUS, help="cells from the bot to the window edge")
+    args = parser.parse_args(argv)
+    return _benchmark(args.seconds, args.map_seed, args.radius)
+
+if __name__ == "__main__":
+    sys.exit(main())
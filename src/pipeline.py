@@ -0,0 +1,137 @@
+"""
+pipeline.py
+Pipelined mode: simulation on a worker thread, rendering on the main thread
+
+SimulationThread owns the authoritative Game and steps it at a fixed rate.
+After every step it captures an immutable WorldState (tuples of fixed-point
+ints, see netstate) and publishes it, together with the previous one, as a
+single tuple swapped in by reference. The render thread never touches the
+simulated Game: each frame it takes the newest pair, interpolates between
+them for a render time one tick in the past, and applies the result to its
+own mirror Game, the same way a network client does.
+
+Python-level simulation still holds the GIL, but pygame's blits, fills and
+display flip release it. On a multi-core machine most of the frame's drawing
+therefore overlaps the next simulation step. A worker process with shared
+memory would overlap more, but it would need the whole Game picklable, so
+a thread is used.
+"""
+
+import time
+import threading
+import traceback
+from src.netstate import WorldState, capture_state
+from src.log import LOG
+
+class SimulationThread:
+    def __init__(self, game, tick_rate=60, player_name=None):
+        self.game = game
+        self.tick_rate = tick_rate
+        self.dt = 1.0 / tick_rate
+        self.player_name = player_name
+        # (previous state, its publish time, newest state, its publish time)
+        self._published = None
+        self._controls = {}
+        self._fire = False
+        self._action = False
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+        self.step_ms = 0.0
+        self.dropped_ticks = 0
+
+    def start(self):
+        self._publish()
+        self._thread = threading.Thread(target=self._run, name="simulation", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+
+    def submit_input(self, controls):
+        """Latest controls from the render thread; fire and action latch until a step consumes them."""
+        with self._lock:
+            self._controls = controls
+            self._fire = self._fire or bool(controls.get("fire"))
+            self._action = self._action or bool(controls.get("action"))
+
+    def _take_input(self):
+        with self._lock:
+            controls = dict(self._controls)
+            controls["fire"] = self._fire or bool(controls.get("fire"))
+            controls["action"] = self._action or bool(controls.get("action"))
+            self._fire = self._action = False
+        return controls
+
+    def _publish(self):
+        state = capture_state(self.game)
+        now = time.perf_counter()
+        prev = self._published
+        if prev is None:
+            self._published = (state, now, state, now)
+        else:
+            self._published = (prev[2], prev[3], state, now)
+
+    def _run(self):
+        next_t = time.perf_counter()
+        inputs = {}
+        try:
+            while not self._stop.is_set():
+                next_t += self.dt
+                start = time.perf_counter()
+                inputs.clear()
+                if self.player_name is not None:
+                    inputs[self.player_name] = self._take_input()
+                self.game.step(self.dt, inputs)
+                self._publish()
+                self.step_ms = (time.perf_counter() - start) * 1000.0
+                delay = next_t - time.perf_counter()
+                if delay > 0:
+                    time.sleep(delay)
+                else:
+                    missed = int(-delay // self.dt)
+                    if missed:
+                        self.dropped_ticks += missed
+                        next_t += missed * self.dt
+        except Exception:
+            LOG.error("main", "simulation thread crashed\n%s", traceback.format_exc())
+            raise
+
+    def render_state(self, now=None):
+        """Newest two states interpolated for one tick before now."""
+        prev, prev_t, cur, cur_t = self._published
+        if now is None:
+            now = time.perf_counter()
+        span = cur_t - prev_t
+        alpha = 1.0 if span <= 0 else (now - self.dt - prev_t) / span
+        return interpolate_state(prev, cur, alpha)
+
+def _lerp_entities(prev, cur, alpha, xi, yi):
+    out = {}
+    for eid, c in cur.items():
+        p = prev.get(eid)
+        if p is None or p == c:
+            out[eid] = c
+            continue
+        vals = list(c)
+        vals[xi] = int(p[xi] + (c[xi] - p[xi]) * alpha)
+        vals[yi] = int(p[yi] + (c[yi] - p[yi]) * alpha)
+        out[eid] = tuple(vals)
+    return out
+
+def interpolate_state(prev, cur, alpha):
+    """
+    WorldState between prev and cur: positions blend by alpha (clamped to
+    0..1) and everything else comes from cur.
+    """
+    if alpha >= 1.0 or prev is cur:
+        return cur
+    if alpha < 0.0:
+        alpha = 0.0
+    return WorldState(cur.tick, cur.header,
+                      _lerp_entities(prev.players, cur.players, alpha, 2, 3),
+                      cur.names,
+                      _lerp_entities(prev.projectiles, cur.projectiles, alpha, 0, 1),
+                      cur.bomb)
@@ -8,12 +8,19 @@ import math
 import random
 from pygame import Surface
 from src.projectile import Projectile
-from src.utils import is_solid, tint_surface
-from src.config import (SPRITE_SIZE, ATT_COL, DEF_COL, UI_BG_DARK,
+from src.utils import tint_surface
+from src.render import LAYER_PLAYERS, LAYER_OVERLAY
+from src.timers import Scheduler
+from src.telemetry import SINK
+from src.config import (BOT_WALL_MARGIN, BOT_STUCK_TIME, BOT_FOLLOW_TIME, SPRITE_SIZE, ATT_COL, DEF_COL, UI_BG_DARK,
                     SUCCESS_LIGHT, YELLOW, DANGER_LIGHT, WHITE)
 
 class Player:
-    def __init__(self, x: float, y: float, team: str, name: str, char: str, is_bot: bool = False):
+    def __init__(self, x: float, y: float, team: str, name: str, char: str, is_bot: bool = False,
+                 timers: Scheduler = None):
+        self.id = 0  # index in Game.players, assigned by create_players
+        # the owning Game's scheduler; cooldowns below are deadlines on its clock
+        self.timers = timers if timers is not None else Scheduler()
         self.x = x
         self.y = y
         self.team = team
@@ -25,11 +32,16 @@ class Player:
         self.alive = True
         self.speed = 140 if self.char != "Knight" else 120
         self.radius = 14
+        # which way a bot turns when it walks straight into a wall, +1 or -1
+        self.slide_side = 1
+        self.follow_until = 0.0
+        self._progress_at = 0.0
+        self._progress_pos = (x, y)
         self.facing_left = False
         self.anim_timer = 0.0
         self.anim_frame = 0
         self.anim_speed = 6.0
-        self.shoot_flash = 0.0
+        self.flash_until = 0.0
 
         # class-specific
         if self.char == "Knight":
@@ -37,7 +49,7 @@ class Player:
             self.attack_range = 80
             self.attack_arc = 90
             self.swing_duration = 0.2
-            self.swing_timer = 0.0
+            self.swing_until = 0.0
         elif self.char == "Ranger":
             self.fire_cooldown = 0.35
             self.attack_range = 900
@@ -49,14 +61,49 @@ class Player:
             self.burst_spread = 0.2
             self.burst_delay = 0.1
             self.remaining_burst = 0
-            self.burst_timer = 0.0
+        self._burst_shots = []
 
-        self.fire_timer = 0.0
+        self.fire_ready_at = 0.0
+        # how far behind the server this player's client was when it last fired (lagcomp)
+        self.rewind = 0
         self.kills = 0
         self.has_bomb = False
-        self.attack_frame = 0
         self.attack_effect = None
 
+    # remaining-time views of the deadlines, for code that thinks in countdowns
+    @property
+    def fire_timer(self):
+        return self.timers.remaining(self.fire_ready_at)
+
+    @fire_timer.setter
+    def fire_timer(self, seconds):
+        self.fire_ready_at = self.timers.now + seconds
+
+    @property
+    def shoot_flash(self):
+        return self.timers.remaining(self.flash_until)
+
+    @shoot_flash.setter
+    def shoot_flash(self, seconds):
+        self.flash_until = self.timers.now + seconds
+
+    @property
+    def swing_timer(self):
+        return self.timers.remaining(getattr(self, "swing_until", 0.0))
+
+    @property
+    def attack_frame(self):
+        """Knight swing animation frame, 0-2."""
+        left = self.swing_timer
+        return int((1 - left / self.swing_duration) * 3) if left > 0 else 0
+
+    def cancel_timers(self):
+        """Drop pending burst shots, e.g. when the round is reset."""
+        for timer in self._burst_shots:
+            self.timers.cancel(timer)
+        self._burst_shots = []
+        self.remaining_burst = 0
+
     def update(self, dt: float, controls: dict, game, frozen: bool = False):
         if not self.alive:
             return
@@ -66,19 +113,6 @@ class Player:
         if frames:
             self.anim_frame = int(self.anim_timer * self.anim_speed) % len(frames)
 
-        self.fire_timer = max(0.0, self.fire_timer - dt)
-        self.shoot_flash = max(0.0, self.shoot_flash - dt)
-
-        if self.char == "Knight":
-            self.swing_timer = max(0.0, getattr(self, "swing_timer", 0.0) - dt)
-            if self.swing_timer > 0:
-                self.attack_frame = int((1 - self.swing_timer / self.swing_duration) * 3)
-            else:
-                self.attack_effect = None
-        elif self.char == "Wizard":
-            if getattr(self, "remaining_burst", 0) > 0:
-                self.burst_timer = max(0.0, getattr(self, "burst_timer", 0.0) - dt)
-
         if frozen:
             return
 
@@ -92,9 +126,10 @@ class Player:
                 move_speed = self.speed * dt
                 dx *= move_speed
                 dy *= move_speed
-                if not is_solid(self.x + dx, self.y, self.radius, game.game_map):
+                field = game.clearance
+                if not field.blocked(self.x + dx, self.y, self.radius):
                     self.x += dx
-                if not is_solid(self.x, self.y + dy, self.radius, game.game_map):
+                if not field.blocked(self.x, self.y + dy, self.radius):
                     self.y += dy
                 if dx != 0:
                     self.facing_left = dx < 0
@@ -102,33 +137,82 @@ class Player:
             self.bot_behavior(dt, game)
 
     def bot_behavior(self, dt, game):
+        # prefer enemies the team can see; otherwise keep closing on the nearest one
+        vis = game.visibility.get(self.team)
         target = None
+        target_visible = False
         min_dist = float('inf')
         for p in game.players:
             if p.team != self.team and p.alive:
+                visible = vis is None or vis.is_visible(p.x, p.y)
+                if target_visible and not visible:
+                    continue
                 dist = math.hypot(p.x - self.x, p.y - self.y)
-                if dist < min_dist:
+                if dist < min_dist or (visible and not target_visible):
                     min_dist = dist
                     target = p
+                    target_visible = visible
         if not target:
             return
         vx, vy = target.x - self.x, target.y - self.y
         dist = math.hypot(vx, vy) or 1.0
-        if dist > 120:
+        # hold at range only with a clear shot; otherwise keep working around cover
+        if dist > 120 or not target_visible:
             dx = vx / dist
             dy = vy / dist
+            field = game.clearance
+            near_wall = field.clearance(self.x, self.y) < self.radius + BOT_WALL_MARGIN
+            if near_wall or self.timers.now < self.follow_until:
+                dx, dy = self._slide(dx, dy, field)
             nx = self.x + dx * self.speed * dt * 0.8
             ny = self.y + dy * self.speed * dt * 0.8
-            if not is_solid(nx, self.y, self.radius, game.game_map):
+            if not field.blocked(nx, self.y, self.radius):
                 self.x = nx
-            if not is_solid(self.x, ny, self.radius, game.game_map):
+            if not field.blocked(self.x, ny, self.radius):
                 self.y = ny
             self.facing_left = dx < 0
-        if self.fire_timer <= 0 and dist < getattr(self, "attack_range", 400):
+            self._check_progress(vx / dist, vy / dist, field)
+        if target_visible and self.fire_timer <= 0 and dist < getattr(self, "attack_range", 400):
             aim_x = target.x + random.uniform(-18, 18)
             aim_y = target.y + random.uniform(-18, 18)
             self.fire(game.projectiles, (aim_x, aim_y))
 
+    def _slide(self, dx, dy, field):
+        """Steer (dx, dy) along the nearest wall instead of into it."""
+        gx, gy = field.gradient(self.x, self.y)
+        if self.timers.now < self.follow_until and (gx or gy):
+            return -gy * self.slide_side, gx * self.slide_side
+        into = dx * gx + dy * gy
+        if into >= 0:
+            return dx, dy
+        # drop the part of the move that points into the wall
+        dx -= into * gx
+        dy -= into * gy
+        n = math.hypot(dx, dy)
+        if n < 0.2:
+            # nearly head-on: follow the wall
+            return -gy * self.slide_side, gx * self.slide_side
+        return dx / n, dy / n
+
+    def _check_progress(self, dx, dy, field):
+        """Every BOT_STUCK_TIME, switch to following the wall if the bot hardly moved."""
+        now = self.timers.now
+        if now < self._progress_at:
+            return
+        px, py = self._progress_pos
+        self._progress_at = now + BOT_STUCK_TIME
+        self._progress_pos = (self.x, self.y)
+        if abs(self.x - px) + abs(self.y - py) > self.radius:
+            return
+        gx, gy = field.gradient(self.x, self.y)
+        if now < self.follow_until:
+            # following one way got stuck too; try the other
+            self.slide_side = -self.slide_side
+        else:
+            # start on the side that leads towards the target
+            self.slide_side = 1 if dx * -gy + dy * gx >= 0 else -1
+        self.follow_until = now + BOT_FOLLOW_TIME
+
     def take_damage(self, amt, attacker=None):
         if not self.alive:
             return
@@ -137,6 +221,9 @@ class Player:
             self.alive = False
             if attacker and attacker is not self and attacker.alive:
                 attacker.kills += 1
+                SINK.death(self, attacker)
+            else:
+                SINK.death(self)
 
     def fire(self, projectile_list, target):
         if self.fire_timer > 0:
@@ -149,8 +236,7 @@ class Player:
             if d > self.attack_range:
                 return False
             self.fire_timer = self.fire_cooldown
-            self.swing_timer = self.swing_duration
-            self.attack_frame = 0
+            self.swing_until = self.timers.now + self.swing_duration
             half_arc = math.radians(self.attack_arc / 2)
             start_angle = base_angle - half_arc
             hit_points = 8
@@ -173,31 +259,38 @@ class Player:
                 self.x, self.y, vx, vy, 22, owner=self,
                 color=(60, 220, 60), radius=4
             ))
-        else:  # Wizard - burst
-            if getattr(self, "remaining_burst", 0) <= 0:
-                self.fire_timer = self.fire_cooldown
-                self.remaining_burst = self.burst_count
-                self.burst_timer = 0
-            if getattr(self, "burst_timer", 0) <= 0 and self.remaining_burst > 0:
-                spread_angle = base_angle + random.uniform(-self.burst_spread, self.burst_spread)
-                speed = 520.0
-                vx, vy = math.cos(spread_angle) * speed, math.sin(spread_angle) * speed
-                projectile_list.append(Projectile(
-                    self.x, self.y, vx, vy, 30, owner=self,
-                    color=(100, 100, 255), radius=8,
-                    life=1.5
-                ))
-                self.remaining_burst -= 1
-                self.burst_timer = self.burst_delay
+        else:  # Wizard - burst: first shot now, the rest scheduled burst_delay apart
+            self.fire_timer = self.fire_cooldown
+            self.cancel_timers()
+            self.remaining_burst = self.burst_count
+            self._burst_shot(projectile_list, target)
+            self._burst_shots = [
+                self.timers.call_later(self.burst_delay * i, self._burst_shot, projectile_list, target)
+                for i in range(1, self.burst_count)
+            ]
 
         self.shoot_flash = 0.08
+        SINK.fire(self)
         return True
 
-    def draw(self, surf, anim_frames, cam_x=0, cam_y=0):
+    def _burst_shot(self, projectile_list, target):
+        if not self.alive or self.remaining_burst <= 0:
+            return
+        base_angle = math.atan2(target[1] - self.y, target[0] - self.x)
+        spread_angle = base_angle + random.uniform(-self.burst_spread, self.burst_spread)
+        speed = 520.0
+        vx, vy = math.cos(spread_angle) * speed, math.sin(spread_angle) * speed
+        projectile_list.append(Projectile(
+            self.x, self.y, vx, vy, 30, owner=self,
+            color=(100, 100, 255), radius=8,
+            life=1.5
+        ))
+        self.remaining_burst -= 1
+        self.shoot_flash = 0.08
+
+    def draw(self, queue, anim_frames):
         frames = anim_frames.get(self.char)
-        screen_x = int(self.x - cam_x)
-        screen_y = int(self.y - cam_y)
-        
+
         if frames:
             frame = frames[self.anim_frame % len(frames)]
             img = pygame.transform.flip(frame, self.facing_left, False) if self.facing_left else frame
@@ -208,13 +301,18 @@ class Player:
                     img = tint_surface(img, (120, 120, 255), alpha=90)
                 else:
                     img = tint_surface(img, (255, 230, 180), alpha=90)
-            rect = img.get_rect(center=(screen_x, screen_y))
-            surf.blit(img, rect)
+            pos = queue.push(LAYER_PLAYERS, img, self.x, self.y)
         else:
             col = ATT_COL if self.team == "A" else DEF_COL
-            pygame.draw.circle(surf, col, (screen_x, screen_y), self.radius)
-            if self.shoot_flash > 0:
-                pygame.draw.circle(surf, (255, 220, 180), (screen_x, screen_y), self.radius, 2)
+            pos = queue.push_circle(LAYER_PLAYERS, col, self.radius, self.x, self.y)
+        if pos is None:
+            return
+        queue.push_overlay(LAYER_OVERLAY, self.draw_overlay, pos[0], pos[1], bool(frames))
+
+    def draw_overlay(self, surf, screen_x, screen_y, has_sprite=True):
+        """Health bar, flash ring and bomb indicator, in screen coordinates."""
+        if not has_sprite and self.shoot_flash > 0:
+            pygame.draw.circle(surf, (255, 220, 180), (screen_x, screen_y), self.radius, 2)
 
         # Health bar
         hp_ratio = max(0, self.hp) / self.max_hp
@@ -5,11 +5,15 @@ Projectile entity
 
 import pygame
 import math
-from src.utils import is_solid
+import itertools
+from src.render import LAYER_PROJECTILES
 from src.config import MAP_W, MAP_H, TILE, MAP_TOP
 
+_next_id = itertools.count(1)
+
 class Projectile:
     def __init__(self, x, y, vx, vy, dmg, owner=None, life=2.0, radius=4, color=(20, 20, 20), is_melee=False):
+        self.id = next(_next_id)  # stable identity for network deltas
         self.x, self.y, self.vx, self.vy = x, y, vx, vy
         self.dmg = dmg
         self.owner = owner
@@ -18,6 +22,9 @@ class Projectile:
         self.color = color
         self.is_melee = is_melee
         self.has_hit = False
+        self.stamp = None  # cached circle stamp, see render.push_circles
+        # ticks to rewind targets by, inherited from the shooter; see lagcomp
+        self.rewind = getattr(owner, "rewind", 0)
 
     def update(self, dt, game):
         if not self.is_melee:
@@ -27,27 +34,31 @@ class Projectile:
         self.life -= dt
 
         # check collision with level geometry
-        if not self.is_melee and is_solid(self.x, self.y, game_map=game.game_map):
+        if not self.is_melee and game.clearance.blocked(self.x, self.y):
             self.life = -1
             return
 
         if self.has_hit:
             return
 
-        # check collision with players
+        # check collision with players, as the shooter saw them if lag compensated
+        history = game.history
+        row = history.rewind(game.tick - self.rewind) if self.rewind and history is not None else -1
         for p in game.players:
             if not p.alive or p is self.owner:
                 continue
-            if math.hypot(p.x - self.x, p.y - self.y) <= p.radius + self.radius:
+            if row >= 0 and p.id < history.max_players:
+                px, py = history.xs[row + p.id], history.ys[row + p.id]
+            else:
+                px, py = p.x, p.y
+            if math.hypot(px - self.x, py - self.y) <= p.radius + self.radius:
                 p.take_damage(self.dmg, attacker=self.owner)
                 if not self.is_melee:
                     self.life = -1
                 self.has_hit = True
                 return
 
-    def draw(self, surf, cam_x=0, cam_y=0):
+    def draw(self, queue):
         if self.life <= 0:
             return
-        screen_x = int(self.x - cam_x)
-        screen_y = int(self.y - cam_y)
-        pygame.draw.circle(surf, self.color, (screen_x, screen_y), self.radius)
\ No newline at end of file
+        queue.push_circle(LAYER_PROJECTILES, self.color, self.radius, self.x, self.y)
\ No newline at end of file
@@ -0,0 +1,77 @@
+"""
+protocol.py
+Wire format shared by the game server and clients
+
+Every datagram (or TCP frame) starts with a one-byte message type followed by
+a JSON payload, except snapshots, which carry the binary body from
+src/codec.py. Over TCP each message is prefixed by its length as a
+big-endian uint32.
+"""
+
+import json
+import struct
+
+DEFAULT_PORT = 47800
+
+# client -> server
+MSG_JOIN = 1
+MSG_INPUT = 2
+MSG_LEAVE = 3
+MSG_STATS = 4
+MSG_SPECTATE = 5
+
+# server -> client
+MSG_WELCOME = 10
+MSG_SNAPSHOT = 11
+MSG_STATS_REPLY = 12
+MSG_ERROR = 13
+
+# payload passed through as raw bytes rather than JSON
+BINARY_TYPES = frozenset((MSG_SNAPSHOT,))
+
+FRAME_HEADER = struct.Struct(">I")
+MAX_FRAME = 1 << 20
+
+def encode(msg_type, payload=None):
+    if msg_type in BINARY_TYPES:
+        return bytes((msg_type,)) + payload
+    body = json.dumps(payload, separators=(",", ":")).encode("utf-8") if payload is not None else b""
+    return bytes((msg_type,)) + body
+
+def decode(data):
+    """Return (msg_type, payload) or (None, None) for malformed data."""
+    if not data:
+        return None, None
+    msg_type = data[0]
+    if msg_type in BINARY_TYPES:
+        return msg_type, data[1:]
+    if len(data) == 1:
+        return msg_type, None
+    try:
+        return msg_type, json.loads(data[1:].decode("utf-8"))
+    except (UnicodeDecodeError, ValueError):
+        return None, None
+
+def frame(data):
+    """Length-prefix a message for a stream transport."""
+    return FRAME_HEADER.pack(len(data)) + data
+
+class FrameReader:
+    """Reassembles length-prefixed messages from arbitrary stream chunks."""
+
+    def __init__(self):
+        self._buf = bytearray()
+
+    def feed(self, chunk):
+        self._buf += chunk
+        out = []
+        while len(self._buf) >= FRAME_HEADER.size:
+            (size,) = FRAME_HEADER.unpack_from(self._buf)
+            if size > MAX_FRAME:
+                raise ValueError(f"frame too large: {size}")
+            end = FRAME_HEADER.size + size
+            if len(self._buf) < end:
+                break
+            out.append(bytes(self._buf[FRAME_HEADER.size:end]))
+            del self._buf[:end]
+        return out
@@ -0,0 +1,131 @@
+"""
+render.py
+Culled, layer-sorted render queue for world entities
+"""
+
+import pygame
+from pygame import Surface
+
+# draw order, lowest first
+LAYER_PROJECTILES = 10
+LAYER_PLAYERS = 20
+LAYER_OVERLAY = 30
+
+_STAMP_KEY = (255, 0, 255)
+_circle_stamps = {}
+
+def get_circle_stamp(color, radius):
+    """Return a cached pre-rendered circle surface for (color, radius)."""
+    key = (color, radius)
+    stamp = _circle_stamps.get(key)
+    if stamp is None:
+        size = radius * 2 + 1
+        # colorkeyed + RLE blits much faster than a per-pixel alpha surface
+        stamp = Surface((size, size))
+        stamp.fill(_STAMP_KEY)
+        pygame.draw.circle(stamp, color, (radius, radius), radius)
+        stamp.set_colorkey(_STAMP_KEY, pygame.RLEACCEL)
+        if pygame.display.get_surface() is not None:
+            stamp = stamp.convert()
+        _circle_stamps[key] = stamp
+    return stamp
+
+class RenderQueue:
+    """
+    Collects draw requests for one frame in world coordinates.
+    Items outside the camera rect are dropped on submission; flush() sorts
+    the remainder by layer and issues one Surface.blits call per layer,
+    followed by that layer's overlay callbacks.
+    """
+
+    def __init__(self):
+        self.cam_x = 0
+        self.cam_y = 0
+        self.view = pygame.Rect(0, 0, 0, 0)
+        self._layers = {}
+        self.submitted = 0
+        self.culled = 0
+
+    def begin(self, cam_x, cam_y, view_w, view_h):
+        self.cam_x = cam_x
+        self.cam_y = cam_y
+        self.view.update(cam_x, cam_y, view_w, view_h)
+        self._layers.clear()
+        self.submitted = 0
+        self.culled = 0
+
+    def _bucket(self, layer):
+        bucket = self._layers.get(layer)
+        if bucket is None:
+            bucket = ([], [])
+            self._layers[layer] = bucket
+        return bucket
+
+    def _visible(self, x, y, half_w, half_h):
+        v = self.view
+        self.submitted += 1
+        if (x + half_w < v.left or x - half_w > v.right or
+                y + half_h < v.top or y - half_h > v.bottom):
+            self.culled += 1
+            return False
+        return True
+
+    def push(self, layer, image, x, y):
+        """Queue image centred on world point (x, y). Returns the screen pos or None if culled."""
+        w, h = image.get_size()
+        if not self._visible(x, y, w // 2, h // 2):
+            return None
+        sx = int(x - self.cam_x)
+        sy = int(y - self.cam_y)
+        self._bucket(layer)[0].append((image, (sx - w // 2, sy - h // 2)))
+        return sx, sy
+
+    def push_circle(self, layer, color, radius, x, y):
+        """Queue a filled circle drawn from a cached stamp."""
+        if not self._visible(x, y, radius, radius):
+            return None
+        stamp = _circle_stamps.get((color, radius)) or get_circle_stamp(color, radius)
+        sx = int(x - self.cam_x)
+        sy = int(y - self.cam_y)
+        self._bucket(layer)[0].append((stamp, (sx - radius, sy - radius)))
+        return sx, sy
+
+    def push_circles(self, layer, items):
+        """
+        Bulk variant of push_circle for objects exposing x, y, radius, color,
+        life and a stamp slot (filled in lazily). Inlined to keep per-item overhead low for large counts.
+        """
+        v = self.view
+        left, top, right, bottom = v.left, v.top, v.right, v.bottom
+        cam_x, cam_y = self.cam_x, self.cam_y
+        stamps = _circle_stamps
+        out = self._bucket(layer)[0]
+        append = out.append
+        before = len(out)
+        n = 0
+        for it in items:
+            if it.life <= 0:
+                continue
+            n += 1
+            x, y, r = it.x, it.y, it.radius
+            if x + r < left or x - r > right or y + r < top or y - r > bottom:
+                continue
+            stamp = it.stamp
+            if stamp is None:
+                stamp = it.stamp = stamps.get((it.color, r)) or get_circle_stamp(it.color, r)
+            append((stamp, (int(x - cam_x) - r, int(y - cam_y) - r)))
+        self.submitted += n
+        self.culled += n - (len(out) - before)
+
+    def push_overlay(self, layer, fn, *args):
+        """Queue a callback fn(surf, *args) run after the layer's sprites."""
+        self._bucket(layer)[1].append((fn, args))
+
+    def flush(self, surf):
+        for layer in sorted(self._layers):
+            blits, overlays = self._layers[layer]
+            if blits:
+                surf.blits(blits, doreturn=False)
+            for fn, args in overlays:
+                fn(surf, *args)
+        self._layers.clear()
@@ -0,0 +1,701 @@
+"""
+server.py
+Authoritative asyncio game server hosting many matches in one process
+
+Each Match owns a headless Game that ticks at a fixed rate on the shared event
+loop. Clients send inputs, which are queued per client and drained once per
+tick; every few ticks the match broadcasts a state snapshot. Human players
+take over bot slots, so a match always runs with full teams. Spectators get
+one unfiltered stream per match, encoded once and sent to all of them
+(see spectate.py).
+
+Run a dedicated server with:  python -m src.server --matches 8
+
+--workers N spreads the matches over N processes, worker i listening on
+port + i. The parent builds the map and its derived tables once and shares
+them read-only (see sharedmaps.py).
+"""
+
+import os
+import sys
+import math
+import time
+import random
+import signal
+import asyncio
+import argparse
+import threading
+import traceback
+from collections import deque
+import pygame
+from src import protocol
+from src.protocol import (MSG_JOIN, MSG_INPUT, MSG_LEAVE, MSG_STATS, MSG_SPECTATE, MSG_WELCOME,
+                          MSG_SNAPSHOT, MSG_STATS_REPLY, MSG_ERROR)
+from src.config import ASSET_PATHS
+from src.map import generate_map, default_plant_zone
+from src.game import Game
+from src.netstate import capture_state
+from src import codec
+from src import telemetry
+from src import sharedmaps
+from src.interest import InterestManager, clamp_view
+from src.spectate import SpectatorFeed
+from src.lagcomp import PositionHistory
+from src.log import LOG
+
+CLIENT_TIMEOUT = 10.0
+METRICS_INTERVAL = 10.0
+# states kept per client as potential delta baselines (about 2s at 30 Hz)
+BASELINE_HISTORY = 64
+
+def _percentile(sorted_values, q):
+    if not sorted_values:
+        return 0.0
+    i = min(len(sorted_values) - 1, int(round(q * (len(sorted_values) - 1))))
+    return sorted_values[i]
+
+def _bot_name(team, index):
+    return f"Bot-{team}{index + 1}"
+
+_BUTTONS = ("up", "down", "left", "right", "fire", "action")
+
+def _int_field(value):
+    """value if it is a plain int (not a bool), else None."""
+    return value if isinstance(value, int) and not isinstance(value, bool) else None
+
+def _clean_input(payload):
+    """
+    A client's input message as a controls dict Game.step can trust, or None
+    if anything in it is malformed: buttons become bools, aim a pair of
+    finite floats, seq (required), ack and view ints.
+    """
+    seq = _int_field(payload.get("seq"))
+    if seq is None:
+        return None
+    clean = {key: bool(payload.get(key)) for key in _BUTTONS}
+    clean["seq"] = seq
+    for key in ("ack", "view"):
+        if key in payload:
+            value = _int_field(payload[key])
+            if value is None:
+                return None
+            clean[key] = value
+    aim = payload.get("aim")
+    if aim is not None:
+        if not isinstance(aim, (list, tuple)) or len(aim) != 2:
+            return None
+        try:
+            x, y = float(aim[0]), float(aim[1])
+        except (TypeError, ValueError):
+            return None
+        if not (math.isfinite(x) and math.isfinite(y)):
+            return None
+        clean["aim"] = (x, y)
+    return clean
+
+def _host(key):
+    """The address part of a client key ((host, port, ...) for UDP and TCP peers)."""
+    return key[0] if isinstance(key, tuple) else key
+
+def _match_field(payload):
+    """(ok, wanted match id or None): a requested match must be an int."""
+    wanted = payload.get("match")
+    return wanted is None or _int_field(wanted) is not None, wanted
+
+class ClientSlot:
+    def __init__(self, key, send, name, match):
+        self.key = key
+        self.send_raw = send
+        self.name = name
+        self.match = match
+        self.player_name = name
+        self.inputs = deque(maxlen=32)
+        self.controls = {}
+        self.last_seen = time.monotonic()
+        self.last_seq = -1
+        self.ack_tick = -1
+        # canvas size the client renders at, which bounds what interest sends it
+        self.view_size = clamp_view(None)
+        self.bytes_out = 0
+        # tick -> WorldState sent to this client, oldest first
+        self.sent = {}
+
+    def send(self, data):
+        self.bytes_out += len(data)
+        try:
+            self.send_raw(data)
+        except OSError as e:
+            LOG.debug("server", "send to %s failed: %s", self.key, e)
+
+class Match:
+    def __init__(self, match_id, game_map, team_size=5, tick_rate=60, snapshot_every=2, compress=False,
+                 interest=True, spectator_delay=0.0):
+        self.id = match_id
+        self.game_map = game_map
+        self.team_size = team_size
+        self.tick_rate = tick_rate
+        self.snapshot_every = max(1, snapshot_every)
+        self.compress = compress
+        # None sends every client the full state
+        self.interest = InterestManager() if interest else None
+        # shared by successive Games; preallocated once per match
+        self.history = PositionHistory(max_players=2 * team_size)
+        self.feed = SpectatorFeed(tick_rate, spectator_delay, compress)
+        self.clients = {}
+        self.tick_times = deque(maxlen=tick_rate * 10)
+        self.ticks = 0
+        self.dropped_ticks = 0
+        self.failed_ticks = 0
+        self.bytes_out = 0
+        self.game = None
+        self._new_game()
+
+    def _new_game(self):
+        """Fresh Game with bot-filled teams; connected clients keep a seat on their team."""
+        chars = list(ASSET_PATHS.keys())
+        roster = [(_bot_name(team, i), team, random.choice(chars), True)
+                  for team in ("A", "B") for i in range(self.team_size)]
+        if self.game is not None:
+            seated = [e for e in self.game.roster if not e[3]]
+            for name, team, char, _ in seated:
+                i = next((i for i, e in enumerate(roster) if e[1] == team and e[3]), None)
+                if i is not None:
+                    roster[i] = (name, team, char, False)
+        self.game = Game(self.game_map, default_plant_zone(), {}, {})
+        self.game.create_players(roster)
+        self.history.reset()
+        self.game.history = self.history
+        if self.interest is not None:
+            self.interest.reset()
+        self.feed.reset()
+
+    # --- membership ---
+    def humans(self, team=None):
+        return [e for e in self.game.roster if not e[3] and (team is None or e[1] == team)]
+
+    def has_room(self):
+        return len(self.humans()) < len(self.game.roster)
+
+    def add_client(self, slot, char):
+        """Give slot a bot's seat on the team with fewer humans; returns the player or None."""
+        roster = self.game.roster
+        teams = sorted(("A", "B"), key=lambda t: len(self.humans(t)))
+        for team in teams:
+            for i, (bot_name, t, bot_char, is_bot) in enumerate(roster):
+                if t != team or not is_bot:
+                    continue
+                taken = {e[0] for e in roster}
+                name = slot.name
+                n = 2
+                while name in taken:
+                    name = f"{slot.name}{n}"
+                    n += 1
+                roster[i] = (name, team, char if isinstance(char, str) and char in ASSET_PATHS else bot_char, False)
+                slot.player_name = name
+                self.clients[slot.key] = slot
+                # take over the live bot now; the chosen class applies from next round
+                for p in self.game.players:
+                    if p.name == bot_name:
+                        p.name = name
+                        p.is_bot = False
+                        return p
+                return None
+        return None
+
+    def remove_client(self, key):
+        slot = self.clients.pop(key, None)
+        if slot is None:
+            return
+        if self.interest is not None:
+            self.interest.forget(key)
+        roster = self.game.roster
+        for i, (name, team, char, is_bot) in enumerate(roster):
+            if name == slot.player_name and not is_bot:
+                bot_name = _bot_name(team, sum(1 for e in roster[:i] if e[1] == team))
+                roster[i] = (bot_name, team, char, True)
+                for p in self.game.players:
+                    if p.name == name:
+                        p.name = bot_name
+                        p.is_bot = True
+                break
+
+    # --- simulation ---
+    def drain_inputs(self):
+        """Fold each client's queued inputs into one controls dict for this tick."""
+        inputs = {}
+        for slot in self.clients.values():
+            controls = slot.controls
+            fire = action = False
+            while slot.inputs:
+                msg = slot.inputs.popleft()
+                fire = fire or bool(msg.get("fire"))
+                action = action or bool(msg.get("action"))
+                controls = msg
+            slot.controls = controls
+            if controls:
+                merged = dict(controls)
+                merged["fire"] = fire or bool(controls.get("fire"))
+                merged["action"] = action or bool(controls.get("action"))
+                inputs[slot.player_name] = merged
+        return inputs
+
+    def tick(self, dt):
+        start = time.perf_counter()
+        self.game.step(dt, self.drain_inputs())
+        if self.game.state == "MATCH_END":
+            LOG.info("server", "match %d finished %s", self.id, self.game.scores)
+            self._new_game()
+        self.ticks += 1
+        if self.ticks % self.snapshot_every == 0 and (self.clients or self.feed.viewers):
+            self.broadcast()
+        self.feed.release(self.ticks)
+        self.tick_times.append((time.perf_counter() - start) * 1000.0)
+
+    def broadcast(self):
+        """Send each client the current state as a delta against the last one it acknowledged."""
+        state = capture_state(self.game)
+        self.feed.push(state, self.ticks)
+        if not self.clients:
+            return
+        views = self.interest.filter(self.game, state, self.clients.values()) if self.interest else None
+        encoded = {}
+        for slot in self.clients.values():
+            base = slot.sent.get(slot.ack_tick)
+            if views is not None:
+                # filtered views differ per client, so nothing to share
+                state = views[slot.key]
+                data = protocol.encode(MSG_SNAPSHOT, codec.encode(state, base, self.compress))
+            else:
+                key = base.tick if base is not None else None
+                data = encoded.get(key)
+                if data is None:
+                    data = protocol.encode(MSG_SNAPSHOT, codec.encode(state, base, self.compress))
+                    encoded[key] = data
+            slot.send(data)
+            self.bytes_out += len(data)
+            sent = slot.sent
+            sent[state.tick] = state
+            while len(sent) > BASELINE_HISTORY:
+                del sent[next(iter(sent))]
+
+    async def run(self, stop):
+        loop = asyncio.get_running_loop()
+        period = 1.0 / self.tick_rate
+        next_t = loop.time()
+        while not stop.is_set():
+            next_t += period
+            try:
+                self.tick(period)
+            except Exception:
+                # one bad tick must not take the match (and everyone in it) down
+                self.failed_ticks += 1
+                LOG.error("server", "match %d tick failed\n%s", self.id, traceback.format_exc())
+            delay = next_t - loop.time()
+            if delay > 0:
+                await asyncio.sleep(delay)
+            else:
+                # fell behind: skip the ticks we can't make up rather than spiralling
+                missed = int(-delay // period)
+                if missed:
+                    self.dropped_ticks += missed
+                    next_t += missed * period
+                await asyncio.sleep(0)
+
+    def metrics(self):
+        times = sorted(self.tick_times)
+        return {
+            "match": self.id,
+            "players": len(self.game.players),
+            "humans": len(self.clients),
+            "spectators": len(self.feed.viewers),
+            "state": self.game.state,
+            "ticks": self.ticks,
+            "dropped_ticks": self.dropped_ticks,
+            "failed_ticks": self.failed_ticks,
+            "tick_ms_avg": round(sum(times) / len(times), 3) if times else 0.0,
+            "tick_ms_p50": round(_percentile(times, 0.50), 3),
+            "tick_ms_p99": round(_percentile(times, 0.99), 3),
+            "tick_ms_max": round(times[-1], 3) if times else 0.0,
+            "bytes_out": self.bytes_out,
+            "spectator_bytes_out": self.feed.bytes_out,
+            "interest_culled": round(self.interest.culled_ratio(), 3) if self.interest else 0.0,
+        }
+
+class GameServer:
+    def __init__(self, host="0.0.0.0", port=protocol.DEFAULT_PORT, matches=1, max_matches=64,
+                 team_size=5, tick_rate=60, snapshot_rate=30, use_tcp=False, compress=False,
+                 interest=True, map_seed=None, game_map=None, spectators=False, spectator_delay=0.0):
+        self.host = host
+        self.port = port
+        self.max_matches = max_matches
+        self.team_size = team_size
+        self.tick_rate = tick_rate
+        self.snapshot_every = max(1, round(tick_rate / max(1, snapshot_rate)))
+        self.use_tcp = use_tcp
+        self.compress = compress
+        self.interest = interest
+        # spectators see the unfogged state, so watching is opt-in per server
+        self.allow_spectators = spectators
+        self.spectator_delay = spectator_delay
+        self.map_seed = map_seed
+        # a worker gets the grid from sharedmaps.attach, its tables already loaded
+        self.game_map = game_map if game_map is not None else generate_map(map_seed)
+        sharedmaps.prepare(self.game_map)
+        self.matches = {}
+        self.clients = {}
+        self.spectators = {}
+        self._next_match = 1
+        self._stop = None
+        self._loop = None
+        self._tasks = []
+        self.started = threading.Event()
+        for _ in range(matches):
+            self.create_match()
+
+    def create_match(self):
+        mid = self._next_match
+        self._next_match += 1
+        # each match gets its own copy of the grid in case tiles change mid-round
+        match = Match(mid, [row[:] for row in self.game_map], self.team_size,
+                      self.tick_rate, self.snapshot_every, self.compress, self.interest,
+                      self.spectator_delay)
+        self.matches[mid] = match
+        if self._loop is not None:
+            self._tasks.append(self._loop.create_task(match.run(self._stop)))
+        LOG.info("server", "created match %d", mid)
+        return match
+
+    def metrics(self):
+        return [m.metrics() for m in self.matches.values()]
+
+    # --- message handling ---
+    def handle(self, key, data, send):
+        msg_type, payload = protocol.decode(data)
+        if msg_type is None:
+            return
+        slot = self.clients.get(key)
+        if slot is not None:
+            slot.last_seen = time.monotonic()
+        elif key in self.spectators:
+            self.spectators[key].last_seen = time.monotonic()
+
+        if msg_type == MSG_INPUT:
+            if slot is None or not isinstance(payload, dict):
+                return
+            controls = _clean_input(payload)
+            if controls is None:
+                LOG.debug("server", "dropped malformed input from %s", key)
+                return
+            if controls["seq"] <= slot.last_seq:
+                return  # stale or duplicated datagram
+            slot.last_seq = controls["seq"]
+            ack = controls.get("ack")
+            # only a tick we can have sent; anything else keeps the previous baseline
+            if ack is not None and ack <= slot.match.game.tick:
+                slot.ack_tick = ack
+            slot.inputs.append(controls)
+        elif msg_type == MSG_JOIN:
+            self._join(key, payload if isinstance(payload, dict) else {}, send)
+        elif msg_type == MSG_SPECTATE:
+            self._spectate(key, payload if isinstance(payload, dict) else {}, send)
+        elif msg_type == MSG_LEAVE:
+            self.drop_client(key)
+        elif msg_type == MSG_STATS:
+            send(protocol.encode(MSG_STATS_REPLY, {"matches": self.metrics()}))
+
+    def _join(self, key, payload, send):
+        slot = self.clients.get(key)
+        if slot is None:
+            name = str(payload.get("name") or "Player")[:16]
+            ok, wanted = _match_field(payload)
+            if not ok:
+                send(protocol.encode(MSG_ERROR, {"error": "no such match"}))
+                return
+            match = self._pick_match(wanted)
+            if match is None:
+                send(protocol.encode(MSG_ERROR, {"error": "server full"}))
+                return
+            if self._watching(key, match):
+                send(protocol.encode(MSG_ERROR, {"error": "already spectating this match"}))
+                return
+            slot = ClientSlot(key, send, name, match)
+            slot.view_size = clamp_view(payload.get("canvas"))
+            player = match.add_client(slot, payload.get("char"))
+            if player is None:
+                send(protocol.encode(MSG_ERROR, {"error": "match full"}))
+                return
+            self.clients[key] = slot
+            LOG.info("server", "%s joined match %d as %s", key, match.id, slot.player_name)
+        match = slot.match
+        player = next((p for p in match.game.players if p.name == slot.player_name), None)
+        # resent on duplicate joins, since the first welcome may have been lost
+        slot.send(protocol.encode(MSG_WELCOME, {
+            "id": player.id if player else -1,
+            "name": slot.player_name,
+            "match": match.id,
+            "tick_rate": self.tick_rate,
+        }))
+
+    def _spectate(self, key, payload, send):
+        slot = self.spectators.get(key)
+        if slot is None:
+            if not self.allow_spectators:
+                send(protocol.encode(MSG_ERROR, {"error": "spectating is disabled on this server"}))
+                return
+            ok, wanted = _match_field(payload)
+            if not ok:
+                match = None
+            elif wanted is not None:
+                match = self.matches.get(wanted)
+            else:
+                match = next(iter(self.matches.values()), None)
+            if match is None:
+                send(protocol.encode(MSG_ERROR, {"error": "no such match"}))
+                return
+            if self._playing(key, match):
+                # a second socket would show its player the whole map
+                send(protocol.encode(MSG_ERROR, {"error": "already playing in this match"}))
+                return
+            slot = ClientSlot(key, send, "spectator", match)
+            self.spectators[key] = slot
+            LOG.info("server", "%s is spectating match %d", key, match.id)
+        # resent on duplicates, which double as the spectator's keepalive
+        slot.send(protocol.encode(MSG_WELCOME, {
+            "id": -1,
+            "name": None,
+            "match": slot.match.id,
+            "tick_rate": self.tick_rate,
+            "spectator": True,
+            "delay": self.spectator_delay,
+        }))
+        if slot.key not in slot.match.feed.viewers:
+            slot.match.feed.add(slot)
+
+    def _playing(self, key, match):
+        """Whether key's address has a player slot in match."""
+        host = _host(key)
+        return any(_host(k) == host for k in match.clients)
+
+    def _watching(self, key, match):
+        """Whether key's address is spectating match."""
+        host = _host(key)
+        return any(_host(k) == host for k in match.feed.viewers)
+
+    def _pick_match(self, wanted):
+        if wanted is not None:
+            match = self.matches.get(wanted)
+            return match if match is not None and match.has_room() else None
+        for match in self.matches.values():
+            if match.has_room():
+                return match
+        if len(self.matches) < self.max_matches:
+            return self.create_match()
+        return None
+
+    def drop_client(self, key):
+        spectator = self.spectators.pop(key, None)
+        if spectator is not None:
+            spectator.match.feed.remove(key)
+            LOG.info("server", "%s stopped spectating match %d", key, spectator.match.id)
+        slot = self.clients.pop(key, None)
+        if slot is not None:
+            slot.match.remove_client(key)
+            LOG.info("server", "%s left match %d", key, slot.match.id)
+
+    async def _housekeeping(self):
+        last_metrics = time.monotonic()
+        while not self._stop.is_set():
+            await asyncio.sleep(1.0)
+            now = time.monotonic()
+            for key, slot in list(self.clients.items()) + list(self.spectators.items()):
+                if now - slot.last_seen > CLIENT_TIMEOUT:
+                    LOG.info("server", "%s timed out", key)
+                    self.drop_client(key)
+            if now - last_metrics >= METRICS_INTERVAL:
+                last_metrics = now
+                for m in self.metrics():
+                    LOG.info("server", "match %d: %d players, %d spectators, tick avg %.2f ms p99 %.2f ms, %d dropped",
+                             m["match"], m["players"], m["spectators"], m["tick_ms_avg"], m["tick_ms_p99"],
+                             m["dropped_ticks"])
+
+    # --- transports ---
+    async def _serve_udp(self):
+        server = self
+
+        class Protocol(asyncio.DatagramProtocol):
+            def connection_made(self, transport):
+                self.transport = transport
+
+            def datagram_received(self, data, addr):
+                server.handle(addr, data, lambda d, addr=addr: self.transport.sendto(d, addr))
+
+        transport, _ = await self._loop.create_datagram_endpoint(
+            Protocol, local_addr=(self.host, self.port))
+        return transport
+
+    async def _serve_tcp(self):
+        async def on_connection(reader, writer):
+            key = writer.get_extra_info("peername")
+            frames = protocol.FrameReader()
+            send = lambda d: writer.write(protocol.frame(d))
+            try:
+                while not self._stop.is_set():
+                    chunk = await reader.read(65536)
+                    if not chunk:
+                        break
+                    for data in frames.feed(chunk):
+                        self.handle(key, data, send)
+            except (ConnectionError, ValueError) as e:
+                LOG.debug("server", "tcp client %s: %s", key, e)
+            finally:
+                self.drop_client(key)
+                writer.close()
+
+        return await asyncio.start_server(on_connection, self.host, self.port)
+
+    async def serve(self):
+        self._loop = asyncio.get_running_loop()
+        self._stop = asyncio.Event()
+        transport = await (self._serve_tcp() if self.use_tcp else self._serve_udp())
+        LOG.info("server", "listening on %s:%d (%s), %d matches at %d Hz",
+                 self.host, self.port, "tcp" if self.use_tcp else "udp",
+                 len(self.matches), self.tick_rate)
+        self._tasks = [self._loop.create_task(m.run(self._stop)) for m in self.matches.values()]
+        self._tasks.append(self._loop.create_task(self._housekeeping()))
+        self.started.set()
+        try:
+            await self._stop.wait()
+        finally:
+            for task in self._tasks:
+                task.cancel()
+            transport.close()
+
+    def stop(self):
+        """Stop serving; safe to call from another thread."""
+        if self._loop is not None and self._stop is not None:
+            self._loop.call_soon_threadsafe(self._stop.set)
+
+def init_headless():
+    """pygame without a window: the simulation only needs its clock and Rects."""
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+    pygame.init()
+
+def serve_in_thread(**kwargs):
+    """Run a GameServer on a daemon thread (used by main.py --host)."""
+    server = GameServer(**kwargs)
+    thread = threading.Thread(target=lambda: asyncio.run(server.serve()), name="game-server", daemon=True)
+    thread.start()
+    server.started.wait(5.0)
+    return server
+
+def _rss_mib():
+    """Resident set size of this process in MiB, or nan where /proc is unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 2 ** 20
+    except (OSError, ValueError, AttributeError):
+        return float("nan")
+
+def _run_worker(index, spec, options, log_spec, telemetry_dir, spawned_at):
+    """Entry point of a --workers process: attach to the shared maps and serve."""
+    LOG.configure(log_spec)
+    LOG.start()
+    if telemetry_dir:
+        telemetry.open_sink(telemetry_dir)
+    init_headless()
+    start = time.perf_counter()
+    game_map = sharedmaps.attach(spec)
+    server = GameServer(game_map=game_map, **options)
+    LOG.info("server", "worker %d on port %d: ready %.0f ms after spawn (setup %.1f ms), rss %.1f MiB",
+             index, options["port"], (time.time() - spawned_at) * 1000.0,
+             (time.perf_counter() - start) * 1000.0, _rss_mib())
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        telemetry.SINK.close()
+        LOG.stop()
+
+def serve_workers(workers, options, map_seed, log_spec, telemetry_dir):
+    """Run matches in worker processes sharing one published copy of the map data."""
+    import multiprocessing
+    init_headless()
+    shared = sharedmaps.SharedMaps(generate_map(map_seed))
+    # spawn on every platform: forking a process with running threads is unsafe
+    ctx = multiprocessing.get_context("spawn")
+    procs = []
+    try:
+        for i in range(workers):
+            opts = dict(options, map_seed=map_seed, port=options["port"] + i,
+                        matches=options["matches"] // workers + (i < options["matches"] % workers),
+                        max_matches=-(-options["max_matches"] // workers))
+            proc = ctx.Process(target=_run_worker, name=f"server-worker-{i}",
+                               args=(i, shared.spec, opts, log_spec, telemetry_dir, time.time()))
+            proc.start()
+            procs.append(proc)
+        LOG.info("server", "%d workers on ports %d-%d", workers, options["port"], options["port"] + workers - 1)
+        for proc in procs:
+            proc.join()
+    except KeyboardInterrupt:
+        # Ctrl+C reaches the workers too; give them time to close their logs and telemetry
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+    finally:
+        for proc in procs:
+            proc.join(5.0)
+            if proc.is_alive():
+                proc.terminate()
+        shared.close()
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pixel Tactics dedicated server")
+    parser.add_argument("--bind", default="0.0.0.0")
+    parser.add_argument("--port", type=int, default=protocol.DEFAULT_PORT)
+    parser.add_argument("--tcp", action="store_true", help="use TCP instead of UDP")
+    parser.add_argument("--matches", type=int, default=1, help="matches to start immediately")
+    parser.add_argument("--max-matches", type=int, default=64)
+    parser.add_argument("--team-size", type=int, default=5)
+    parser.add_argument("--tick-rate", type=int, default=60)
+    parser.add_argument("--snapshot-rate", type=int, default=30)
+    parser.add_argument("--zlib", action="store_true", help="zlib-compress snapshots when it helps")
+    parser.add_argument("--no-interest", action="store_true",
+                        help="send every client the full state instead of what it can see")
+    parser.add_argument("--map-seed", type=int, help="procedural map instead of the stock one")
+    parser.add_argument("--spectators", action="store_true",
+                        help="let clients watch matches unfogged (never from an address playing in the match)")
+    parser.add_argument("--spectator-delay", type=float, default=0.0, metavar="SECONDS",
+                        help="hold the spectator stream back by this long")
+    parser.add_argument("--workers", type=int, default=0,
+                        help="run matches in N processes on ports PORT..PORT+N-1, sharing the map data")
+    parser.add_argument("--log", default="", help='log spec, e.g. "info,server=debug"')
+    parser.add_argument("--telemetry", metavar="DIR",
+                        help="record match events and heatmaps into DIR (see src/telemetry.py)")
+    args = parser.parse_args(argv)
+
+    LOG.configure(args.log)
+    LOG.start()
+    options = dict(host=args.bind, port=args.port, matches=args.matches, max_matches=args.max_matches,
+                   team_size=args.team_size, tick_rate=args.tick_rate, snapshot_rate=args.snapshot_rate,
+                   use_tcp=args.tcp, compress=args.zlib, interest=not args.no_interest,
+                   spectators=args.spectators, spectator_delay=args.spectator_delay)
+    if args.workers > 0:
+        try:
+            serve_workers(args.workers, options, args.map_seed, args.log, args.telemetry)
+        finally:
+            LOG.stop()
+        return
+    if args.telemetry:
+        telemetry.open_sink(args.telemetry)
+    init_headless()
+    server = GameServer(map_seed=args.map_seed, **options)
+    try:
+        asyncio.run(server.serve())
+    except KeyboardInterrupt:
+        pass
+    finally:
+        telemetry.SINK.close()
+        LOG.stop()
+
+if __name__ == "__main__":
+    sys.exit(main())
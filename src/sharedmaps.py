@@ -0,0 +1,92 @@
+"""
+sharedmaps.py
+Map grid and derived tables published once in a shared memory map for server worker processes
+
+The parent builds everything a match derives from its map:
+  - the tile grid
+  - the clearance planes (clearance.py)
+  - the per-tile FOV table (fov.py)
+It then writes the grid and every buffer the AssetManager holds into one
+file. That includes decoded sprites if any were loaded, though a headless
+server never decodes them. The spec is a small picklable manifest: the file
+path plus one (key, w, h, offset, length) entry per buffer.
+
+A worker calls attach(spec). It maps the file read-only, so the OS enforces
+that no worker can write to it. It then hands the AssetManager memoryviews
+into the mapping, so ClearanceField, TeamVisibility and map_grid() find
+their data already loaded. Nothing is decoded, recomputed or copied, and
+every worker reads the same page-cache pages. A match that changes a tile
+copies its own clearance planes and drops the shared FOV table (see
+Game.set_tile).
+
+The parent owns the file and deletes it on close().
+"""
+
+import os
+import mmap
+import tempfile
+from src.assets import get_assets
+from src.clearance import clearance_planes
+from src.fov import fov_table
+from src.log import LOG
+
+_GRID_KEY = ("shared_grid",)
+_ALIGN = 64
+
+def prepare(game_map):
+    """Build (or load from the disk cache) every table matches derive from game_map."""
+    clearance_planes(game_map)
+    fov_table(game_map)
+
+class SharedMaps:
+    """Parent side: owns the mapped file."""
+
+    def __init__(self, game_map):
+        prepare(game_map)
+        h, w = len(game_map), len(game_map[0])
+        items = [(_GRID_KEY, (w, h, bytes(v for row in game_map for v in row)))]
+        items += get_assets().loaded()
+        entries = []
+        size = 0
+        fd, self.path = tempfile.mkstemp(prefix="pixel-tactics-maps-", suffix=".bin")
+        with os.fdopen(fd, "wb") as f:
+            for key, (iw, ih, data) in items:
+                entries.append((key, iw, ih, size, len(data)))
+                f.write(data)
+                pad = -len(data) % _ALIGN
+                f.write(bytes(pad))
+                size += len(data) + pad
+        self.size = size
+        self.spec = {"path": self.path, "entries": entries}
+        LOG.info("server", "published %d map/asset buffers (%.1f KiB) in %s",
+                 len(entries), size / 1024, self.path)
+
+    def close(self):
+        if self.path is not None:
+            try:
+                os.remove(self.path)
+            except OSError as e:
+                LOG.warning("server", "could not remove %s: %s", self.path, e)
+            self.path = None
+
+# worker side: the mapping, kept open for the life of the process
+_attached = None
+
+def attach(spec):
+    """
+    Map a parent's SharedMaps read-only and install its buffers in this
+    process's AssetManager. Returns the map grid as a fresh list of rows.
+    """
+    global _attached
+    with open(spec["path"], "rb") as f:
+        _attached = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    view = memoryview(_attached)
+    assets = get_assets()
+    grid = None
+    for key, w, h, offset, length in spec["entries"]:
+        data = view[offset:offset + length]
+        if key == _GRID_KEY:
+            grid = [list(data[y * w:(y + 1) * w]) for y in range(h)]
+        else:
+            assets.provide(key, (w, h, data))
+    return grid
@@ -0,0 +1,79 @@
+"""
+spectate.py
+Encode-once spectator feed: one full-visibility stream per match, fanned out to every viewer
+
+Spectators see everything, so unlike players they never need per-client
+filtering or per-client delta baselines. Each snapshot tick the match's
+SpectatorFeed encodes its unfiltered WorldState once:
+  - a keyframe every KEYFRAME_INTERVAL seconds
+  - otherwise a delta against the latest keyframe, not against whatever a
+    viewer acknowledged, so no acks are needed and every viewer can decode
+    every frame
+The finished message bytes wait in a delay buffer for the broadcast delay,
+then the same buffer goes to every viewer. Another spectator therefore
+costs one send per snapshot and no encoding.
+
+A viewer joining mid-match is sent the latest released keyframe straight
+away. Every delta released after it is against that keyframe or a later
+one, so the feed can be followed from there. While nobody watches, nothing
+is encoded; the first viewer then waits out the delay before the stream
+starts.
+"""
+
+from collections import deque
+from src import codec
+from src import protocol
+from src.protocol import MSG_SNAPSHOT
+
+KEYFRAME_INTERVAL = 1.0
+
+class SpectatorFeed:
+    def __init__(self, tick_rate=60, delay=0.0, compress=False, keyframe_interval=KEYFRAME_INTERVAL):
+        self.delay_ticks = max(0, round(delay * tick_rate))
+        self.keyframe_ticks = max(1, round(keyframe_interval * tick_rate))
+        self.compress = compress
+        # key -> ClientSlot
+        self.viewers = {}
+        # (release tick, message, is keyframe), oldest first
+        self.pending = deque()
+        self.keyframe = None
+        self.keyframe_message = None
+        self.encoded = 0
+        self.bytes_out = 0
+
+    def add(self, slot):
+        self.viewers[slot.key] = slot
+        if self.keyframe_message is not None:
+            slot.send(self.keyframe_message)
+
+    def remove(self, key):
+        self.viewers.pop(key, None)
+
+    def reset(self):
+        """New game: its first frame is a keyframe (game ticks start over)."""
+        self.keyframe = None
+
+    def push(self, state, now):
+        """Encode state once and queue it for release delay ticks after now (the match tick)."""
+        if not self.viewers:
+            self.keyframe = None
+            return
+        base = self.keyframe
+        if base is not None and state.tick - base.tick >= self.keyframe_ticks:
+            base = None
+        message = protocol.encode(MSG_SNAPSHOT, codec.encode(state, base, self.compress))
+        if base is None:
+            self.keyframe = state
+        self.pending.append((now + self.delay_ticks, message, base is None))
+        self.encoded += 1
+
+    def release(self, now):
+        """Send every queued message that is due to all viewers."""
+        pending = self.pending
+        while pending and pending[0][0] <= now:
+            _, message, is_keyframe = pending.popleft()
+            if is_keyframe:
+                self.keyframe_message = message
+            for slot in self.viewers.values():
+                slot.send(message)
+            self.bytes_out += len(message) * len(self.viewers)
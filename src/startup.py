@@ -0,0 +1,29 @@
+"""
+startup.py
+Startup phase timing and time-to-first-frame report
+"""
+
+import time
+from src.log import LOG
+
+class StartupTimer:
+    def __init__(self, start=None):
+        self.start = time.perf_counter() if start is None else start
+        self._last = self.start
+        self.phases = []
+
+    def mark(self, name):
+        """Record the time since the previous mark under name."""
+        now = time.perf_counter()
+        self.phases.append((name, (now - self._last) * 1000.0))
+        self._last = now
+
+    def elapsed_ms(self):
+        return (time.perf_counter() - self.start) * 1000.0
+
+    def report(self, label="first frame"):
+        """Log every phase and the total time from process start to now."""
+        total = self.elapsed_ms()
+        parts = ", ".join(f"{name} {ms:.1f}" for name, ms in self.phases)
+        LOG.info("startup", "time to %s: %.1f ms (%s)", label, total, parts)
+        return total
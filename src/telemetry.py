@@ -0,0 +1,261 @@
+"""
+telemetry.py
+Match telemetry: fixed-size event records in a memory-mapped file, plus heatmaps
+
+Gameplay code reports events to the process-wide SINK:
+  - Player.fire              FIRE at the shooter
+  - Player.take_damage       DEATH at the victim, KILL at the killer
+  - Bomb plant/defuse/explode PLANT, DEFUSE, EXPLODE
+  - Game.end_round           ROUND_END, team = winner
+SINK is disabled until open_sink() is called, and a disabled sink returns
+straight away. An enabled one packs each event into a 16-byte record. The
+record goes into a memory-mapped file that doubles in size when full, and
+the event bumps one cell of the tile-resolution histograms (kills, deaths,
+fires, plants). No per-frame state is ever stored.
+
+Every process writes its own telemetry-<pid>.tlm. On close it saves its
+histograms next to it as a .npz. merge_heatmaps() sums any number of those
+files. If a .npz is missing, e.g. after a crash, the histograms are rebuilt
+from the records. The sink is not locked, so only the thread that steps the
+games may report to it.
+
+    python -m src.telemetry export telemetry/ --out heatmaps/
+
+merges every file in telemetry/ and writes one PNG per heatmap.
+"""
+
+import os
+import sys
+import glob
+import mmap
+import struct
+import argparse
+import numpy as np
+from src.config import MAP_W, MAP_H, TILE, MAP_TOP, ASSET_PATHS
+from src.log import LOG
+
+FIRE, DEATH, KILL, PLANT, DEFUSE, EXPLODE, ROUND_END = range(1, 8)
+EVENT_NAMES = {FIRE: "fire", DEATH: "death", KILL: "kill", PLANT: "plant",
+               DEFUSE: "defuse", EXPLODE: "explode", ROUND_END: "round_end"}
+
+# histogram layers and the event that feeds each
+HEATMAPS = ("kills", "deaths", "fires", "plants")
+_LAYER = {KILL: 0, DEATH: 1, FIRE: 2, PLANT: 3}
+
+# header: magic, version, record size, record count
+_HEADER = struct.Struct("<4sHHQ")
+_MAGIC = b"PTTL"
+_VERSION = 1
+# kind, who (bit 0 team B, bit 1 attacking, bits 2+ character), round, tick, x, y
+_RECORD = struct.Struct("<BBHIff")
+RECORD_DTYPE = np.dtype([("kind", "u1"), ("who", "u1"), ("round", "<u2"),
+                         ("tick", "<u4"), ("x", "<f4"), ("y", "<f4")])
+INITIAL_RECORDS = 1 << 16
+
+_CHARS = {name: i for i, name in enumerate(ASSET_PATHS)}
+
+class TelemetrySink:
+    def __init__(self):
+        self.enabled = False
+        self.path = None
+        self.count = 0
+        self.round = 0
+        self.tick = 0
+        self.attack_team = "A"
+        self.heat = None
+        self._file = None
+        self._mm = None
+        self._capacity = 0
+
+    def open(self, path, capacity=INITIAL_RECORDS):
+        self.close()
+        self.path = path
+        self.count = 0
+        self.heat = np.zeros((len(HEATMAPS), MAP_H, MAP_W), dtype=np.uint32)
+        self._file = open(path, "w+b")
+        self._map(capacity)
+        _HEADER.pack_into(self._mm, 0, _MAGIC, _VERSION, _RECORD.size, 0)
+        self.enabled = True
+
+    def _map(self, capacity):
+        self._file.truncate(_HEADER.size + capacity * _RECORD.size)
+        self._mm = mmap.mmap(self._file.fileno(), 0)
+        self._capacity = capacity
+
+    def _grow(self):
+        self._mm.flush()
+        self._mm.close()
+        self._map(self._capacity * 2)
+
+    def begin_step(self, game):
+        """Context for the events a Game.step is about to report."""
+        self.round = game.round
+        self.tick = game.tick
+        self.attack_team = game.attack_team
+
+    def _who(self, player):
+        who = (player.team == "B") | ((player.team == self.attack_team) << 1)
+        return who | (_CHARS.get(player.char, 0) << 2)
+
+    def record(self, kind, who, x, y):
+        if self.count >= self._capacity:
+            self._grow()
+        _RECORD.pack_into(self._mm, _HEADER.size + self.count * _RECORD.size,
+                          kind, who, self.round & 0xFFFF, self.tick & 0xFFFFFFFF, x, y)
+        self.count += 1
+        # count last, so a reader never sees a half-written record
+        struct.pack_into("<Q", self._mm, 8, self.count)
+        layer = _LAYER.get(kind)
+        if layer is not None:
+            tx = int(x // TILE)
+            ty = int((y - MAP_TOP) // TILE)
+            if 0 <= tx < MAP_W and 0 <= ty < MAP_H:
+                self.heat[layer, ty, tx] += 1
+
+    def fire(self, player):
+        if self.enabled:
+            self.record(FIRE, self._who(player), player.x, player.y)
+
+    def death(self, victim, killer=None):
+        if not self.enabled:
+            return
+        self.record(DEATH, self._who(victim), victim.x, victim.y)
+        if killer is not None and killer is not victim:
+            self.record(KILL, self._who(killer), killer.x, killer.y)
+
+    def bomb(self, kind, player, x, y):
+        if self.enabled:
+            self.record(kind, self._who(player) if player is not None else 0, x, y)
+
+    def round_end(self, winner_team):
+        if self.enabled:
+            self.record(ROUND_END, winner_team == "B", 0.0, 0.0)
+
+    def close(self):
+        if not self.enabled:
+            return
+        self.enabled = False
+        self._mm.flush()
+        self._mm.close()
+        self._file.truncate(_HEADER.size + self.count * _RECORD.size)
+        self._file.close()
+        np.savez(os.path.splitext(self.path)[0] + ".npz", heat=self.heat, layers=np.array(HEATMAPS))
+        LOG.info("main", "telemetry: %d events in %s", self.count, self.path)
+
+SINK = TelemetrySink()
+
+def open_sink(directory):
+    """Start recording this process's events into directory."""
+    os.makedirs(directory, exist_ok=True)
+    SINK.open(os.path.join(directory, f"telemetry-{os.getpid()}.tlm"))
+    return SINK
+
+def read_events(path):
+    """Records of a .tlm file as a NumPy structured array (memory-mapped, read-only)."""
+    with open(path, "rb") as f:
+        magic, version, size, count = _HEADER.unpack(f.read(_HEADER.size))
+    if magic != _MAGIC or version != _VERSION or size != _RECORD.size:
+        raise ValueError(f"{path}: not a telemetry file")
+    if count == 0:
+        return np.zeros(0, dtype=RECORD_DTYPE)
+    return np.memmap(path, dtype=RECORD_DTYPE, mode="r", offset=_HEADER.size, shape=(count,))
+
+def heatmaps_from_events(events):
+    heat = np.zeros((len(HEATMAPS), MAP_H, MAP_W), dtype=np.uint32)
+    for kind, layer in _LAYER.items():
+        ev = events[events["kind"] == kind]
+        tx = (ev["x"] // TILE).astype(np.intp)
+        ty = ((ev["y"] - MAP_TOP) // TILE).astype(np.intp)
+        ok = (tx >= 0) & (tx < MAP_W) & (ty >= 0) & (ty < MAP_H)
+        np.add.at(heat[layer], (ty[ok], tx[ok]), 1)
+    return heat
+
+def merge_heatmaps(paths):
+    """Sum the histograms of several processes' .tlm files."""
+    total = np.zeros((len(HEATMAPS), MAP_H, MAP_W), dtype=np.uint64)
+    for path in paths:
+        npz = os.path.splitext(path)[0] + ".npz"
+        if os.path.exists(npz):
+            with np.load(npz) as data:
+                total += data["heat"]
+        else:
+            total += heatmaps_from_events(read_events(path))
+    return total
+
+def _heat_colors(counts):
+    """Log-scaled black-red-yellow-white ramp with an alpha, as float arrays."""
+    t = np.log1p(counts.astype(np.float64))
+    peak = t.max()
+    if peak > 0:
+        t /= peak
+    rgb = np.stack([np.clip(3 * t, 0, 1), np.clip(3 * t - 1, 0, 1), np.clip(3 * t - 2, 0, 1)], axis=-1)
+    alpha = np.where(counts > 0, 0.35 + 0.6 * t, 0.0)[..., None]
+    return rgb * 255.0, alpha
+
+def render_heatmap(counts, game_map=None, scale=16):
+    """pygame Surface of one heatmap layer over a dimmed copy of the map."""
+    import pygame
+    from src.map import TILE_COLORS
+    bg = np.zeros((MAP_H, MAP_W, 3), dtype=np.float64)
+    if game_map is not None:
+        grid = np.asarray(game_map)
+        for value, color in TILE_COLORS.items():
+            bg[grid == value] = color
+        bg *= 0.35
+    rgb, alpha = _heat_colors(counts)
+    img = (bg * (1.0 - alpha) + rgb * alpha).astype(np.uint8)
+    small = pygame.Surface((MAP_W, MAP_H))
+    pygame.surfarray.blit_array(small, img.transpose(1, 0, 2))
+    return pygame.transform.scale(small, (MAP_W * scale, MAP_H * scale))
+
+def export_heatmaps(paths, out_dir, game_map=None, scale=16):
+    import pygame
+    heat = merge_heatmaps(paths)
+    os.makedirs(out_dir, exist_ok=True)
+    written = []
+    for layer, name in enumerate(HEATMAPS):
+        out = os.path.join(out_dir, f"{name}.png")
+        pygame.image.save(render_heatmap(heat[layer], game_map, scale), out)
+        written.append((out, int(heat[layer].sum())))
+    return written
+
+def _telemetry_files(inputs):
+    paths = []
+    for item in inputs:
+        if os.path.isdir(item):
+            paths.extend(sorted(glob.glob(os.path.join(item, "*.tlm"))))
+        else:
+            paths.append(item)
+    return paths
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Pixel Tactics telemetry tools")
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="merge telemetry files and write heatmap PNGs")
+    export.add_argument("inputs", nargs="+", help=".tlm files or directories of them")
+    export.add_argument("--out", default="heatmaps")
+    export.add_argument("--scale", type=int, default=16, help="pixels per tile")
+    export.add_argument("--no-map", action="store_true", help="plain black background")
+    summary = sub.add_parser("summary", help="event counts per file")
+    summary.add_argument("inputs", nargs="+")
+    args = parser.parse_args(argv)
+
+    paths = _telemetry_files(args.inputs)
+    if not paths:
+        print("no telemetry files found")
+        return 1
+    if args.command == "summary":
+        for path in paths:
+            kinds = np.bincount(read_events(path)["kind"], minlength=len(EVENT_NAMES) + 1)
+            print(path, ", ".join(f"{EVENT_NAMES[k]} {kinds[k]}" for k in sorted(EVENT_NAMES)))
+        return 0
+    game_map = None
+    if not args.no_map:
+        from src.map import generate_map
+        game_map = generate_map()
+    for out, total in export_heatmaps(paths, args.out, game_map, args.scale):
+        print(f"{out}: {total} events")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,87 @@
+"""
+timers.py
+Priority-queue scheduler on simulation time
+
+Game owns one Scheduler and advances it by dt at the top of every step.
+Entities store deadlines (timers.now + duration) instead of counting timers
+down each frame, and schedule a callback only when something has to happen
+at expiry (end of the round intro, bomb explosion, a Wizard's next burst
+shot). Nothing is paid per tick for a timer that is merely waiting.
+"""
+
+import heapq
+import itertools
+
+# rebuild the heap once this many cancelled entries are waiting in it
+_COMPACT_AT = 64
+
+class Timer:
+    __slots__ = ("when", "fn", "args", "cancelled")
+
+    def __init__(self, when, fn, args):
+        self.when = when
+        self.fn = fn
+        self.args = args
+        self.cancelled = False
+
+    @property
+    def pending(self):
+        return not self.cancelled
+
+class Scheduler:
+    def __init__(self):
+        self.now = 0.0
+        self._heap = []
+        self._seq = itertools.count()
+        self._cancelled = 0
+
+    def __len__(self):
+        return len(self._heap) - self._cancelled
+
+    def call_at(self, when, fn, *args):
+        """Run fn(*args) once simulation time reaches when; returns a Timer."""
+        timer = Timer(when, fn, args)
+        heapq.heappush(self._heap, (when, next(self._seq), timer))
+        return timer
+
+    def call_later(self, delay, fn, *args):
+        return self.call_at(self.now + delay, fn, *args)
+
+    def cancel(self, timer):
+        """Cancel timer if it is still pending; safe to call with None."""
+        if timer is None or timer.cancelled:
+            return
+        timer.cancelled = True
+        timer.fn = timer.args = None
+        self._cancelled += 1
+        if self._cancelled >= _COMPACT_AT and self._cancelled * 2 > len(self._heap):
+            self._heap = [e for e in self._heap if not e[2].cancelled]
+            heapq.heapify(self._heap)
+            self._cancelled = 0
+
+    def remaining(self, when):
+        """Seconds until deadline when, never negative."""
+        left = when - self.now
+        return left if left > 0.0 else 0.0
+
+    def advance(self, dt):
+        """
+        Move time forward by dt and run every timer that falls due, in order.
+        Callbacks see now set to their own deadline, so anything they schedule
+        is spaced from the event rather than from the end of the frame.
+        """
+        target = self.now + dt
+        heap = self._heap
+        while heap and heap[0][0] <= target:
+            when, _, timer = heapq.heappop(heap)
+            if timer.cancelled:
+                self._cancelled -= 1
+                continue
+            if when > self.now:
+                self.now = when
+            fn, args = timer.fn, timer.args
+            # mark done so a later cancel() is a no-op
+            timer.cancelled = True
+            timer.fn = timer.args = None
+            fn(*args)
+        self.now = target
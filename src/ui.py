@@ -4,19 +4,20 @@ UI rendering for menus and selection screens
 """
 
 import pygame
-from src.config import (WIDTH, HEIGHT, UI_BG, UI_ACCENT_LIGHT, UI_BG_DARK,
+from src.config import (UI_BG, UI_ACCENT_LIGHT, UI_BG_DARK,
                     WHITE, GRAY, ASSET_PATHS)
 
 def draw_combined_select(surf, sel_index, sprites, fonts):
+    width, height = surf.get_size()
     surf.fill(UI_BG)
     if fonts['BIG']:
         title = fonts['BIG'].render("SELECT YOUR OPERATOR", True, WHITE)
-        surf.blit(title, title.get_rect(center=(WIDTH//2, 40)))
+        surf.blit(title, title.get_rect(center=(width//2, 40)))
     names = list(ASSET_PATHS.keys())
     if not names:
         return
-    gap = WIDTH // (len(names) + 1)
-    y = HEIGHT // 3
+    gap = width // (len(names) + 1)
+    y = height // 3
     for i, name in enumerate(names):
         x = gap * (i + 1)
         card_rect = pygame.Rect(x - 64, y - 80, 128, 160)
@@ -33,4 +34,4 @@ def draw_combined_select(surf, sel_index, sprites, fonts):
             pygame.draw.rect(surf, WHITE, card_rect, width=3, border_radius=8)
     if fonts['SMALL']:
         help_text = fonts['SMALL'].render("←/→ select  ·  ENTER confirm", True, GRAY)
-        surf.blit(help_text, help_text.get_rect(center=(WIDTH//2, HEIGHT - 30)))
\ No newline at end of file
+        surf.blit(help_text, help_text.get_rect(center=(width//2, height - 30)))
\ No newline at end of file
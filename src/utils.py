@@ -4,10 +4,10 @@ Utility functions for collision detection, line of sight, and sprite loading
 """
 
 import pygame
-import os
 import math
 from pygame import Surface
 from src.config import TILE, MAP_TOP, MAP_W, MAP_H, SPRITE_SIZE
+from src.assets import get_assets
 
 def clamp(v, a, b):
     return max(a, min(b, v))
@@ -16,22 +16,19 @@ def lerp(a, b, t):
     return a + (b - a) * t
 
 def load_and_prepare_sprite(path, size=SPRITE_SIZE):
-    try:
-        if not os.path.exists(path):
-            raise FileNotFoundError(f"Sprite file not found: {path}")
-        img = pygame.image.load(path).convert_alpha()
-        if img.get_width() == 0 or img.get_height() == 0:
-            raise ValueError(f"Invalid sprite dimensions in {path}")
-        img = pygame.transform.smoothscale(img, (size, size))
+    """Shared scaled sprite from the asset cache, or a placeholder if it can't be loaded."""
+    img = get_assets().image(path, (size, size))
+    if img is not None:
         return img
-    except (pygame.error, FileNotFoundError, ValueError) as e:
-        print(f"Warning: failed to load sprite {path}: {e}")
-        surf = Surface((size, size), pygame.SRCALPHA)
-        surf.fill((180, 100, 100, 180))
-        pygame.draw.rect(surf, (255, 255, 255), surf.get_rect(), 2)
-        pygame.draw.line(surf, (255, 255, 255), (0, 0), (size, size), 2)
-        pygame.draw.line(surf, (255, 255, 255), (0, size), (size, 0), 2)
-        return surf
+    return make_placeholder_sprite(size)
+
+def make_placeholder_sprite(size=SPRITE_SIZE):
+    surf = Surface((size, size), pygame.SRCALPHA)
+    surf.fill((180, 100, 100, 180))
+    pygame.draw.rect(surf, (255, 255, 255), surf.get_rect(), 2)
+    pygame.draw.line(surf, (255, 255, 255), (0, 0), (size, size), 2)
+    pygame.draw.line(surf, (255, 255, 255), (0, size), (size, 0), 2)
+    return surf
 
 def tint_surface(src_surf, tint_color, alpha=120):
     surf = src_surf.copy()
@@ -48,6 +45,24 @@ def make_anim_frames(base_img):
     f1.blit(base_img, (0, 2))
     return (f0, f1)
 
+class LazyAnimFrames(dict):
+    """Character -> animation frames, each entry built by build(name) on first lookup."""
+
+    def __init__(self, build):
+        super().__init__()
+        self._build = build
+
+    def __missing__(self, key):
+        frames = self._build(key)
+        self[key] = frames
+        return frames
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
 def is_solid(px, py, radius=0, game_map=None):
     """Return True if the point or circle at (px,py) overlaps any solid tile."""
     if game_map is None: